@@ -0,0 +1,152 @@
+import asyncio
+import hmac
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+from api.warmups import MODEL_WARMUPS
+from config.logging_config import logger
+from config.settings import settings
+from utils.candidates import attach_candidate, detach_candidate
+from utils.inference_executor import process_pool_enabled
+from utils.model_loader import MODEL_LOADERS, activate_version, registry, reload_model
+from utils.model_registry import CANARY, SHADOW, ModelVersion
+from utils.warmup import smoke_test
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    """Allow the request only with the configured admin token (the API is off without one)"""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# Every hot-swapped version must score the route's warmup record first
+validate_version = partial(smoke_test, MODEL_WARMUPS)
+
+
+async def require_swappable_models():
+    """Refuse version changes that the inference pool processes would never see"""
+    if process_pool_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Model versions cannot change while INFERENCE_EXECUTOR is 'process': "
+                   "pool processes keep the models they loaded at start",
+        )
+
+
+def check_model_name(name: str):
+    if name not in MODEL_LOADERS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown model: {name}. Available: {list(MODEL_LOADERS)}",
+        )
+
+
+def get_version(name: str, version: int) -> ModelVersion:
+    check_model_name(name)
+    try:
+        return registry.get(name, version)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Version {version} of {name} is not loaded",
+        )
+
+
+@router.get("")
+async def list_model_versions():
+    """Loaded versions of every model with their metadata"""
+    return {"models": registry.describe()}
+
+
+@router.post("/{name}/reload", dependencies=[Depends(require_swappable_models)])
+async def reload_model_version(name: str):
+    """Load the latest artifact of a model, validate it and swap it in"""
+    check_model_name(name)
+    logger.info(f"Hot reload of {name} requested")
+    try:
+        result = await asyncio.to_thread(reload_model, name, validate_version)
+    except Exception as e:
+        logger.error(f"❌ Hot reload of {name} failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"New version of {name} was not activated: {str(e)}",
+        )
+    return {"success": True, **result}
+
+
+@router.post("/{name}/load")
+async def load_model_version(name: str):
+    """Load the latest artifact of a model as a standby version, for shadow or canary serving"""
+    check_model_name(name)
+    try:
+        result = await asyncio.to_thread(reload_model, name, None, False)
+    except Exception as e:
+        logger.error(f"❌ Loading a new version of {name} failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"New version of {name} could not be loaded: {str(e)}",
+        )
+    return {"success": True, **result}
+
+
+@router.post("/{name}/activate/{version}", dependencies=[Depends(require_swappable_models)])
+async def activate_model_version(name: str, version: int):
+    """Swap a previously loaded version in (rollback, or promotion of a canary)"""
+    model_version = get_version(name, version)
+    try:
+        await asyncio.to_thread(activate_version, model_version, validate_version)
+    except Exception as e:
+        logger.error(f"❌ Activation of {name} v{version} failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Version {version} of {name} was not activated: {str(e)}",
+        )
+    return {"success": True, "active": model_version.describe()}
+
+
+async def start_candidate(name: str, version: int, mode: str, percent: float = 0.0):
+    model_version = get_version(name, version)
+    try:
+        candidate = await asyncio.to_thread(attach_candidate, model_version, mode, percent, validate_version)
+    except Exception as e:
+        logger.error(f"❌ Attaching {name} v{version} as {mode} failed: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Version {version} of {name} cannot serve as {mode}: {str(e)}",
+        )
+    return {"success": True, "candidate": candidate.stats()}
+
+
+@router.post("/{name}/shadow/{version}", dependencies=[Depends(require_swappable_models)])
+async def shadow_model_version(name: str, version: int):
+    """Score every live request on a version too, off the request path, and compare it with the active one"""
+    return await start_candidate(name, version, SHADOW)
+
+
+@router.post("/{name}/canary/{version}", dependencies=[Depends(require_swappable_models)])
+async def canary_model_version(
+    name: str,
+    version: int,
+    percent: float = Query(default=settings.CANARY_PERCENT, ge=0, le=100),
+):
+    """Answer a percentage of live records with a version instead of the active one"""
+    return await start_candidate(name, version, CANARY, percent)
+
+
+@router.delete("/{name}/candidate")
+async def stop_candidate(name: str):
+    """Stop shadow or canary serving of a model, returning the candidate's final statistics"""
+    check_model_name(name)
+    candidate = detach_candidate(name)
+    if candidate is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No shadow or canary version attached to {name}",
+        )
+    return {"success": True, "candidate": candidate.stats()}
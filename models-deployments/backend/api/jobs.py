@@ -0,0 +1,107 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import FileResponse
+
+from api.machine_learning import customer_churn, customer_uplift, heart_disease, medical_charge
+from config.logging_config import logger
+from config.settings import settings
+from utils.jobs import COMPLETED, JobManager, JobScorer
+
+router = APIRouter()
+
+# Models a job can target, keyed by the same names as the router prefixes
+JOB_SCORERS = {
+    "medical-charge": JobScorer(
+        medical_charge.require_models, medical_charge.validate_record, medical_charge.score_records
+    ),
+    "heart-disease": JobScorer(
+        heart_disease.require_model, heart_disease.validate_record, heart_disease.score_records
+    ),
+    "customer-churn": JobScorer(
+        customer_churn.require_model, customer_churn.validate_record, customer_churn.score_records
+    ),
+    "customer-uplift": JobScorer(
+        customer_uplift.require_models, customer_uplift.validate_record, customer_uplift.score_records
+    ),
+}
+
+job_manager = JobManager(
+    settings.JOBS_DIR,
+    JOB_SCORERS,
+    settings.JOB_WORKERS,
+    settings.JOB_CHUNK_SIZE,
+)
+
+
+def job_not_found(job_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Job not found: {job_id}",
+    )
+
+
+@router.post(
+    "/{model}",
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_job(model: str, request: Request):
+    """Upload a CSV or NDJSON dataset and score it in the background"""
+    scorer = JOB_SCORERS.get(model)
+    if scorer is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown model: {model}. Available: {list(JOB_SCORERS)}",
+        )
+    await scorer.require_model()
+
+    manifest = await job_manager.create_job(model, request)
+    return {"success": True, "job_id": manifest["id"], "status": manifest["status"]}
+
+
+@router.get("")
+async def list_jobs():
+    """List all jobs with their status"""
+    return {"success": True, "jobs": job_manager.list_jobs()}
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Job status, progress and throughput"""
+    try:
+        return {"success": True, **job_manager.job_status(job_id)}
+    except KeyError:
+        raise job_not_found(job_id)
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (a running job stops after its current chunk)"""
+    try:
+        # Writing the manifest fsyncs, so it runs off the event loop
+        manifest = await asyncio.to_thread(job_manager.cancel_job, job_id)
+    except KeyError:
+        raise job_not_found(job_id)
+
+    logger.info(f"Job {job_id} cancellation requested")
+    return {"success": True, "job_id": job_id, "status": manifest["status"]}
+
+
+@router.get("/{job_id}/results")
+async def get_job_results(job_id: str):
+    """Download the NDJSON results of a completed job"""
+    try:
+        manifest = job_manager.read_manifest(job_id)
+    except KeyError:
+        raise job_not_found(job_id)
+
+    if manifest["status"] != COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {manifest['status']}, results are not available",
+        )
+    return FileResponse(
+        job_manager.results_path(job_id),
+        media_type="application/x-ndjson",
+        filename=f"{job_id}.ndjson",
+    )
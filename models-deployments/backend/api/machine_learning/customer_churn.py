@@ -1,13 +1,156 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Request, status
+import time
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
 import pandas as pd
 
-from utils.model_loader import models
-from utils.helpers import get_risk_level
+from utils.model_loader import ModelStore, ensure_models, models
+from utils.helpers import get_risk_level, process_churn_batch
+from utils.candidates import serve_candidates
+from utils.batch import BatchPredictionRequest, RecordValidationError, score_batch, batch_response
+from utils.metrics import ModelMetrics
+from utils.micro_batcher import score_one
+from utils.responses import json_response
+from utils.inference_executor import run_inference
+from utils.streaming import stream_predictions
+from utils.tree_engine import select_forest
 from config.logging_config import logger
 
 router = APIRouter()
 
+METRICS = ModelMetrics("customer_churn")
+
+# Representative record for the background warmup inference
+WARMUP_RECORD = {
+    "SeniorCitizen": 0,
+    "tenure": 24,
+    "MonthlyCharges": 65.5,
+    "TotalCharges": 1572.0,
+    "gender": "Male",
+    "Partner": "Yes",
+    "Dependents": "No",
+    "PhoneService": "Yes",
+    "MultipleLines": "No",
+    "InternetService": "Fiber optic",
+    "OnlineSecurity": "No",
+    "OnlineBackup": "Yes",
+    "DeviceProtection": "No",
+    "TechSupport": "No",
+    "StreamingTV": "Yes",
+    "StreamingMovies": "No",
+    "Contract": "Month-to-month",
+    "PaperlessBilling": "Yes",
+    "PaymentMethod": "Electronic check",
+}
+
+
+async def require_model():
+    """Raise if the churn model is not loaded"""
+    await ensure_models("customer_churn")
+    if models.customer_churn_model is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Model not loaded. Check model_loader configuration.",
+        )
+
+
+def find_missing_fields(record: Dict) -> List[str]:
+    """Return the required model columns absent from a record"""
+    model_data = models.customer_churn_model
+    required_cols = model_data["numerical_cols"] + model_data["categorical_cols"]
+    return list(set(required_cols) - set(record))
+
+
+def validate_record(record: Any) -> Dict:
+    """Validate one raw record before it joins the batch DataFrame"""
+    schema = models.customer_churn_schema
+    if schema is not None:
+        return schema.validate(record)
+
+    if not isinstance(record, dict) or not record:
+        raise RecordValidationError("No data provided")
+
+    missing_cols = find_missing_fields(record)
+    if missing_cols:
+        raise RecordValidationError(f"Missing required fields: {missing_cols}")
+
+    # Numerical values are imputed when null, but must otherwise be numbers
+    for col in models.customer_churn_model["numerical_cols"]:
+        value = record[col]
+        if value is None:
+            continue
+        try:
+            float(value)
+        except (TypeError, ValueError):
+            raise RecordValidationError(f"Invalid numeric value for field: {col}")
+
+    return record
+
+
+def format_prediction(prediction, confidence: List[float], churn_probability: float) -> Dict:
+    """Build the response fields for one prediction (confidence already rounded, churn_probability not)"""
+    return {
+        "prediction": prediction,
+        "prediction_label": (
+            "Customer Will Churn" if prediction == "Yes" else "Customer Will Stay"
+        ),
+        "confidence": {
+            "stay": confidence[0],
+            "churn": confidence[1],
+        },
+        "risk_level": get_risk_level(churn_probability),
+    }
+
+
+def build_features(records: List[Dict], store: Optional[ModelStore] = None) -> Union[np.ndarray, pd.DataFrame]:
+    """
+    Impute, scale and one-hot encode records into the model's features: a
+    float64 array from the compiled builder when available, else a DataFrame
+    """
+    store = store or models.snapshot()
+    model_data = store.customer_churn_model
+    builder = store.customer_churn_builder
+
+    if builder is not None:
+        return builder.build_batch(records)
+
+    return process_churn_batch(
+        records,
+        model_data["imputer_num"],
+        model_data["scaler"],
+        model_data["encoder"],
+        model_data["numerical_cols"],
+        model_data["categorical_cols"],
+        model_data["encoded_cols"],
+    )
+
+
+@serve_candidates("customer_churn")
+def score_records(records: List[Dict], store: Optional[ModelStore] = None) -> List[Dict]:
+    """Preprocess and score many records with one model call (on one model version throughout)"""
+    store = store or models.snapshot()
+    start = time.perf_counter_ns()
+    model = select_forest(store.customer_churn_forest, store.customer_churn_model["model"], len(records))
+    features = build_features(records, store)
+    if isinstance(features, np.ndarray) and hasattr(model, "feature_names_in_"):
+        features = pd.DataFrame(features, columns=store.customer_churn_builder.feature_names)
+    preprocessed = time.perf_counter_ns()
+
+    # Prediction (labels derived from probabilities, as RandomForestClassifier.predict does)
+    probabilities = model.predict_proba(features)
+    predictions = model.classes_.take(np.argmax(probabilities, axis=1))
+    predicted = time.perf_counter_ns()
+
+    # Rounded in NumPy, then tolist() converts each whole array to Python values in one call
+    results = [
+        format_prediction(prediction, confidence, probability)
+        for prediction, confidence, probability in zip(
+            predictions.tolist(), np.round(probabilities, 4).tolist(), probabilities[:, 1].tolist()
+        )
+    ]
+    METRICS.observe_scoring(len(records), start, preprocessed, predicted, time.perf_counter_ns())
+    return results
+
 
 # =========================
 # Prediction Endpoint
@@ -21,11 +164,7 @@ async def predict_customer_churn(request: Dict):
     """Predict Customer Churn (Flask-equivalent FastAPI version)"""
     try:
         # Check model availability
-        if models.customer_churn_model is None:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Model not loaded. Check model_loader configuration.",
-            )
+        await require_model()
 
         if not request:
             raise HTTPException(
@@ -35,60 +174,22 @@ async def predict_customer_churn(request: Dict):
 
         logger.info("Customer churn prediction request received")
 
-        # Extract model components
-        model_data = models.customer_churn_model
-        model = model_data["model"]
-        imputer_num = model_data["imputer_num"]
-        imputer_cat = model_data["imputer_cat"]
-        scaler = model_data["scaler"]
-        encoder = model_data["encoder"]
-        numerical_cols = model_data["numerical_cols"]
-        categorical_cols = model_data["categorical_cols"]
-        encoded_cols = model_data["encoded_cols"]
-
-        # Convert input JSON → DataFrame (same as Flask)
-        input_df = pd.DataFrame([request])
-
-        # Validate required columns dynamically
-        missing_cols = set(numerical_cols + categorical_cols) - set(input_df.columns)
-        if missing_cols:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Missing required fields: {list(missing_cols)}",
-            )
+        METRICS.serving()
 
-        # Numerical preprocessing
-        input_df[numerical_cols] = imputer_num.transform(input_df[numerical_cols])
-        input_df[numerical_cols] = scaler.transform(input_df[numerical_cols])
+        # Validate against the model's columns, categories and ranges
+        start = time.perf_counter_ns()
+        try:
+            record = validate_record(request)
+        except RecordValidationError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        finally:
+            METRICS.observe("validation", start, time.perf_counter_ns())
 
-        # Categorical preprocessing
-        encoded_values = encoder.transform(input_df[categorical_cols])
-        encoded_df = pd.DataFrame(encoded_values, columns=encoded_cols)
+        result = await score_one("customer_churn", score_records, record)
 
-        # Final feature set
-        final_df = pd.concat(
-            [input_df[numerical_cols], encoded_df],
-            axis=1,
-        )
+        logger.info(f"Customer churn prediction result: {result['prediction']}")
 
-        # Prediction
-        prediction = model.predict(final_df)[0]
-        probabilities = model.predict_proba(final_df)[0]
-
-        logger.info(f"Customer churn prediction result: {prediction}")
-
-        return {
-            "success": True,
-            "prediction": prediction,
-            "prediction_label": (
-                "Customer Will Churn" if prediction == "Yes" else "Customer Will Stay"
-            ),
-            "confidence": {
-                "stay": round(float(probabilities[0]), 4),
-                "churn": round(float(probabilities[1]), 4),
-            },
-            "risk_level": get_risk_level(probabilities[1]),
-        }
+        return json_response({"success": True, **result})
 
     except HTTPException:
         raise
@@ -101,3 +202,49 @@ async def predict_customer_churn(request: Dict):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction error: {str(e)}",
         )
+
+
+@router.post(
+    "/predict/batch",
+    status_code=status.HTTP_200_OK,
+)
+async def predict_customer_churn_batch(request: BatchPredictionRequest):
+    """Predict churn for many customers, returning per-record results in order"""
+    try:
+        await require_model()
+        METRICS.serving()
+
+        logger.info(
+            f"Customer churn batch prediction request received: {len(request.records)} records"
+        )
+
+        results = await run_inference(
+            score_batch, request.records, validate_record, score_records, METRICS
+        )
+
+        return json_response(batch_response(results))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Customer churn batch prediction error: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction error: {str(e)}",
+        )
+
+
+@router.post(
+    "/predict/stream",
+    status_code=status.HTTP_200_OK,
+)
+async def predict_customer_churn_stream(request: Request):
+    """Score a CSV or NDJSON upload, streaming NDJSON results back chunk by chunk"""
+    await require_model()
+
+    logger.info("Customer churn streaming prediction request received")
+
+    return await stream_predictions("Customer churn", request, validate_record, score_records)
@@ -1,13 +1,26 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from pydantic import BaseModel, Field
-from typing import Dict
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
 import pandas as pd
 
-from utils.model_loader import models
+from utils.model_loader import ModelStore, ensure_models, models
+from utils.candidates import serve_candidates
+from utils.batch import BatchPredictionRequest, score_batch, batch_response
+from utils.metrics import ModelMetrics
+from utils.micro_batcher import score_one
+from utils.responses import json_response
+from utils.inference_executor import run_inference
+from utils.streaming import stream_predictions
+from utils.uplift_scorer import FEATURE_ORDER
+from config.settings import settings
 from config.logging_config import logger
 
 router = APIRouter()
 
+METRICS = ModelMetrics("customer_uplift")
+
 
 def should_send_ad(uplift_value: float, threshold: float = 0.01) -> str:
     if uplift_value > threshold:
@@ -49,6 +62,9 @@ class CustomerUpliftRequest(BaseModel):
             }
         }
 
+# Representative record for the background warmup inference
+WARMUP_RECORD = CustomerUpliftRequest.model_config["json_schema_extra"]["example"]
+
 
 class CustomerUpliftResponse(BaseModel):
     success: bool
@@ -58,6 +74,81 @@ class CustomerUpliftResponse(BaseModel):
     decision: str
 
 
+async def require_models():
+    """Raise if either uplift model is not loaded"""
+    await ensure_models("uplift_treated", "uplift_control")
+    if (
+        models.uplift_treated_model is None
+        or models.uplift_control_model is None
+    ):
+        logger.error("Uplift models not loaded")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Uplift models not loaded. Please contact administrator.",
+        )
+
+
+def validate_record(record: Any) -> CustomerUpliftRequest:
+    """Validate one raw batch record"""
+    return CustomerUpliftRequest.model_validate(record)
+
+
+def predict_uplift(requests: List[CustomerUpliftRequest], store: Optional[ModelStore] = None):
+    """Return treated probabilities, control probabilities and uplift for many requests"""
+    store = store or models.snapshot()
+    start = time.perf_counter_ns()
+    # Both forests in one pass over a float32 array, no DataFrame
+    if store.uplift_scorer is not None and len(requests) <= settings.COMPILED_TREES_MAX_ROWS:
+        features = store.uplift_scorer.features(requests)
+        preprocessed = time.perf_counter_ns()
+        scores = store.uplift_scorer.score(features)
+        METRICS.observe("preprocess", start, preprocessed)
+        METRICS.observe("predict", preprocessed, time.perf_counter_ns())
+        return scores
+
+    # Prepare input features (order must match training)
+    input_features = [
+        [getattr(request, name) for name in FEATURE_ORDER]
+        for request in requests
+    ]
+
+    feature_names = [f"f{i}" for i in range(len(FEATURE_ORDER))]
+    input_df = pd.DataFrame(input_features, columns=feature_names)
+    preprocessed = time.perf_counter_ns()
+
+    # Predict probabilities
+    p_treat = store.uplift_treated_model.predict_proba(input_df)[:, 1]
+    p_control = store.uplift_control_model.predict_proba(input_df)[:, 1]
+    METRICS.observe("preprocess", start, preprocessed)
+    METRICS.observe("predict", preprocessed, time.perf_counter_ns())
+
+    return p_treat, p_control, p_treat - p_control
+
+
+def format_prediction(p_treat: float, p_control: float, rounded_uplift: float, uplift: float) -> Dict[str, Any]:
+    """Build the response fields for one prediction (probabilities already rounded, uplift both ways)"""
+    return {
+        "treated_probability": p_treat,
+        "control_probability": p_control,
+        "predicted_uplift": rounded_uplift,
+        "decision": should_send_ad(uplift),
+    }
+
+
+@serve_candidates("uplift_treated", "uplift_control")
+def score_records(requests: List[CustomerUpliftRequest], store: Optional[ModelStore] = None) -> List[Dict[str, Any]]:
+    """Score validated requests with one call per model"""
+    scores = predict_uplift(requests, store)
+    start = time.perf_counter_ns()
+    # Rounded in NumPy, then tolist() converts each whole array to Python floats in one call
+    results = [
+        format_prediction(*values)
+        for values in zip(*(np.round(score, 4).tolist() for score in scores), scores[2].tolist())
+    ]
+    METRICS.observe("format", start, time.perf_counter_ns())
+    METRICS.observe_batch(len(requests))
+    return results
+
 
 @router.post(
     "/predict",
@@ -68,53 +159,16 @@ async def predict_customer_uplift(request: CustomerUpliftRequest):
     """Predict customer uplift and ad decision"""
     try:
         # Check if models are loaded
-        if (
-            models.uplift_treated_model is None
-            or models.uplift_control_model is None
-        ):
-            logger.error("Uplift models not loaded")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Uplift models not loaded. Please contact administrator.",
-            )
+        await require_models()
+        METRICS.serving()
 
         logger.info("Customer uplift prediction request received")
 
-        # Prepare input features (order must match training)
-        input_features = [
-            request.age,
-            request.monthlyIncome,
-            request.tenure,
-            request.engagementScore,
-            request.sessionTime,
-            request.activityChange,
-            request.churnRisk,
-            request.appVisitsPerWeek,
-            request.regionCode,
-            request.totalClicks,
-            request.customerRating,
-            request.satisfactionTrend,
-        ]
-
-        feature_names = [f"f{i}" for i in range(len(input_features))]
-        input_df = pd.DataFrame([input_features], columns=feature_names)
-
-        # Predict probabilities
-        p_treat = models.uplift_treated_model.predict_proba(input_df)[0, 1]
-        p_control = models.uplift_control_model.predict_proba(input_df)[0, 1]
-
-        uplift = p_treat - p_control
-        decision = should_send_ad(uplift)
-
-        logger.info(f"Uplift prediction completed: uplift={uplift:.4f}")
-
-        return CustomerUpliftResponse(
-            success=True,
-            treated_probability=round(float(p_treat), 4),
-            control_probability=round(float(p_control), 4),
-            predicted_uplift=round(float(uplift), 4),
-            decision=decision,
-        )
+        result = await score_one("customer_uplift", score_records, request)
+
+        logger.info(f"Uplift prediction completed: uplift={result['predicted_uplift']:.4f}")
+
+        return json_response({"success": True, **result}, CustomerUpliftResponse)
 
     except HTTPException:
         raise
@@ -127,3 +181,49 @@ async def predict_customer_uplift(request: CustomerUpliftRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during uplift prediction",
         )
+
+
+@router.post(
+    "/predict/batch",
+    status_code=status.HTTP_200_OK,
+)
+async def predict_customer_uplift_batch(request: BatchPredictionRequest):
+    """Predict uplift for many customers, returning per-record results in order"""
+    try:
+        await require_models()
+        METRICS.serving()
+
+        logger.info(
+            f"Customer uplift batch prediction request received: {len(request.records)} records"
+        )
+
+        results = await run_inference(
+            score_batch, request.records, validate_record, score_records, METRICS
+        )
+
+        return json_response(batch_response(results))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Customer uplift batch prediction error: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error during uplift prediction",
+        )
+
+
+@router.post(
+    "/predict/stream",
+    status_code=status.HTTP_200_OK,
+)
+async def predict_customer_uplift_stream(request: Request):
+    """Score a CSV or NDJSON upload of customers, streaming NDJSON results back chunk by chunk"""
+    await require_models()
+
+    logger.info("Customer uplift streaming prediction request received")
+
+    return await stream_predictions("Customer uplift", request, validate_record, score_records)
@@ -1,12 +1,141 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Request, status
+import time
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
 
-from utils.model_loader import models
-from utils.helpers import process_input_data, get_risk_level
+from utils.model_loader import ModelStore, ensure_models, models
+from utils.helpers import process_input_batch, get_risk_level
+from utils.candidates import serve_candidates
+from utils.batch import BatchPredictionRequest, RecordValidationError, score_batch, batch_response
+from utils.metrics import ModelMetrics
+from utils.micro_batcher import score_one
+from utils.responses import json_response
+from utils.inference_executor import run_inference
+from utils.streaming import stream_predictions
 from config.logging_config import logger
 
 router = APIRouter()
 
+METRICS = ModelMetrics("heart_disease")
+
+# Representative record for the background warmup inference
+WARMUP_RECORD = {
+    "Gender": "Male",
+    "Blood Pressure": 140,
+    "Cholesterol Level": 220,
+    "Exercise Habits": "High",
+    "Smoking": "Yes",
+    "Family Heart Disease": "No",
+    "Diabetes": "Yes",
+    "BMI": 28.1,
+    "High Blood Pressure": "Yes",
+    "Low HDL Cholesterol": "No",
+    "High LDL Cholesterol": "No",
+    "Alcohol Consumption": "Low",
+    "Stress Level": "Medium",
+    "Sleep Hours": 6.5,
+    "Sugar Consumption": "Low",
+    "Triglyceride Level": 200,
+    "Fasting Blood Sugar": 110,
+    "CRP Level": 8.5,
+    "Homocysteine Level": 12.0,
+}
+
+
+async def require_model():
+    """Raise if the heart disease model is not loaded"""
+    await ensure_models("heart_disease")
+    if models.heart_disease_model is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Model not loaded",
+        )
+
+
+def validate_record(record: Any) -> Dict[str, Any]:
+    """Validate one raw record before it joins the batch DataFrame"""
+    schema = models.heart_disease_schema
+    if schema is not None:
+        return schema.validate(record)
+
+    if not isinstance(record, dict) or not record:
+        raise RecordValidationError("No data provided")
+
+    model_data = models.heart_disease_model
+    imputed_cols = set(model_data["imputer"].feature_names_in_)
+
+    # Numeric values without an imputer would poison the whole batch with NaN
+    for col in model_data["numeric_cols"]:
+        if col in imputed_cols:
+            continue
+        value = record.get(col)
+        if value is None:
+            raise RecordValidationError(f"Missing required field: {col}")
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise RecordValidationError(f"Invalid numeric value for field: {col}")
+        if value != value:
+            raise RecordValidationError(f"Missing required field: {col}")
+
+    return record
+
+
+def format_prediction(prediction: int, confidence: List[float], probability: float) -> Dict[str, Any]:
+    """Build the response fields for one prediction (confidence already rounded, probability not)"""
+    return {
+        "prediction": prediction,
+        "prediction_label": (
+            "Heart Disease Detected" if prediction == 1 else "No Heart Disease"
+        ),
+        "confidence": {
+            "no_disease": confidence[0],
+            "disease": confidence[1],
+        },
+        "risk_level": get_risk_level(probability),
+    }
+
+
+@serve_candidates("heart_disease")
+def score_records(records: List[Dict[str, Any]], store: Optional[ModelStore] = None) -> List[Dict[str, Any]]:
+    """Preprocess and score many records with one model call (on one model version throughout)"""
+    store = store or models.snapshot()
+    start = time.perf_counter_ns()
+    model_data = store.heart_disease_model
+    model = store.heart_disease_kernel or model_data["model"]
+    transformer = store.heart_disease_transformer
+
+    if transformer is not None:
+        processed_data = transformer.transform_batch(records)
+        if hasattr(model, "feature_names_in_"):
+            processed_data = pd.DataFrame(processed_data, columns=transformer.feature_names)
+    else:
+        processed_data = process_input_batch(
+            records,
+            model_data["imputer"],
+            model_data["scaler"],
+            model_data["encoder"],
+            model_data["numeric_cols"],
+            model_data["categorical_cols"],
+            model_data["encoded_cols"],
+        )
+
+    preprocessed = time.perf_counter_ns()
+
+    predictions = model.predict(processed_data)
+    probabilities = model.predict_proba(processed_data)
+    predicted = time.perf_counter_ns()
+
+    # Rounded in NumPy, then tolist() converts each whole array to Python numbers in one call
+    results = [
+        format_prediction(int(prediction), confidence, probability)
+        for prediction, confidence, probability in zip(
+            predictions.tolist(), np.round(probabilities, 4).tolist(), probabilities[:, 1].tolist()
+        )
+    ]
+    METRICS.observe_scoring(len(records), start, preprocessed, predicted, time.perf_counter_ns())
+    return results
 
 
 @router.post(
@@ -16,11 +145,7 @@ router = APIRouter()
 async def predict_heart_disease(request: Dict[str, Any]):
     """Predict heart disease risk (Flask-equivalent FastAPI version)"""
     try:
-        if models.heart_disease_model is None:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Model not loaded",
-            )
+        await require_model()
 
         if not request:
             raise HTTPException(
@@ -28,47 +153,23 @@ async def predict_heart_disease(request: Dict[str, Any]):
                 detail="No data provided",
             )
 
+        METRICS.serving()
+
         logger.info("Heart disease prediction request received")
 
-        # Extract model components
-        model_data = models.heart_disease_model
-        model = model_data["model"]
-        imputer = model_data["imputer"]
-        scaler = model_data["scaler"]
-        encoder = model_data["encoder"]
-        numeric_cols = model_data["numeric_cols"]
-        categorical_cols = model_data["categorical_cols"]
-        encoded_cols = model_data["encoded_cols"]
-
-        # Preprocess input (same as Flask)
-        processed_data = process_input_data(
-            request,
-            imputer,
-            scaler,
-            encoder,
-            numeric_cols,
-            categorical_cols,
-            encoded_cols,
-        )
+        start = time.perf_counter_ns()
+        try:
+            record = validate_record(request)
+        except RecordValidationError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        finally:
+            METRICS.observe("validation", start, time.perf_counter_ns())
 
-        # Prediction
-        prediction = int(model.predict(processed_data)[0])
-        probability = model.predict_proba(processed_data)[0]
+        result = await score_one("heart_disease", score_records, record)
 
-        logger.info(f"Heart disease prediction result: {prediction}")
+        logger.info(f"Heart disease prediction result: {result['prediction']}")
 
-        return {
-            "success": True,
-            "prediction": prediction,
-            "prediction_label": (
-                "Heart Disease Detected" if prediction == 1 else "No Heart Disease"
-            ),
-            "confidence": {
-                "no_disease": round(float(probability[0]), 4),
-                "disease": round(float(probability[1]), 4),
-            },
-            "risk_level": get_risk_level(probability[1]),
-        }
+        return json_response({"success": True, **result})
 
     except HTTPException:
         raise
@@ -83,6 +184,52 @@ async def predict_heart_disease(request: Dict[str, Any]):
         )
 
 
+@router.post(
+    "/predict/batch",
+    status_code=status.HTTP_200_OK,
+)
+async def predict_heart_disease_batch(request: BatchPredictionRequest):
+    """Predict heart disease risk for many records, returning per-record results in order"""
+    try:
+        await require_model()
+        METRICS.serving()
+
+        logger.info(
+            f"Heart disease batch prediction request received: {len(request.records)} records"
+        )
+
+        results = await run_inference(
+            score_batch, request.records, validate_record, score_records, METRICS
+        )
+
+        return json_response(batch_response(results))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Heart disease batch prediction error: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction error: {str(e)}",
+        )
+
+
+@router.post(
+    "/predict/stream",
+    status_code=status.HTTP_200_OK,
+)
+async def predict_heart_disease_stream(request: Request):
+    """Score a CSV or NDJSON upload, streaming NDJSON results back chunk by chunk"""
+    await require_model()
+
+    logger.info("Heart disease streaming prediction request received")
+
+    return await stream_predictions("Heart disease", request, validate_record, score_records)
+
+
 # =========================
 # Model Info Endpoint
 # =========================
@@ -90,13 +237,8 @@ async def predict_heart_disease(request: Dict[str, Any]):
 @router.get("/model-info")
 async def model_info():
     """Get heart disease model info (Flask-equivalent)"""
+    await require_model()
     try:
-        if models.heart_disease_model is None:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Model not loaded",
-            )
-
         model_data = models.heart_disease_model
 
         return {
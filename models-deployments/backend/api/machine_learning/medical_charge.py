@@ -1,14 +1,25 @@
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel, Field, validator
-from typing import Literal
+from fastapi import APIRouter, HTTPException, Request, status
+from pydantic import BaseModel, Field
+import time
+from typing import Any, Dict, List, Literal, Optional
 import numpy as np
 
-from utils.model_loader import models
-from utils.helpers import validate_age, validate_bmi, validate_children
+from utils.model_loader import ModelStore, ensure_models, models
+from utils.candidates import serve_candidates
+from utils.batch import BatchPredictionRequest, score_batch, batch_response
+from utils.metrics import ModelMetrics
+from utils.micro_batcher import score_one
+from utils.responses import json_response
+from utils.inference_executor import run_inference
+from utils.streaming import stream_predictions
 from config.logging_config import logger
 
 router = APIRouter()
 
+METRICS = ModelMetrics("medical_charge")
+
+REGIONS = ['northeast', 'northwest', 'southeast', 'southwest']
+
 class MedicalChargeRequest(BaseModel):
     age: int = Field(..., ge=18, le=100, description="Age between 18-100")
     bmi: float = Field(..., ge=10, le=50, description="BMI between 10-50")
@@ -16,24 +27,6 @@ class MedicalChargeRequest(BaseModel):
     smoker: Literal["yes", "no"] = Field(..., description="Smoking status")
     sex: Literal["male", "female"] = Field(..., description="Gender")
     region: Literal["northeast", "northwest", "southeast", "southwest"] = Field(..., description="Region")
-    
-    @validator('age')
-    def validate_age_range(cls, v):
-        if not validate_age(v):
-            raise ValueError('Age must be between 18 and 100')
-        return v
-    
-    @validator('bmi')
-    def validate_bmi_range(cls, v):
-        if not validate_bmi(v):
-            raise ValueError('BMI must be between 10 and 50')
-        return v
-    
-    @validator('children')
-    def validate_children_range(cls, v):
-        if not validate_children(v):
-            raise ValueError('Children must be between 0 and 10')
-        return v
 
     class Config:
         json_schema_extra = {
@@ -47,65 +40,150 @@ class MedicalChargeRequest(BaseModel):
             }
         }
 
+# Representative record for the background warmup inference
+WARMUP_RECORD = MedicalChargeRequest.model_config["json_schema_extra"]["example"]
+
 class MedicalChargeResponse(BaseModel):
     success: bool
     predicted_charge: float
     input_data: dict
 
+def build_features(requests: List[MedicalChargeRequest]) -> np.ndarray:
+    """Build the model feature matrix (age, bmi, children, sex, one-hot region)"""
+    features = np.zeros((len(requests), 4 + len(REGIONS)))
+    for row, request in enumerate(requests):
+        features[row, 0] = request.age
+        features[row, 1] = request.bmi
+        features[row, 2] = request.children
+        features[row, 3] = 1 if request.sex == 'male' else 0
+        features[row, 4 + REGIONS.index(request.region)] = 1
+    return features
+
+
+def predict_charges(
+    requests: List[MedicalChargeRequest], store: Optional[ModelStore] = None, features: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Predict charges for many requests with one model call per smoker group"""
+    store = store or models.snapshot()
+    if features is None:
+        features = build_features(requests)
+    smoker_mask = np.array([request.smoker == 'yes' for request in requests])
+    predictions = np.empty(len(requests))
+    
+    # Prefer the native kernels; they fall back to None if they failed the parity check
+    smoker_model = store.smoker_kernel or store.smoker_model
+    non_smoker_model = store.non_smoker_kernel or store.non_smoker_model
+    
+    if smoker_mask.any():
+        predictions[smoker_mask] = smoker_model.predict(features[smoker_mask])
+    if (~smoker_mask).any():
+        predictions[~smoker_mask] = non_smoker_model.predict(features[~smoker_mask])
+    
+    return predictions
+
+
+async def require_models():
+    """Raise if the medical charge models are not loaded"""
+    await ensure_models("medical_charge")
+    if not models.smoker_model or not models.non_smoker_model:
+        logger.error("Models not loaded")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Models not loaded. Please contact administrator."
+        )
+
+
+def validate_record(record: Any) -> MedicalChargeRequest:
+    """Validate one raw batch record"""
+    return MedicalChargeRequest.model_validate(record)
+
+
+@serve_candidates("medical_charge")
+def score_records(requests: List[MedicalChargeRequest], store: Optional[ModelStore] = None) -> List[Dict[str, Any]]:
+    """Score validated requests in one vectorized pass"""
+    start = time.perf_counter_ns()
+    features = build_features(requests)
+    preprocessed = time.perf_counter_ns()
+    predictions = predict_charges(requests, store, features)
+    predicted = time.perf_counter_ns()
+
+    # Rounded in NumPy, then tolist() converts the whole array to Python floats in one call
+    results = [
+        {"predicted_charge": prediction}
+        for prediction in np.round(predictions, 2).tolist()
+    ]
+    METRICS.observe_scoring(len(requests), start, preprocessed, predicted, time.perf_counter_ns())
+    return results
+
+
 @router.post("/predict", response_model=MedicalChargeResponse, status_code=status.HTTP_200_OK)
 async def predict_medical_charge(request: MedicalChargeRequest):
     """Predict medical charges based on input data"""
     try:
         # Check if models are loaded
-        if not models.smoker_model or not models.non_smoker_model:
-            logger.error("Models not loaded")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Models not loaded. Please contact administrator."
-            )
+        await require_models()
+        METRICS.serving()
         
         logger.info(f"Prediction request: age={request.age}, smoker={request.smoker}")
         
-        # Convert categorical inputs
-        sex_bin = 1 if request.sex == 'male' else 0
-        
-        # Encode region
-        regions = ['northeast', 'northwest', 'southeast', 'southwest']
-        region_encoded = [1 if r == request.region else 0 for r in regions]
+        # Make prediction
+        result = await score_one("medical_charge", score_records, request)
         
-        # Prepare input features
-        input_features = [
-            request.age,
-            request.bmi,
-            request.children,
-            sex_bin
-        ] + region_encoded
+        logger.info(f"Prediction successful: {result['predicted_charge']:.2f}")
         
-        input_array = np.array([input_features])
+        return json_response(
+            {
+                "success": True,
+                "predicted_charge": result["predicted_charge"],
+                "input_data": request.model_dump(),
+            },
+            MedicalChargeResponse,
+        )
         
-        # Make prediction
-        if request.smoker == 'yes':
-            prediction = models.smoker_model.predict(input_array)[0]
-        else:
-            prediction = models.non_smoker_model.predict(input_array)[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Prediction error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Prediction error: {str(e)}"
+        )
+
+@router.post("/predict/batch", status_code=status.HTTP_200_OK)
+async def predict_medical_charge_batch(request: BatchPredictionRequest):
+    """Predict medical charges for many records, returning per-record results in order"""
+    try:
+        await require_models()
+        METRICS.serving()
         
-        logger.info(f"Prediction successful: {prediction:.2f}")
+        logger.info(f"Batch prediction request: {len(request.records)} records")
         
-        return MedicalChargeResponse(
-            success=True,
-            predicted_charge=round(float(prediction), 2),
-            input_data=request.dict()
+        results = await run_inference(
+            score_batch, request.records, validate_record, score_records, METRICS
         )
         
+        logger.info("Batch prediction successful")
+        
+        return json_response(batch_response(results))
+        
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Prediction error: {str(e)}", exc_info=True)
+        logger.error(f"Batch prediction error: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Prediction error: {str(e)}"
         )
 
+@router.post("/predict/stream", status_code=status.HTTP_200_OK)
+async def predict_medical_charge_stream(request: Request):
+    """Score a CSV or NDJSON upload, streaming NDJSON results back chunk by chunk"""
+    await require_models()
+    
+    logger.info("Streaming prediction request received")
+    
+    return await stream_predictions("Medical charge", request, validate_record, score_records)
+
 @router.get("/predict-info")
 async def predict_info():
     """Get information about prediction endpoint"""
@@ -0,0 +1,22 @@
+from api.machine_learning import customer_churn, customer_uplift, heart_disease, medical_charge
+from utils.warmup import ModelWarmup
+
+# Synthetic inference per route for the background warmup, keyed by MODEL_WARMUP_PRIORITY names
+MODEL_WARMUPS = {
+    "medical_charge": ModelWarmup(
+        ("medical_charge",),
+        medical_charge.validate_record, medical_charge.score_records, medical_charge.WARMUP_RECORD
+    ),
+    "heart_disease": ModelWarmup(
+        ("heart_disease",),
+        heart_disease.validate_record, heart_disease.score_records, heart_disease.WARMUP_RECORD
+    ),
+    "customer_churn": ModelWarmup(
+        ("customer_churn",),
+        customer_churn.validate_record, customer_churn.score_records, customer_churn.WARMUP_RECORD
+    ),
+    "customer_uplift": ModelWarmup(
+        ("uplift_treated", "uplift_control"),
+        customer_uplift.validate_record, customer_uplift.score_records, customer_uplift.WARMUP_RECORD
+    ),
+}
@@ -1,17 +1,27 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import asyncio
 import time
-import uuid
 from datetime import datetime
 import uvicorn
 
 from config.logging_config import setup_logging, logger
 from config.settings import settings
-from utils.model_loader import load_all_models
+from utils.model_loader import FAILED, LOADING, load_all_models, load_states, start_model_loading
+from utils.micro_batcher import batcher_stats
+from utils.prediction_cache import cache_stats
+from utils.candidates import candidate_stats, shutdown_shadow_pool
+from utils.metrics import CONTENT_TYPE, render_metrics
+from utils.inference_executor import executor_stats, process_pool_enabled, shutdown_executor
+from utils.model_watcher import start_model_watcher
+from utils.request_middleware import RequestLoggingMiddleware
+from utils.responses import FastJSONResponse
+from utils.warmup import warmup_models
 from api.machine_learning import medical_charge, heart_disease, customer_churn,customer_uplift
-
+from api import admin, jobs
+from api.warmups import MODEL_WARMUPS
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -21,14 +31,44 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"Debug Mode: {settings.DEBUG}")
     
-    # Load all models
-    load_all_models()
+    # Load all models (degraded mode serves each route as soon as its model is ready,
+    # lazy mode loads each model on its first request)
+    if settings.MODEL_LAZY_LOADING:
+        logger.info("Lazy model loading enabled")
+    elif settings.MODEL_STARTUP_DEGRADED:
+        start_model_loading()
+    else:
+        load_all_models()
+    
+    # Preload and warm up models in the background
+    warmup_task = None
+    if settings.MODEL_WARMUP_ENABLED:
+        warmup_task = asyncio.create_task(
+            warmup_models(MODEL_WARMUPS, settings.MODEL_WARMUP_PRIORITY)
+        )
+    
+    # Hot-reload models whose files change in MODELS_DIR
+    watcher_task = None
+    if settings.MODEL_WATCH_ENABLED and process_pool_enabled():
+        logger.warning("Model watcher disabled: inference pool processes cannot swap models")
+    elif settings.MODEL_WATCH_ENABLED:
+        watcher_task = start_model_watcher(admin.validate_version)
+    
+    # Resume unfinished batch jobs
+    await jobs.job_manager.start()
     
     logger.info("Server ready!")
     yield
     
     # Shutdown
     logger.info("Shutting down FastAPI ML Server...")
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if watcher_task is not None:
+        watcher_task.cancel()
+    await jobs.job_manager.stop()
+    shutdown_executor()
+    shutdown_shadow_pool()
     
 
 app = FastAPI(
@@ -36,6 +76,7 @@ app = FastAPI(
     description="Production-ready ML model serving API",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None,
 )
@@ -50,62 +91,8 @@ app.add_middleware(
 )
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    """Log all incoming requests with timing"""
-    request_id = str(uuid.uuid4())
-    start_time = time.time()
-    
-    # Add request_id to request state
-    request.state.request_id = request_id
-    
-    # Log incoming request
-    logger.info(
-        f"Request started",
-        extra={
-            "request_id": request_id,
-            "method": request.method,
-            "path": request.url.path,
-            "client_ip": request.client.host if request.client else "unknown",
-        }
-    )
-    
-    try:
-        response = await call_next(request)
-        duration_ms = (time.time() - start_time) * 1000
-        
-        # Log response
-        logger.info(
-            f"Request completed",
-            extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "duration_ms": round(duration_ms, 2),
-            }
-        )
-        
-        # Add custom headers
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Process-Time"] = str(round(duration_ms, 2))
-        
-        return response
-        
-    except Exception as e:
-        duration_ms = (time.time() - start_time) * 1000
-        logger.error(
-            f"Request failed: {str(e)}",
-            extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "duration_ms": round(duration_ms, 2),
-            },
-            exc_info=True
-        )
-        raise
-
+# Outermost, so the timing covers CORS handling too
+app.add_middleware(RequestLoggingMiddleware)
 
 
 @app.exception_handler(Exception)
@@ -154,6 +141,18 @@ app.include_router(
     tags=["uplift Prediction"]
 )
 
+app.include_router(
+    jobs.router,
+    prefix="/jobs",
+    tags=["Batch Jobs"]
+)
+
+app.include_router(
+    admin.router,
+    prefix="/admin/models",
+    tags=["Model Administration"]
+)
+
 
 @app.get("/")
 async def root():
@@ -168,11 +167,49 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    model_states = load_states()
+    degraded = any(model["state"] in (LOADING, FAILED) for model in model_states.values())
     return {
-        "status": "ok",
+        "status": "degraded" if degraded else "ok",
         "uptime": time.time(),
         "timestamp": int(time.time() * 1000),
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "models": model_states
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Request, stage, cache and queue metrics in the Prometheus text format"""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/batching/stats")
+async def batching_stats():
+    """Micro-batching statistics per model"""
+    return {
+        "enabled": settings.MICRO_BATCHING_ENABLED,
+        "models": batcher_stats()
+    }
+
+@app.get("/executor/stats")
+async def inference_executor_stats():
+    """Inference executor sizing and queue occupancy"""
+    return executor_stats()
+
+@app.get("/candidates/stats")
+async def shadow_canary_stats():
+    """Agreement, traffic and latency of the shadow and canary model versions"""
+    return {
+        "models": candidate_stats()
+    }
+
+@app.get("/cache/stats")
+async def prediction_cache_stats():
+    """Prediction cache hit/miss counters per model"""
+    return {
+        "enabled": settings.PREDICTION_CACHE_ENABLED,
+        "models": cache_stats()
     }
 
 
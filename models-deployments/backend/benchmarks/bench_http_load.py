@@ -0,0 +1,538 @@
+"""
+HTTP load test of every prediction route: throughput, tail latency, errors, server CPU and RSS
+
+Run from the backend directory with the model artifacts in MODELS_DIR:
+
+    python -m benchmarks.bench_http_load [--workers 1] [--executor thread] [--concurrency 1 8 32]
+        [--duration 10] [--routes medical_charge/single ...] [--env KEY=VALUE ...] [--output load.json]
+    python -m benchmarks.bench_http_load --compare before.json after.json
+
+Starts the app under gunicorn (gunicorn.conf.py, as deployed) on a local port
+with the given worker count, inference executor and any other setting
+overrides, waits for every model to load, then drives each route at each
+concurrency level for --duration seconds after a --warmup period. Each
+concurrent client is one keep-alive connection sending requests back to back
+(closed loop), so the offered load rises with the concurrency.
+
+Payloads are generated from the bundled models before the server starts:
+heart disease and churn records draw numeric values within the scaler's
+training range and categories from the encoder; medical charge and uplift
+records draw from the request models' bounds. Batch and stream routes send
+--batch-size records per request. The prediction cache is off unless turned
+on with --env, so repeated payloads are scored every time.
+
+Reports requests and records per second, p50/p95/p99 latency, the error rate
+(non-2xx responses and connection failures), the CPU and peak RSS of the
+gunicorn master, its workers and any inference processes (from /proc, so
+Linux only), and the load generator's own CPU: a client near 100% of a core
+means the numbers measure the client, not the server. The full results go
+to a JSON file; --compare prints the change between two of them.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.measure_worker_memory import BACKEND_DIR, child_pids, wait_until_ready
+
+# route name -> (path, kind, model); kind is "single", "batch" (JSON records) or "stream" (NDJSON upload)
+ROUTES = {
+    "medical_charge/single": ("/medical-charge/predict", "single", "medical_charge"),
+    "medical_charge/batch": ("/medical-charge/predict/batch", "batch", "medical_charge"),
+    "medical_charge/stream": ("/medical-charge/predict/stream", "stream", "medical_charge"),
+    "heart_disease/single": ("/heart-disease/predict", "single", "heart_disease"),
+    "heart_disease/batch": ("/heart-disease/predict/batch", "batch", "heart_disease"),
+    "heart_disease/stream": ("/heart-disease/predict/stream", "stream", "heart_disease"),
+    "customer_churn/single": ("/customer-churn/prediction", "single", "customer_churn"),
+    "customer_churn/batch": ("/customer-churn/predict/batch", "batch", "customer_churn"),
+    "customer_churn/stream": ("/customer-churn/predict/stream", "stream", "customer_churn"),
+    "customer_uplift/single": ("/predict_uplift/predict", "single", "customer_uplift"),
+    "customer_uplift/batch": ("/predict_uplift/predict/batch", "batch", "customer_uplift"),
+    "customer_uplift/stream": ("/predict_uplift/predict/stream", "stream", "customer_uplift"),
+}
+
+# Settings the load test changes unless --env overrides them
+DEFAULT_ENV = {
+    "DEBUG": "false",
+    "PREDICTION_CACHE_ENABLED": "false",
+}
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+Record = Dict[str, object]
+
+
+# Payloads
+
+
+def bundle_record_generator(schema_model: str, rng: random.Random) -> Callable[[], Record]:
+    """Records drawn from a loaded bundle: numeric values within the training range, known categories"""
+    from api.warmups import MODEL_WARMUPS
+    from utils import model_loader
+    from utils.record_schema import training_ranges
+
+    if schema_model == "heart_disease":
+        if model_loader.models.heart_disease_model is None:
+            model_loader.load_heart_disease_model()
+        bundle, numeric_key = model_loader.models.heart_disease_model, "numeric_cols"
+    else:
+        if model_loader.models.customer_churn_model is None:
+            model_loader.load_customer_churn_model()
+        bundle, numeric_key = model_loader.models.customer_churn_model, "numerical_cols"
+
+    example = MODEL_WARMUPS[schema_model].record
+    numeric_cols = list(bundle[numeric_key])
+    ranges = training_ranges(bundle["scaler"], numeric_cols, 0.0)
+    categories = {
+        col: sorted(category for category in values if isinstance(category, str))
+        for col, values in zip(bundle["categorical_cols"], bundle["encoder"].categories_)
+    }
+
+    def draw_number(col: str):
+        low, high = ranges[col]
+        if high - low > 1e12:
+            # No training range for this scaler: stay near the example value
+            low, high = sorted((example[col] * 0.5, example[col] * 1.5))
+        if isinstance(example.get(col), int) and float(low).is_integer() and float(high).is_integer():
+            return rng.randint(int(low), int(high))
+        return round(rng.uniform(low, high), 2)
+
+    def generate() -> Record:
+        record = {col: draw_number(col) for col in numeric_cols}
+        record.update({col: rng.choice(values) for col, values in categories.items()})
+        return record
+
+    return generate
+
+
+def medical_charge_generator(rng: random.Random) -> Callable[[], Record]:
+    from api.machine_learning.medical_charge import REGIONS
+
+    def generate() -> Record:
+        return {
+            "age": rng.randint(18, 64),
+            "bmi": round(min(max(rng.gauss(30.6, 6.1), 16.0), 50.0), 2),
+            "children": min(int(rng.expovariate(0.9)), 5),
+            "smoker": "yes" if rng.random() < 0.2 else "no",
+            "sex": rng.choice(["male", "female"]),
+            "region": rng.choice(REGIONS),
+        }
+
+    return generate
+
+
+def customer_uplift_generator(rng: random.Random) -> Callable[[], Record]:
+    def generate() -> Record:
+        return {
+            "age": rng.randint(18, 75),
+            "monthlyIncome": round(rng.lognormvariate(10.5, 0.6), 2),
+            "tenure": rng.randint(0, 72),
+            "engagementScore": round(rng.random(), 3),
+            "sessionTime": round(rng.uniform(1, 60), 1),
+            "activityChange": round(rng.uniform(-1, 1), 3),
+            "churnRisk": round(rng.random(), 3),
+            "appVisitsPerWeek": rng.randint(0, 20),
+            "regionCode": rng.randint(0, 4),
+            "totalClicks": rng.randint(0, 200),
+            "customerRating": round(rng.uniform(1, 5), 1),
+            "satisfactionTrend": round(rng.uniform(-1, 1), 3),
+        }
+
+    return generate
+
+
+def record_generators(models: List[str], seed: int) -> Dict[str, Callable[[], Record]]:
+    sys.path.insert(0, str(BACKEND_DIR))
+    rng = random.Random(seed)
+    generators = {}
+    for model in models:
+        if model in ("heart_disease", "customer_churn"):
+            generators[model] = bundle_record_generator(model, rng)
+        elif model == "medical_charge":
+            generators[model] = medical_charge_generator(rng)
+        else:
+            generators[model] = customer_uplift_generator(rng)
+    return generators
+
+
+def http_request(path: str, body: bytes, content_type: str) -> bytes:
+    head = (
+        f"POST {path} HTTP/1.1\r\n"
+        f"Host: loadtest\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"\r\n"
+    )
+    return head.encode() + body
+
+
+def build_requests(route: str, generate: Callable[[], Record], count: int, batch_size: int) -> Tuple[List[bytes], int]:
+    """Distinct ready-to-send HTTP requests for a route, and the records in each"""
+    path, kind, _ = ROUTES[route]
+    if kind == "single":
+        return [http_request(path, json.dumps(generate()).encode(), "application/json") for _ in range(count)], 1
+
+    # Big bodies: fewer distinct ones, so the pool stays small
+    count = max(1, min(count, 50_000 // batch_size))
+    requests = []
+    for _ in range(count):
+        records = [generate() for _ in range(batch_size)]
+        if kind == "batch":
+            body, content_type = json.dumps({"records": records}).encode(), "application/json"
+        else:
+            body, content_type = "".join(json.dumps(record) + "\n" for record in records).encode(), "application/x-ndjson"
+        requests.append(http_request(path, body, content_type))
+    return requests, batch_size
+
+
+# Server
+
+
+def process_tree(pid: int) -> List[int]:
+    """A process and all its descendants (gunicorn workers and inference processes)"""
+    pids = [pid]
+    for child in child_pids(pid):
+        pids.extend(process_tree(child))
+    return pids
+
+
+def cpu_seconds_and_rss(pids: List[int]) -> Tuple[float, int]:
+    """Total user+system CPU seconds and total RSS bytes of the live processes"""
+    cpu, rss = 0.0, 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{pid}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat (12 and 13 after the command name)
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        rss += resident_pages * PAGE_SIZE
+    return cpu, rss
+
+
+def start_server(args, env_overrides: Dict[str, str]) -> subprocess.Popen:
+    env = dict(os.environ, **env_overrides)
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "app:app",
+            "-c", "gunicorn.conf.py",
+            "--workers", str(args.workers),
+            "--bind", f"127.0.0.1:{args.port}",
+            "--timeout", "300",
+        ],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL if not args.server_output else None,
+    )
+
+
+def stop_server(server: subprocess.Popen):
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+# Client
+
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, bool]:
+    """Read one response, returning its status and whether the server closes the connection"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    status = int(lines[0].split(None, 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if b"content-length" in headers:
+        await reader.readexactly(int(headers[b"content-length"]))
+    elif headers.get(b"transfer-encoding") == b"chunked":
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            # The chunk and its CRLF; the last chunk is empty (no trailers are sent)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get(b"connection") == b"close"
+
+
+async def client(
+    port: int,
+    requests: List[bytes],
+    offset: int,
+    measure_from: float,
+    until: float,
+    timeout: float,
+    samples: List[Tuple[float, int]],
+):
+    """One keep-alive connection sending requests back to back; records (latency, status) after measure_from"""
+    connection = None
+    i = offset
+    while time.perf_counter() < until:
+        request = requests[i % len(requests)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), timeout)
+            reader, writer = connection
+            writer.write(request)
+            status, close = await asyncio.wait_for(read_response(reader), timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError):
+            # Status 0: the request failed without a response
+            status, close = 0, True
+        if start >= measure_from:
+            samples.append((time.perf_counter() - start, status))
+        if close and connection is not None:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    position = (len(sorted_values) - 1) * p / 100
+    low = int(position)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+async def sample_resources(pid: int, stop: asyncio.Event, peak: Dict[str, int], interval: float = 0.25):
+    """Track the server's peak RSS while the run is measured"""
+    while not stop.is_set():
+        _, rss = cpu_seconds_and_rss(process_tree(pid))
+        peak["rss"] = max(peak["rss"], rss)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(server_pid: int, route: str, requests: List[bytes], records_per_request: int, concurrency: int, args) -> Dict:
+    samples: List[Tuple[float, int]] = []
+    now = time.perf_counter()
+    measure_from = now + args.warmup
+    until = measure_from + args.duration
+    clients = [
+        asyncio.create_task(client(args.port, requests, i * 7919, measure_from, until, args.request_timeout, samples))
+        for i in range(concurrency)
+    ]
+
+    # Server CPU and client CPU over the measured window only
+    await asyncio.sleep(max(0.0, measure_from - time.perf_counter()))
+    server_cpu_start, _ = cpu_seconds_and_rss(process_tree(server_pid))
+    client_cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    stop, peak = asyncio.Event(), {"rss": 0}
+    sampler = asyncio.create_task(sample_resources(server_pid, stop, peak))
+
+    await asyncio.gather(*clients)
+    # Requests still in flight at the deadline finish first; count the window up to the last one
+    wall = time.perf_counter() - wall_start
+    stop.set()
+    await sampler
+    server_cpu_end, rss_end = cpu_seconds_and_rss(process_tree(server_pid))
+    client_cpu = time.process_time() - client_cpu_start
+
+    latencies = sorted(latency for latency, _ in samples)
+    statuses = Counter(status for _, status in samples)
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+    completed = len(samples)
+    return {
+        "route": route,
+        "path": ROUTES[route][0],
+        "concurrency": concurrency,
+        "records_per_request": records_per_request,
+        "requests": completed,
+        "duration_s": round(wall, 3),
+        "rps": round(completed / wall, 2) if wall else 0.0,
+        "records_per_s": round(completed * records_per_request / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+            "p50": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+            "p95": round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+            "p99": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+            "max": round(latencies[-1] * 1000, 3) if latencies else None,
+        },
+        "error_rate": round(errors / completed, 6) if completed else 1.0,
+        "status_counts": {str(status): count for status, count in sorted(statuses.items())},
+        "server": {
+            "cpu_percent": round((server_cpu_end - server_cpu_start) / wall * 100, 1) if wall else 0.0,
+            "rss_mb_peak": round(max(peak["rss"], rss_end) / 2**20, 1),
+        },
+        "client_cpu_percent": round(client_cpu / wall * 100, 1) if wall else 0.0,
+    }
+
+
+# Reporting
+
+
+def print_header():
+    print(
+        f"{'route':<24} {'conc':>5} {'req/s':>9} {'rec/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'errors':>8} {'srv CPU':>8} {'RSS MB':>8} {'cli CPU':>8}"
+    )
+
+
+def print_result(result: Dict):
+    latency = result["latency_ms"]
+
+    def ms(value: Optional[float]) -> str:
+        return f"{value:9.2f}" if value is not None else f"{'-':>9}"
+
+    print(
+        f"{result['route']:<24} {result['concurrency']:>5} {result['rps']:>9.1f} {result['records_per_s']:>10.1f} "
+        f"{ms(latency['p50'])} {ms(latency['p95'])} {ms(latency['p99'])} "
+        f"{result['error_rate']:>7.2%} {result['server']['cpu_percent']:>7.0f}% "
+        f"{result['server']['rss_mb_peak']:>8.1f} {result['client_cpu_percent']:>7.0f}%"
+    )
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    baseline = {(run["route"], run["concurrency"]): run for run in before["runs"]}
+
+    print(f"{'route':<24} {'conc':>5} {'req/s':>24} {'p99 ms':>24} {'errors':>18}")
+    for run in after["runs"]:
+        old = baseline.get((run["route"], run["concurrency"]))
+        if old is None:
+            continue
+        rps_change = (run["rps"] / old["rps"] - 1) if old["rps"] else float("nan")
+        old_p99, new_p99 = old["latency_ms"]["p99"], run["latency_ms"]["p99"]
+        p99 = f"{old_p99:.2f} -> {new_p99:.2f}" if old_p99 is not None and new_p99 is not None else "-"
+        print(
+            f"{run['route']:<24} {run['concurrency']:>5} "
+            f"{old['rps']:>9.1f} -> {run['rps']:<9.1f}{rps_change:+6.0%} {p99:>24} "
+            f"{old['error_rate']:>7.2%} -> {run['error_rate']:<7.2%}"
+        )
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_env(values: List[str]) -> Dict[str, str]:
+    env = {}
+    for value in values:
+        key, sep, setting = value.partition("=")
+        if not sep or not key:
+            raise SystemExit(f"--env expects KEY=VALUE, got {value!r}")
+        env[key] = setting
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn worker processes")
+    parser.add_argument("--executor", choices=["thread", "process"], default=None, help="INFERENCE_EXECUTOR")
+    parser.add_argument("--inference-workers", type=int, default=None, help="INFERENCE_WORKERS")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="any other setting override")
+    parser.add_argument("--routes", nargs="+", choices=sorted(ROUTES), default=list(ROUTES))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per route and concurrency")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each run")
+    parser.add_argument("--batch-size", type=int, default=100, help="records per batch or stream request")
+    parser.add_argument("--payloads", type=int, default=1000, help="distinct single-record payloads per route")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8020)
+    parser.add_argument("--startup-timeout", type=float, default=300.0, help="seconds to wait for model loading")
+    parser.add_argument("--server-output", action="store_true", help="show the server's stderr")
+    parser.add_argument("--output", default=f"load-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    env_overrides = dict(DEFAULT_ENV)
+    if args.executor:
+        env_overrides["INFERENCE_EXECUTOR"] = args.executor
+    if args.inference_workers is not None:
+        env_overrides["INFERENCE_WORKERS"] = str(args.inference_workers)
+    env_overrides.update(parse_env(args.env))
+
+    print("Generating payloads...")
+    generators = record_generators(sorted({ROUTES[route][2] for route in args.routes}), args.seed)
+    payloads = {
+        route: build_requests(route, generators[ROUTES[route][2]], args.payloads, args.batch_size)
+        for route in args.routes
+    }
+
+    print(f"Starting gunicorn with {args.workers} worker(s), overrides {env_overrides}...")
+    server = start_server(args, env_overrides)
+    results = []
+    try:
+        wait_until_ready(f"http://127.0.0.1:{args.port}", args.startup_timeout)
+        _, idle_rss = cpu_seconds_and_rss(process_tree(server.pid))
+        print(f"Server ready: {len(process_tree(server.pid))} processes, {idle_rss / 2**20:.1f} MB RSS\n")
+
+        print_header()
+        for route in args.routes:
+            requests, records_per_request = payloads[route]
+            for concurrency in args.concurrency:
+                result = asyncio.run(run_load(server.pid, route, requests, records_per_request, concurrency, args))
+                print_result(result)
+                results.append(result)
+    finally:
+        stop_server(server)
+
+    report = {
+        "config": {
+            "workers": args.workers,
+            "settings": env_overrides,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "batch_size": args.batch_size,
+            "payloads": args.payloads,
+            "seed": args.seed,
+        },
+        "environment": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "models_dir": os.environ.get("MODELS_DIR"),
+        },
+        "server_idle_rss_mb": round(idle_rss / 2**20, 1),
+        "runs": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
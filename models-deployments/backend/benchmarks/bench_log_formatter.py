@@ -0,0 +1,78 @@
+"""
+Cost of formatting one log record with each JSON formatter
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_log_formatter [--records 100000]
+
+Formats the records the request middleware writes ("Request started" and
+"Request completed" with their extra fields) plus a plain router message,
+checks that the fast formatter produces the same bytes as JSONFormatter
+and prints the time per record of each.
+"""
+import argparse
+import logging
+import time
+
+from config.logging_config import FastJSONFormatter, JSONFormatter, orjson
+
+
+def make_records():
+    def record(msg, **extra):
+        log_record = logging.LogRecord("root", logging.INFO, "/app/app.py", 101, msg, None, None, "log_requests")
+        log_record.__dict__.update(extra)
+        return log_record
+
+    return [
+        record(
+            "Request started",
+            request_id="0f8fad5b-d9cb-469f-a165-70867728950e",
+            method="POST",
+            path="/customer-churn/prediction",
+            client_ip="10.0.0.12",
+        ),
+        record(
+            "Request completed",
+            request_id="0f8fad5b-d9cb-469f-a165-70867728950e",
+            method="POST",
+            path="/customer-churn/prediction",
+            status_code=200,
+            duration_ms=3.41,
+        ),
+        record("Prediction successful: 4213.57"),
+    ]
+
+
+def per_record_us(formatter: logging.Formatter, records, count: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for i in range(count):
+            formatter.format(records[i % len(records)])
+        best = min(best, time.perf_counter() - start)
+    return best / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    records = make_records()
+    formatters = {"stdlib": JSONFormatter(), "fast": FastJSONFormatter()}
+    if orjson is not None:
+        formatters["orjson"] = FastJSONFormatter("orjson")
+
+    for record in records:
+        if formatters["fast"].format(record) != formatters["stdlib"].format(record):
+            raise SystemExit(f"fast formatter output differs for {record.getMessage()!r}")
+
+    baseline = None
+    for name, formatter in formatters.items():
+        us = per_record_us(formatter, records, args.records)
+        baseline = baseline or us
+        print(f"{name:>7}: {us:6.2f} µs per record ({baseline / us:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Per-request cost of the metrics instrumentation
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_metrics [--requests 200000]
+
+Replays exactly what one single-record prediction records: the request
+counter and duration histogram from the middleware, the serving model,
+validation, the preprocess/predict/format stages and batch size from
+score_records, and the serialize stage from the JSON response. No model
+is loaded; only the instrumentation itself is timed.
+"""
+import argparse
+import time
+
+from utils.metrics import ModelMetrics, current_model, observe_request
+
+
+def instrumented_request(model: ModelMetrics):
+    model.serving()
+
+    validation = time.perf_counter_ns()
+    model.observe("validation", validation, time.perf_counter_ns())
+
+    scoring = time.perf_counter_ns()
+    preprocessed = time.perf_counter_ns()
+    predicted = time.perf_counter_ns()
+    model.observe_scoring(1, scoring, preprocessed, predicted, time.perf_counter_ns())
+
+    serializing = time.perf_counter_ns()
+    current_model.get().observe("serialize", serializing, time.perf_counter_ns())
+
+    # The middleware reuses the duration it already computes for its log line and header
+    observe_request("/customer-churn/prediction", "POST", 200, 0.00123)
+
+
+def empty_request(model: ModelMetrics):
+    """The same call structure without any metrics calls, to subtract the loop overhead"""
+    return model
+
+
+def per_call_us(fn, model: ModelMetrics, requests: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(requests):
+            fn(model)
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    model = ModelMetrics("customer_churn")
+    instrumented = per_call_us(instrumented_request, model, args.requests)
+    baseline = per_call_us(empty_request, model, args.requests)
+    print(f"instrumentation per request: {instrumented - baseline:.2f} µs (best of 5 x {args.requests} requests)")
+
+
+if __name__ == "__main__":
+    main()
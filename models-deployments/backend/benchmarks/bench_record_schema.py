@@ -0,0 +1,132 @@
+"""
+Compiled record schemas against Pydantic and the routes' previous validation
+
+Run from the backend directory with the model artifacts in MODELS_DIR:
+
+    python -m benchmarks.bench_record_schema [--records 10000]
+
+For the heart disease and churn models, validates the same records with:
+the routes' previous checks (what runs with SCHEMA_VALIDATION_ENABLED off),
+a Pydantic model generated from the same compiled rules (one model_validate
+per record, and one TypeAdapter call for the whole list), and the compiled
+RecordSchema. The medical charge request model is timed with and without the
+@validator methods that duplicated its Field bounds. Prints µs per record.
+"""
+import argparse
+import time
+from typing import Dict, List, Literal, Optional
+
+from pydantic import ConfigDict, Field, TypeAdapter, create_model, field_validator
+
+from api.machine_learning import customer_churn, heart_disease
+from api.machine_learning.medical_charge import MedicalChargeRequest
+from api.warmups import MODEL_WARMUPS
+from utils.helpers import validate_age, validate_bmi, validate_children
+from utils.model_loader import load_customer_churn_model, load_heart_disease_model, models
+from utils.record_schema import RecordSchema
+
+
+class LegacyMedicalChargeRequest(MedicalChargeRequest):
+    """MedicalChargeRequest with the validators it used to run after its Field bounds"""
+
+    @field_validator("age")
+    @classmethod
+    def validate_age_range(cls, v):
+        if not validate_age(v):
+            raise ValueError("Age must be between 18 and 100")
+        return v
+
+    @field_validator("bmi")
+    @classmethod
+    def validate_bmi_range(cls, v):
+        if not validate_bmi(v):
+            raise ValueError("BMI must be between 10 and 50")
+        return v
+
+    @field_validator("children")
+    @classmethod
+    def validate_children_range(cls, v):
+        if not validate_children(v):
+            raise ValueError("Children must be between 0 and 10")
+        return v
+
+
+def pydantic_model(name: str, schema: RecordSchema) -> type:
+    """A strict Pydantic model enforcing the same rules as the compiled schema"""
+    fields = {}
+    for col, low, high, nullable in schema.numeric:
+        annotation = Optional[float] if nullable else float
+        fields[col] = (annotation, Field(... if schema.require_all_keys or not nullable else None, ge=low, le=high))
+    for col, categories, nullable in schema.categorical:
+        annotation = Literal[tuple(sorted(categories))]
+        if nullable:
+            annotation = Optional[annotation]
+        fields[col] = (annotation, Field(... if schema.require_all_keys or not nullable else None))
+    return create_model(
+        f"{name}Record", __config__=ConfigDict(strict=True, extra="ignore", populate_by_name=True), **fields
+    )
+
+
+def vary(record: Dict, i: int) -> Dict:
+    """The warmup record with its float fields scaled by up to 10%"""
+    return {
+        key: value * (1 + (i % 11) / 100) if isinstance(value, float) else value
+        for key, value in record.items()
+    }
+
+
+def per_record_us(fn, records: List, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(records)
+        best = min(best, time.perf_counter() - start)
+    return best / len(records) * 1e6
+
+
+def each(validate):
+    def run(records):
+        for record in records:
+            validate(record)
+    return run
+
+
+def compare(name: str, router, schema_attr: str, count: int):
+    schema = getattr(models, schema_attr)
+    records = [vary(MODEL_WARMUPS[name].record, i) for i in range(count)]
+    model = pydantic_model(name, schema)
+    adapter = TypeAdapter(List[model])
+
+    # The router falls back to its previous checks when the model has no schema
+    setattr(models, schema_attr, None)
+    previous = per_record_us(each(router.validate_record), records)
+    setattr(models, schema_attr, schema)
+
+    print(f"\n{name} ({len(schema.numeric)} numeric, {len(schema.categorical)} categorical columns)")
+    print(f"  {'previous route checks':<28} {previous:7.2f} µs per record")
+    print(f"  {'pydantic, per record':<28} {per_record_us(each(model.model_validate), records):7.2f} µs per record")
+    print(f"  {'pydantic, whole list':<28} {per_record_us(adapter.validate_python, records):7.2f} µs per record")
+    print(f"  {'compiled schema':<28} {per_record_us(each(schema.validate), records):7.2f} µs per record")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=10000)
+    args = parser.parse_args()
+
+    load_heart_disease_model()
+    load_customer_churn_model()
+    if models.heart_disease_schema is None or models.customer_churn_schema is None:
+        raise SystemExit("Record schemas did not compile; check SCHEMA_VALIDATION_ENABLED and the logs")
+
+    compare("heart_disease", heart_disease, "heart_disease_schema", args.records)
+    compare("customer_churn", customer_churn, "customer_churn_schema", args.records)
+
+    records = [vary(MODEL_WARMUPS["medical_charge"].record, i) for i in range(args.records)]
+    print("\nmedical_charge (Pydantic request model)")
+    print(f"  {'with duplicate validators':<28} {per_record_us(each(LegacyMedicalChargeRequest.model_validate), records):7.2f} µs per record")
+    print(f"  {'Field bounds only':<28} {per_record_us(each(MedicalChargeRequest.model_validate), records):7.2f} µs per record")
+
+
+if __name__ == "__main__":
+    main()
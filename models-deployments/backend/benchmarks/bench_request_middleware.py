@@ -0,0 +1,142 @@
+"""
+Per-request overhead of the request logging middleware, before and after
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_request_middleware [--requests 5000]
+
+Calls a minimal app directly over ASGI (no server or sockets) three ways:
+bare, wrapped in the previous @app.middleware("http") implementation
+(Starlette's BaseHTTPMiddleware with a uuid4 and time.time()), and wrapped
+in RequestLoggingMiddleware. Both middlewares record the same metrics. The
+"Request started/completed" records are off by default (see
+bench_log_formatter for their cost); pass --log-sample-rate 1 to include
+them, with the log output going to the usual handlers.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from config.logging_config import logger, sample_request_log
+from config.settings import settings
+from utils.metrics import observe_request
+from utils.request_middleware import RequestLoggingMiddleware, route_name
+
+
+async def legacy_log_requests(request: Request, call_next):
+    """The log_requests middleware as it was before RequestLoggingMiddleware"""
+    request_id = str(uuid.uuid4())
+    start_time = time.time()
+    request.state.request_id = request_id
+    sampled = sample_request_log()
+    if sampled:
+        logger.info(
+            "Request started",
+            extra={
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "client_ip": request.client.host if request.client else "unknown",
+            }
+        )
+    response = await call_next(request)
+    duration_ms = (time.time() - start_time) * 1000
+    if sampled or response.status_code >= 500:
+        logger.info(
+            "Request completed",
+            extra={
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "status_code": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+            }
+        )
+    response.headers["X-Request-ID"] = request_id
+    response.headers["X-Process-Time"] = str(round(duration_ms, 2))
+    observe_request(route_name(request.scope), request.method, response.status_code, duration_ms / 1000)
+    return response
+
+
+async def ping(request: Request):
+    return PlainTextResponse("ok")
+
+
+def build_app(middleware):
+    return Starlette(routes=[Route("/ping", ping)], middleware=middleware)
+
+
+async def time_requests(app, requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+    async def one_request():
+        # Like a server: the body once, then a disconnect only after the response is complete
+        body_sent = False
+        complete = asyncio.Event()
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await complete.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                complete.set()
+
+        await app(dict(scope), receive, send)
+
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await one_request()
+        best = min(best, time.perf_counter() - start)
+    return best / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--log-sample-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    settings.LOG_REQUEST_SAMPLE_RATE = args.log_sample_rate
+
+    apps = {
+        "bare": build_app([]),
+        "before": build_app([Middleware(BaseHTTPMiddleware, dispatch=legacy_log_requests)]),
+        "after": build_app([Middleware(RequestLoggingMiddleware)]),
+    }
+    timings = {name: asyncio.run(time_requests(app, args.requests)) for name, app in apps.items()}
+
+    bare = timings["bare"]
+    print(f"bare app: {bare:.1f} µs per request")
+    for name in ("before", "after"):
+        print(f"{name:>8}: {timings[name]:.1f} µs per request ({timings[name] - bare:+.1f} µs middleware overhead)")
+
+
+if __name__ == "__main__":
+    main()
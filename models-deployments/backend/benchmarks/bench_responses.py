@@ -0,0 +1,95 @@
+"""
+Wire compatibility and speed of the fast prediction responses
+
+Run from the backend directory with the model artifacts in MODELS_DIR:
+
+    python -m benchmarks.bench_responses [--batch-sizes 1 100 1000 10000] [--repeat 20]
+
+Sends every single-record and batch endpoint the same requests with
+FAST_RESPONSES off (response model validation, jsonable_encoder and
+json.dumps) and on (orjson straight from the scorer's results), fails if any
+response differs in status, Content-Type or body bytes, then prints the
+median server time of each mode. Batches include invalid records so the
+per-record error results are compared too. tests/test_responses.py runs the
+same comparison on every test run.
+"""
+import argparse
+import logging
+import statistics
+
+from fastapi.testclient import TestClient
+
+from api.warmups import MODEL_WARMUPS
+from app import app
+from config.settings import settings
+
+# Single-record and batch endpoint of each model
+ENDPOINTS = {
+    "medical_charge": ("/medical-charge/predict", "/medical-charge/predict/batch"),
+    "heart_disease": ("/heart-disease/predict", "/heart-disease/predict/batch"),
+    "customer_churn": ("/customer-churn/prediction", "/customer-churn/predict/batch"),
+    "customer_uplift": ("/predict_uplift/predict", "/predict_uplift/predict/batch"),
+}
+DEFAULT_BATCH_SIZES = [1, 100, 1000, 10000]
+
+
+def vary(record, i: int):
+    """The warmup record with its float fields scaled by up to 10%, so predictions differ"""
+    return {
+        key: value * (1 + (i % 11) / 100) if isinstance(value, float) else value
+        for key, value in record.items()
+    }
+
+
+def requests_to_send(batch_sizes):
+    for name, (single_path, batch_path) in ENDPOINTS.items():
+        record = MODEL_WARMUPS[name].record
+        yield f"{name} single", single_path, record
+        for size in batch_sizes:
+            records = [vary(record, i) for i in range(size)]
+            records[-1] = {"invalid": True}
+            yield f"{name} batch {size}", batch_path, {"records": records}
+
+
+def send(client: TestClient, path: str, body, fast: bool):
+    settings.FAST_RESPONSES = fast
+    # The prediction cache would answer repeated single records without scoring
+    settings.PREDICTION_CACHE_ENABLED = False
+    return client.post(path, json=body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    # Keep the per-request log lines out of the report
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with TestClient(app) as client:
+        for label, path, body in requests_to_send(args.batch_sizes):
+            slow = send(client, path, body, False)
+            fast = send(client, path, body, True)
+            for field, before, after in (
+                ("status", slow.status_code, fast.status_code),
+                ("content-type", slow.headers["content-type"], fast.headers["content-type"]),
+                ("body", slow.content, fast.content),
+            ):
+                if before != after:
+                    raise SystemExit(f"{label}: {field} differs with FAST_RESPONSES on")
+
+            timings = {}
+            for fast_mode in (False, True):
+                durations = [
+                    float(send(client, path, body, fast_mode).headers["x-process-time"])
+                    for _ in range(args.repeat)
+                ]
+                timings[fast_mode] = statistics.median(durations)
+            print(
+                f"{label:>30}: {len(slow.content):>9} bytes identical, "
+                f"{timings[False]:8.2f} ms -> {timings[True]:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Microbenchmarks of each preprocessing and inference stage, with allocations
+
+Run from the backend directory with the model artifacts in MODELS_DIR:
+
+    python -m benchmarks.bench_stages [--sizes 1 10 1000 100000] [--stages heart churn/encoding ...]
+        [--min-time 1.0] [--output stages.json]
+
+Times every stage the routers run, outside the server and the inference
+executor, on the same generated records as bench_http_load:
+
+    heart_disease    process_input_data (the pandas pipeline), the compiled
+                     transformer, predict/predict_proba on the sklearn model
+                     and on the native kernel
+    customer_churn   encoding (pandas and the compiled one-hot builder),
+                     predict/predict_proba on the sklearn forest and on the
+                     compiled forest
+    customer_uplift  the DataFrame construction, the fused scorer's feature
+                     matrix, predict_proba on both sklearn forests and the
+                     fused scorer
+    medical_charge   build_features and predict on both sklearn models and
+                     on their native kernels
+
+Each stage and batch size is warmed up, then timed call by call until
+--min-time seconds and at least --min-repeat calls have passed, and reports
+the median and interquartile range per call and per record. Inputs are
+prepared before timing, so each stage is timed alone. One further call runs
+under tracemalloc and reports its peak traced memory, and the blocks and
+bytes still allocated after it returns (mostly its result). NumPy reports
+its array buffers to tracemalloc, so they are included. Stages that are off
+in this tree (for example a kernel that failed its parity check) are skipped.
+"""
+import argparse
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+import warnings
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import pandas as pd
+
+from benchmarks.bench_http_load import record_generators
+from utils.model_loader import load_all_models, models
+
+DEFAULT_SIZES = [1, 10, 1000, 100000]
+
+
+class Stage(NamedTuple):
+    """One stage: prepare(records) builds its input and returns the call to time"""
+    model: str
+    name: str
+    prepare: Callable[[List[Any]], Callable[[], Any]]
+
+    @property
+    def label(self) -> str:
+        return f"{self.model}/{self.name}"
+
+
+def on_input(fn: Callable[[Any], Any], make_input: Callable[[List[Any]], Any] = list):
+    """A Stage.prepare timing fn alone on the input make_input builds from the records"""
+    def prepare(records: List[Any]) -> Callable[[], Any]:
+        X = make_input(records)
+        return lambda: fn(X)
+    return prepare
+
+
+def heart_disease_stages() -> List[Stage]:
+    from utils.helpers import process_input_batch, process_input_data
+
+    bundle = models.heart_disease_model
+    transformer = models.heart_disease_transformer
+    model = bundle["model"]
+    pipeline = (
+        bundle["imputer"], bundle["scaler"], bundle["encoder"],
+        bundle["numeric_cols"], bundle["categorical_cols"], bundle["encoded_cols"],
+    )
+
+    def pandas_pipeline(records):
+        # The single-record route calls process_input_data; batches call process_input_batch
+        if len(records) == 1:
+            return process_input_data(records[0], *pipeline)
+        return process_input_batch(records, *pipeline)
+
+    def model_input(records):
+        features = transformer.transform_batch(records) if transformer else process_input_batch(records, *pipeline)
+        if hasattr(model, "feature_names_in_"):
+            return pd.DataFrame(features, columns=transformer.feature_names) if transformer else features
+        return features
+
+    stages = [
+        Stage("heart_disease", "process_input_data", on_input(pandas_pipeline)),
+        Stage("heart_disease", "predict", on_input(model.predict, model_input)),
+        Stage("heart_disease", "predict_proba", on_input(model.predict_proba, model_input)),
+    ]
+    if transformer is not None:
+        stages.insert(1, Stage("heart_disease", "preprocess (compiled)", on_input(transformer.transform_batch)))
+    kernel = models.heart_disease_kernel
+    if kernel is not None and transformer is not None:
+        stages.append(Stage(
+            "heart_disease", "predict_proba (kernel)", on_input(kernel.predict_proba, transformer.transform_batch)
+        ))
+    return stages
+
+
+def customer_churn_stages() -> List[Stage]:
+    from utils.helpers import process_churn_batch
+
+    bundle = models.customer_churn_model
+    builder = models.customer_churn_builder
+    forest = bundle["model"]
+    pipeline = (
+        bundle["imputer_num"], bundle["scaler"], bundle["encoder"],
+        bundle["numerical_cols"], bundle["categorical_cols"], bundle["encoded_cols"],
+    )
+
+    def model_input(records):
+        if builder is None:
+            return process_churn_batch(records, *pipeline)
+        return pd.DataFrame(builder.build_batch(records), columns=builder.feature_names)
+
+    stages = [
+        Stage("customer_churn", "encoding (pandas)", on_input(lambda records: process_churn_batch(records, *pipeline))),
+        Stage("customer_churn", "predict", on_input(forest.predict, model_input)),
+        Stage("customer_churn", "predict_proba", on_input(forest.predict_proba, model_input)),
+    ]
+    if builder is not None:
+        stages.insert(1, Stage("customer_churn", "encoding (compiled)", on_input(builder.build_batch)))
+    compiled = models.customer_churn_forest
+    if compiled is not None and builder is not None:
+        stages.append(Stage(
+            "customer_churn", "predict_proba (compiled)", on_input(compiled.predict_proba, builder.build_batch)
+        ))
+    return stages
+
+
+def customer_uplift_stages() -> List[Stage]:
+    from api.machine_learning.customer_uplift import FEATURE_ORDER
+
+    treated, control, scorer = models.uplift_treated_model, models.uplift_control_model, models.uplift_scorer
+    feature_names = [f"f{i}" for i in range(len(FEATURE_ORDER))]
+
+    def build_frame(requests):
+        # As predict_uplift builds it for sklearn
+        input_features = [[getattr(request, name) for name in FEATURE_ORDER] for request in requests]
+        return pd.DataFrame(input_features, columns=feature_names)
+
+    stages = [
+        Stage("customer_uplift", "DataFrame construction", on_input(build_frame)),
+        Stage("customer_uplift", "predict_proba treated", on_input(treated.predict_proba, build_frame)),
+        Stage("customer_uplift", "predict_proba control", on_input(control.predict_proba, build_frame)),
+    ]
+    if scorer is not None:
+        stages.insert(1, Stage("customer_uplift", "features (fused scorer)", on_input(scorer.features)))
+        stages.append(Stage("customer_uplift", "score (fused scorer)", on_input(scorer.score, scorer.features)))
+    return stages
+
+
+def medical_charge_stages() -> List[Stage]:
+    from api.machine_learning.medical_charge import build_features
+
+    stages = [Stage("medical_charge", "build_features", on_input(build_features))]
+    for group in ("smoker", "non_smoker"):
+        for kind, model in (("", getattr(models, f"{group}_model")), (" (kernel)", getattr(models, f"{group}_kernel"))):
+            if model is not None:
+                stages.append(Stage("medical_charge", f"predict {group}{kind}", on_input(model.predict, build_features)))
+    return stages
+
+
+STAGE_BUILDERS = {
+    "heart_disease": heart_disease_stages,
+    "customer_churn": customer_churn_stages,
+    "customer_uplift": customer_uplift_stages,
+    "medical_charge": medical_charge_stages,
+}
+
+
+def benchmark_inputs(size: int, seed: int) -> Dict[str, List[Any]]:
+    """Generated records per model; validated request models where the routers score those"""
+    from api.warmups import MODEL_WARMUPS
+
+    generators = record_generators(sorted(STAGE_BUILDERS), seed)
+    inputs = {}
+    for model, generate in generators.items():
+        records = [generate() for _ in range(size)]
+        if model in ("medical_charge", "customer_uplift"):
+            records = [MODEL_WARMUPS[model].validate_record(record) for record in records]
+        inputs[model] = records
+    return inputs
+
+
+def time_calls(fn: Callable[[], Any], warmup: int, min_time: float, min_repeat: int, max_repeat: int) -> List[int]:
+    """Durations in ns of back-to-back calls, after warmup calls"""
+    for _ in range(warmup):
+        fn()
+    gc.collect()
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < min_repeat or (len(timings) < max_repeat and time.perf_counter() < deadline):
+        start = time.perf_counter_ns()
+        fn()
+        timings.append(time.perf_counter_ns() - start)
+    return timings
+
+
+def allocations(fn: Callable[[], Any]) -> Dict[str, float]:
+    """Peak traced memory of one call, and the blocks and bytes still allocated once it returns"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "filename")
+    return {
+        "peak_kb": round((peak - baseline) / 1024, 1),
+        "retained_blocks": sum(stat.count_diff for stat in diff),
+        "retained_kb": round(sum(stat.size_diff for stat in diff) / 1024, 1),
+    }
+
+
+def measure(stage: Stage, records: List[Any], args) -> Dict[str, Any]:
+    fn = stage.prepare(records)
+    timings = time_calls(fn, args.warmup, args.min_time, args.min_repeat, args.max_repeat)
+    quartiles = statistics.quantiles(timings, n=4, method="inclusive")
+    size = len(records)
+    return {
+        "stage": stage.label,
+        "size": size,
+        "calls": len(timings),
+        "median_ms": round(quartiles[1] / 1e6, 4),
+        "iqr_ms": round((quartiles[2] - quartiles[0]) / 1e6, 4),
+        "min_ms": round(min(timings) / 1e6, 4),
+        "median_us_per_record": round(quartiles[1] / 1e3 / size, 3),
+        **allocations(fn),
+    }
+
+
+def print_result(result: Dict[str, Any]):
+    print(
+        f"{result['stage']:<46} {result['size']:>7} {result['calls']:>6} {result['median_ms']:>11.3f} "
+        f"{result['iqr_ms']:>10.3f} {result['median_us_per_record']:>11.2f} {result['peak_kb']:>11.1f} "
+        f"{result['retained_blocks']:>9} {result['retained_kb']:>11.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--stages", nargs="+", default=[], help="only stages whose model/name contains one of these")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls before timing")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds of timed calls per stage and size")
+    parser.add_argument("--min-repeat", type=int, default=5)
+    parser.add_argument("--max-repeat", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    # The medical charge routers pass sklearn plain arrays too; one warning per call would bury the table
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    load_all_models()
+    stages = [
+        stage
+        for build in STAGE_BUILDERS.values()
+        for stage in build()
+        if not args.stages or any(part in stage.label for part in args.stages)
+    ]
+    if not stages:
+        raise SystemExit("No stages match --stages")
+    inputs = benchmark_inputs(max(args.sizes), args.seed)
+
+    print(
+        f"{'stage':<46} {'size':>7} {'calls':>6} {'median ms':>11} {'IQR ms':>10} {'µs/record':>11} "
+        f"{'peak KB':>11} {'blocks':>9} {'retained KB':>11}"
+    )
+    results = []
+    for stage in stages:
+        for size in args.sizes:
+            result = measure(stage, inputs[stage.model][:size], args)
+            print_result(result)
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"sizes": args.sizes, "seed": args.seed, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
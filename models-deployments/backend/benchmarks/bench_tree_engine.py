@@ -0,0 +1,96 @@
+"""
+Speed comparison of the compiled tree engine against sklearn
+
+Run from the backend directory with the model artifacts in MODELS_DIR:
+
+    python -m benchmarks.bench_tree_engine [--sizes 1 10 100 1000 10000 100000]
+
+Churn batches are drawn from every row of the bundled Telco CSV, run through
+the same preprocessing as the /customer-churn router; the uplift models have
+no bundled dataset, so they are timed on synthetic rows. Bit-exact parity with
+sklearn is checked by tests/test_tree_engine.py.
+"""
+import argparse
+import copy
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.model_loader import load_customer_churn_model, load_uplift_control_model, load_uplift_treated_model, models
+from utils.tree_engine import CompiledForest
+
+CHURN_CSV = (
+    Path(__file__).resolve().parents[3]
+    / "3. Customer Churn Prediction Using Decesion Tree & Random Forest"
+    / "WA_Fn-UseC_-Telco-Customer-Churn.csv"
+)
+DEFAULT_SIZES = [1, 10, 100, 1000, 10000, 100000]
+
+
+def churn_features() -> np.ndarray:
+    """Preprocessed feature matrix for every row of the bundled churn CSV"""
+    from api.machine_learning.customer_churn import build_features
+
+    raw = pd.read_csv(CHURN_CSV)
+    raw["TotalCharges"] = pd.to_numeric(raw["TotalCharges"], errors="coerce")
+    records = raw.astype(object).where(raw.notna(), None).to_dict(orient="records")
+    return np.asarray(build_features(records), dtype=np.float64)
+
+
+def best_time(fn, X, repeat: int) -> float:
+    """Best wall time of fn(X) in seconds over repeat runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark(name: str, forest, X: np.ndarray, sizes):
+    compiled = CompiledForest.from_sklearn(forest)
+    print(f"\n{name}: {compiled.n_trees} trees, {len(compiled.feature)} nodes, depth {compiled.max_depth}")
+
+    # Same input sklearn's routers pass, minus the thread pool it would use
+    sequential = copy.copy(forest)
+    sequential.n_jobs = 1
+    columns = getattr(forest, "feature_names_in_", None)
+
+    print(f"{'rows':>8} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>8}")
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        batch = X[rng.integers(0, len(X), size)]
+        batch_input = pd.DataFrame(batch, columns=columns) if columns is not None else batch
+        repeat = 20 if size <= 1000 else 3
+
+        sklearn_time = best_time(sequential.predict_proba, batch_input, repeat)
+        compiled_time = best_time(compiled.predict_proba, batch_input, repeat)
+        print(
+            f"{size:>8} {sklearn_time * 1000:>12.3f} {compiled_time * 1000:>12.3f}"
+            f" {sklearn_time / compiled_time:>7.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    args = parser.parse_args()
+
+    load_customer_churn_model()
+    load_uplift_treated_model()
+    load_uplift_control_model()
+
+    if models.customer_churn_model is not None:
+        benchmark("customer_churn_model", models.customer_churn_model["model"], churn_features(), args.sizes)
+
+    uplift_rows = np.random.default_rng(42).normal(0, 10, size=(20000, 12))
+    for name in ("uplift_treated_model", "uplift_control_model"):
+        forest = getattr(models, name)
+        if forest is not None:
+            benchmark(name, forest, uplift_rows, args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Per-worker memory of the gunicorn deployment, without and with shared models
+
+Run from the backend directory with the model artifacts in MODELS_DIR:
+
+    python -m benchmarks.measure_worker_memory [--workers 4] [--port 8010]
+
+Starts gunicorn twice (SHARED_MODELS_ENABLED off, then on), waits for every
+model to load, sends one prediction per route to each worker so they touch
+their model pages like live traffic, then reads /proc/<pid>/smaps_rollup of
+every worker. Unique RSS (private clean + private dirty pages) is the memory
+a worker adds on its own; PSS splits shared pages across the processes
+mapping them. Linux only.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+ROUTES = [
+    ("/medical-charge/predict", "medical_charge"),
+    ("/heart-disease/predict", "heart_disease"),
+    ("/customer-churn/prediction", "customer_churn"),
+    ("/predict_uplift/predict", "customer_uplift"),
+]
+
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """RSS, PSS and unique RSS of one process, in kB"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields["Rss"],
+        "pss": fields["Pss"],
+        "uss": fields["Private_Clean"] + fields["Private_Dirty"],
+    }
+
+
+def child_pids(parent: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The ppid is the second field after the parenthesised command name
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def get_json(url: str):
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def post_json(url: str, body: Dict) -> int:
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.status
+
+
+def wait_until_ready(base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if get_json(f"{base_url}/health")["status"] == "ok":
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout:.0f}s")
+
+
+def send_traffic(base_url: str, workers: int):
+    # Imported here so the script only needs the app's dependencies once it runs
+    sys.path.insert(0, str(BACKEND_DIR))
+    from api.warmups import MODEL_WARMUPS
+
+    # Connections are spread across workers by the kernel; a few rounds reach all of them
+    for _ in range(workers * 4):
+        for path, name in ROUTES:
+            post_json(f"{base_url}{path}", MODEL_WARMUPS[name].record)
+
+
+def measure(shared: bool, workers: int, port: int, timeout: float) -> List[Dict[str, int]]:
+    env = dict(os.environ, SHARED_MODELS_ENABLED=str(shared).lower(), DEBUG="false")
+    with tempfile.TemporaryDirectory() as shared_dir:
+        env.setdefault("SHARED_MODELS_DIR", shared_dir)
+        master = subprocess.Popen(
+            [
+                sys.executable, "-m", "gunicorn", "app:app",
+                "-c", "gunicorn.conf.py",
+                "--workers", str(workers),
+                "--bind", f"127.0.0.1:{port}",
+            ],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_until_ready(base_url, timeout)
+            send_traffic(base_url, workers)
+            return [memory_kb(pid) for pid in child_pids(master.pid)]
+        finally:
+            master.send_signal(signal.SIGTERM)
+            master.wait(timeout=60)
+
+
+def summarize(label: str, samples: List[Dict[str, int]]):
+    print(f"\n{label}: {len(samples)} workers")
+    print(f"{'worker':>8} {'RSS MB':>10} {'PSS MB':>10} {'unique MB':>10}")
+    for i, sample in enumerate(samples):
+        print(f"{i:>8} {sample['rss'] / 1024:>10.1f} {sample['pss'] / 1024:>10.1f} {sample['uss'] / 1024:>10.1f}")
+    total_uss = sum(sample["uss"] for sample in samples) / 1024
+    total_pss = sum(sample["pss"] for sample in samples) / 1024
+    print(f"{'total':>8} {'':>10} {total_pss:>10.1f} {total_uss:>10.1f}")
+    return total_uss / max(1, len(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds to wait for model loading")
+    args = parser.parse_args()
+
+    before = summarize("Per-worker models", measure(False, args.workers, args.port, args.timeout))
+    after = summarize("Shared models", measure(True, args.workers, args.port, args.timeout))
+    print(f"\nUnique RSS per worker: {before:.1f} MB -> {after:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
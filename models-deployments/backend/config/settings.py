@@ -14,7 +14,84 @@ class Settings(BaseSettings):
     # Server Config
     HOST: str = "0.0.0.0"
     PORT: int = 8000
-    WORKERS: int = 4
+    WORKERS: int = 4  # uvicorn workers for python app.py
+    GUNICORN_WORKERS: int = 1  # gunicorn.conf.py (the Dockerfile); 1 is gunicorn's own default
+    
+    # Model Loading (concurrent; degraded = serve routes as their models become ready)
+    MODEL_LOAD_WORKERS: int = 6
+    MODEL_STARTUP_DEGRADED: bool = False
+    
+    # Lazy Loading (load each model on first use) and Background Warmup
+    MODEL_LAZY_LOADING: bool = False
+    MODEL_WARMUP_ENABLED: bool = False
+    MODEL_WARMUP_PRIORITY: List[str] = [
+        "medical_charge",
+        "heart_disease",
+        "customer_churn",
+        "customer_uplift",
+    ]
+    
+    # Model Registry (versioned hot reload via the admin API or the models directory watcher)
+    MODEL_REGISTRY_MAX_VERSIONS: int = 3
+    MODEL_WATCH_ENABLED: bool = False
+    MODEL_WATCH_INTERVAL_SECONDS: float = 5.0
+    ADMIN_TOKEN: str = ""
+    
+    # Shadow and Canary Serving (candidate versions attached through the admin API)
+    SHADOW_WORKERS: int = 1
+    SHADOW_QUEUE_SIZE: int = 64  # batches waiting for shadow scoring; more are dropped
+    SHADOW_NUMERIC_TOLERANCE: float = 0.01  # largest difference still counted as agreement
+    CANARY_PERCENT: float = 5.0  # default share of records scored by a canary version
+    
+    # Shared Models (gunicorn preloads models in the master; workers share read-only pages)
+    SHARED_MODELS_ENABLED: bool = False
+    SHARED_MODELS_DIR: str = "models/shared"
+    
+    # Batch Prediction
+    BATCH_MAX_RECORDS: int = 50000
+    
+    # Micro-batching (coalesces concurrent single-record requests)
+    MICRO_BATCHING_ENABLED: bool = False
+    MICRO_BATCH_MAX_SIZE: int = 32
+    MICRO_BATCH_MAX_WAIT_MS: float = 2.0
+    
+    # Inference Executor ("thread" or "process"; a process pool loads its own model copies at start,
+    # so hot reloads, version activation and shadow/canary serving are refused in process mode)
+    INFERENCE_EXECUTOR: str = "thread"
+    INFERENCE_WORKERS: int = 0  # 0 = CPU count divided by the server's worker processes
+    INFERENCE_QUEUE_SIZE: int = 64
+    
+    # Serve linear/logistic models through NumPy kernels checked against sklearn at load time
+    NATIVE_KERNELS_ENABLED: bool = True
+    
+    # Serve random forests through the flattened tree engine, checked bit-exact against sklearn at load time
+    COMPILED_TREES_ENABLED: bool = True
+    COMPILED_TREES_MAX_ROWS: int = 1000  # larger batches go to sklearn
+    
+    # Preprocess requests with transformers compiled from the fitted imputer/scaler/encoder
+    COMPILED_PREPROCESSING_ENABLED: bool = True
+    
+    # Request Validation (strict decoders compiled from each model bundle; off = the routes' own checks)
+    SCHEMA_VALIDATION_ENABLED: bool = True
+    SCHEMA_RANGE_MARGIN: float = 1.0  # allowed overshoot of the training range, as a fraction of it (<0 = no range checks)
+    
+    # Prediction responses encoded with orjson (same bytes), skipping response model validation
+    FAST_RESPONSES: bool = True
+    
+    # Prediction Cache (per model, for repeated single-record payloads)
+    PREDICTION_CACHE_ENABLED: bool = True
+    PREDICTION_CACHE_MAX_ENTRIES: int = 1024
+    PREDICTION_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Streaming Predictions (records scored per chunk of a CSV/NDJSON upload)
+    STREAM_CHUNK_SIZE: int = 1000
+    STREAM_SPOOL_UPLOAD: bool = False  # read the whole upload (to a temp file) before responding
+    STREAM_SPOOL_MAX_MEMORY: int = 8 * 1024 * 1024  # bytes kept in memory before spilling to disk
+    
+    # Batch Scoring Jobs (uploads, progress and results persisted under JOBS_DIR)
+    JOBS_DIR: str = "./jobs"
+    JOB_WORKERS: int = 1  # jobs processed concurrently per server process
+    JOB_CHUNK_SIZE: int = 5000
     
     # CORS Config
     CORS_ORIGINS: List[str] = [
@@ -29,10 +106,21 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"  # or "text"
+    LOG_JSON_BACKEND: str = "fast"  # "fast" (same bytes as "stdlib"), "orjson" (compact, needs orjson) or "stdlib"
+    LOG_QUEUE_SIZE: int = 10000  # records waiting for the writer thread; further records are dropped
+    LOG_FLUSH_BATCH: int = 256  # records written per flush when the queue is backed up
+    LOG_REQUEST_SAMPLE_RATE: float = 1.0  # fraction of requests logging "Request started/completed"
     
     # Model Paths
     MODELS_DIR: str = "models"
     
+    # Artifact Cache (content-addressed downloads; unused versions evicted LRU past the limit)
+    ARTIFACT_CACHE_DIR: str = "models/cache"
+    ARTIFACT_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    ARTIFACT_DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+    ARTIFACT_DOWNLOAD_RETRIES: int = 3
+    ARTIFACT_DOWNLOAD_TIMEOUT: int = 300
+    
     # Google Drive IDs
     SMOKER_MODEL_ID: str = "1vhoNvvpkGJ6pYasbDFU7I_3lJcYtkqhh"
     NON_SMOKER_MODEL_ID: str = "173fNtLdFvlwPK5R1y0RB3doV5PX9nFbb"
@@ -41,6 +129,14 @@ class Settings(BaseSettings):
     UPLIFT_TREATED_MODEL_ID: str = "1Akl2p0P666rzOf2zGpNZQ9xioZ0ua-oV"
     UPLIFT_CONTROL_MODEL_ID: str = "1c8B9K0qDX2gN4kDPKgl1YmhVWvULK7-c"
     
+    # Expected SHA-256 per artifact (empty = trust the first complete download)
+    SMOKER_MODEL_SHA256: str = ""
+    NON_SMOKER_MODEL_SHA256: str = ""
+    HEART_DISEASE_MODEL_SHA256: str = ""
+    CUSTOMER_CHURN_MODEL_SHA256: str = ""
+    UPLIFT_TREATED_MODEL_SHA256: str = ""
+    UPLIFT_CONTROL_MODEL_SHA256: str = ""
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration, read automatically from the backend directory
+
+GUNICORN_WORKERS sets the worker count (one by default, as gunicorn's own
+default, so each extra worker is an opt-in copy of the models).
+
+With SHARED_MODELS_ENABLED the app and its models are loaded once in the
+master before forking. The heap is then frozen so the garbage collector
+never writes to the preloaded objects, and the workers share the model
+pages copy-on-write instead of each loading its own copy. Each worker
+starts its own log writer thread after the fork (see config.logging_config).
+"""
+import gc
+
+from config.settings import settings
+
+bind = f"{settings.HOST}:{settings.PORT}"
+workers = settings.GUNICORN_WORKERS
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = settings.SHARED_MODELS_ENABLED
+
+
+def when_ready(server):
+    """Runs in the master after the app is preloaded, before the first fork"""
+    if not preload_app:
+        return
+
+    from utils.model_loader import load_all_models, shutdown_loader_pool
+
+    load_all_models()
+    # The loader pool's threads would not exist in the workers; the log writer
+    # thread would not either, and config.logging_config restarts it after fork
+    shutdown_loader_pool()
+
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Models preloaded; {gc.get_freeze_count()} objects frozen before forking workers")
@@ -0,0 +1,152 @@
+"""
+Shared fixtures for the backend tests
+
+The model files in this repository are Git LFS pointers, so the tests train
+small models of the same shape as the deployed bundles from the bundled
+datasets (uplift from synthetic data; its dataset is not bundled) and point
+MODELS_DIR at them. The app writes logs/, jobs/ and its artifact cache
+relative to the working directory, so the session runs in a temporary
+directory and the tracked logs stay untouched. Everything here happens
+before the app modules are imported, because settings are read at import
+(the working directory changes once pytest has resolved its paths).
+"""
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+REPO_DIR = BACKEND_DIR.parents[1]
+MEDICAL_CSV = REPO_DIR / "1. Medical Charges Prediction Using Linear Regression" / "medical.csv"
+HEART_CSV = REPO_DIR / "2. Heart Disease Predictor using Logistic Regression" / "heart_disease.csv"
+CHURN_CSV = REPO_DIR / "3. Customer Churn Prediction Using Decesion Tree & Random Forest" / "WA_Fn-UseC_-Telco-Customer-Churn.csv"
+REGIONS = ["northeast", "northwest", "southeast", "southwest"]
+
+
+def build_medical_models(models_dir: Path):
+    data = pd.read_csv(MEDICAL_CSV)
+    for smoker, name in (("yes", "smoker_model.pkl"), ("no", "non_smoker_model.pkl")):
+        group = data[data.smoker == smoker].copy()
+        group["sex_bin"] = (group.sex == "male").astype(int)
+        for region in REGIONS:
+            group[region] = (group.region == region).astype(int)
+        model = LinearRegression().fit(group[["age", "bmi", "children", "sex_bin", *REGIONS]], group.charges)
+        with open(models_dir / name, "wb") as f:
+            pickle.dump(model, f)
+
+
+def build_heart_disease_model(models_dir: Path):
+    raw = pd.read_csv(HEART_CSV)
+    target = (raw["Heart Disease Status"] == "Yes").astype(int)
+    # As in model.ipynb: the input columns skip the first one (Age) and the target
+    input_cols = list(raw.columns[1:-1])
+    X = raw[input_cols].copy()
+    numeric_cols = X.select_dtypes(include=np.number).columns.tolist()
+    categorical_cols = X.select_dtypes("object").columns.tolist()
+
+    # As in model.ipynb, the bundle keeps the last imputer fitted: the categorical one
+    X[numeric_cols] = SimpleImputer(strategy="mean").fit_transform(X[numeric_cols])
+    imputer = SimpleImputer(strategy="most_frequent").fit(X[categorical_cols])
+    X[categorical_cols] = imputer.transform(X[categorical_cols])
+    scaler = MinMaxScaler().fit(X[numeric_cols])
+    X[numeric_cols] = scaler.transform(X[numeric_cols])
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore").fit(X[categorical_cols])
+    encoded_cols = list(encoder.get_feature_names_out(categorical_cols))
+    X[encoded_cols] = encoder.transform(X[categorical_cols])
+
+    model = LogisticRegression(solver="liblinear").fit(X[numeric_cols + encoded_cols], target)
+    joblib.dump(
+        {
+            "model": model, "imputer": imputer, "scaler": scaler, "encoder": encoder,
+            "input_cols": input_cols, "target_col": "Heart Disease Status",
+            "numeric_cols": numeric_cols, "categorical_cols": categorical_cols, "encoded_cols": encoded_cols,
+        },
+        models_dir / "Heart_Disease_Predictor.joblib",
+    )
+
+
+def build_customer_churn_model(models_dir: Path):
+    raw = pd.read_csv(CHURN_CSV)
+    raw["TotalCharges"] = pd.to_numeric(raw["TotalCharges"], errors="coerce")
+    input_cols = list(raw.columns[1:-1])
+    X = raw[input_cols].copy()
+    numerical_cols = X.select_dtypes(include=np.number).columns.tolist()
+    categorical_cols = X.select_dtypes("object").columns.tolist()
+
+    imputer_num = SimpleImputer(strategy="mean").fit(X[numerical_cols])
+    imputer_cat = SimpleImputer(strategy="most_frequent").fit(X[categorical_cols])
+    X[numerical_cols] = imputer_num.transform(X[numerical_cols])
+    scaler = MinMaxScaler().fit(X[numerical_cols])
+    X[numerical_cols] = scaler.transform(X[numerical_cols])
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore").fit(X[categorical_cols])
+    encoded_cols = list(encoder.get_feature_names_out(categorical_cols))
+    X[encoded_cols] = encoder.transform(X[categorical_cols])
+
+    model = RandomForestClassifier(
+        n_estimators=40, max_depth=7, max_features="log2", min_samples_split=30, random_state=42
+    ).fit(X[numerical_cols + encoded_cols], raw["Churn"])
+    joblib.dump(
+        {
+            "model": model, "imputer_num": imputer_num, "imputer_cat": imputer_cat, "scaler": scaler,
+            "encoder": encoder, "numerical_cols": numerical_cols, "categorical_cols": categorical_cols,
+            "encoded_cols": encoded_cols,
+        },
+        models_dir / "customer_churn_prediction.joblib",
+    )
+
+
+def build_uplift_models(models_dir: Path):
+    rng = np.random.default_rng(42)
+    features = pd.DataFrame(rng.normal(0, 10, size=(6000, 12)), columns=[f"f{i}" for i in range(12)])
+    treated = rng.binomial(1, 0.5, len(features))
+    logit = 0.05 * features.f2 + 0.03 * features.f3
+    outcome = ((1 / (1 + np.exp(-logit))) * 0.1 * treated + rng.normal(0, 0.2, len(features)) > 0.5).astype(int)
+    for group, name in ((1, "uplift_treated_model.joblib"), (0, "uplift_control_model.joblib")):
+        model = RandomForestClassifier(n_estimators=30, max_depth=8, random_state=42)
+        joblib.dump(model.fit(features[treated == group], outcome[treated == group]), models_dir / name)
+
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="backend-tests-"))
+MODELS_DIR = WORK_DIR / "models"
+MODELS_DIR.mkdir()
+for build in (build_medical_models, build_heart_disease_model, build_customer_churn_model, build_uplift_models):
+    build(MODELS_DIR)
+
+os.environ.update(
+    MODELS_DIR=str(MODELS_DIR),
+    ARTIFACT_CACHE_DIR=str(WORK_DIR / "cache"),
+    JOBS_DIR=str(WORK_DIR / "jobs"),
+    SHARED_MODELS_DIR=str(WORK_DIR / "shared"),
+    DEBUG="false",
+)
+
+
+def pytest_sessionstart(session):
+    # After pytest has resolved its paths, before any test module imports the app
+    os.chdir(WORK_DIR)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """A client of the app with every model loaded"""
+    from fastapi.testclient import TestClient
+
+    from app import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def read_records(path: Path, limit: int = None):
+    """Rows of a bundled CSV as JSON-ready dicts, missing cells as None"""
+    frame = pd.read_csv(path, nrows=limit)
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
@@ -0,0 +1,197 @@
+"""The artifact cache against a local HTTP server that honours Range requests"""
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.artifact_cache import ArtifactCache, ChecksumMismatch
+
+SIZE = 50_000
+
+
+class ArtifactServer(ThreadingHTTPServer):
+    """Serves files from a dict, logging every request; cut_after closes the next response early"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ArtifactHandler)
+        self.files = {}
+        self.requests = []
+        self.cut_after = None
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/{name}"
+
+
+class ArtifactHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get("Range"), self.headers.get("If-Range")))
+        body = server.files.get(self.path.lstrip("/"))
+        if body is None:
+            self.send_error(404)
+            return
+        etag = f'"{hashlib.sha256(body).hexdigest()}"'
+
+        start = 0
+        requested = self.headers.get("Range")
+        if requested and self.headers.get("If-Range") in (None, etag):
+            start = int(requested.removeprefix("bytes=").rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(body) - start))
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+        payload = body[start:]
+        if server.cut_after is not None:
+            payload, server.cut_after = payload[:server.cut_after], None
+        self.wfile.write(payload)
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ArtifactServer()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_cache(tmp_path, max_bytes: int = 10 * SIZE) -> ArtifactCache:
+    return ArtifactCache(str(tmp_path / "cache"), max_bytes, chunk_size=8192, retries=0, timeout=5, pool_size=2)
+
+
+def artifact(seed: int) -> bytes:
+    return bytes((seed + i * 7) % 251 for i in range(SIZE))
+
+
+def sha256(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_killed_download_resumes_where_it_stopped(tmp_path, server):
+    body = artifact(1)
+    server.files["model.pkl"] = body
+    server.cut_after = 20_000
+
+    with pytest.raises(requests.RequestException):
+        make_cache(tmp_path).fetch("model", server.url("model.pkl"), sha256(body))
+    part_path = tmp_path / "cache" / "partial" / "model.part"
+    kept = part_path.stat().st_size
+    assert 0 < kept <= 20_000
+
+    # A new process picks up the partial file
+    path = make_cache(tmp_path).fetch("model", server.url("model.pkl"), sha256(body))
+    assert read(path) == body
+    assert server.requests[-1] == ("/model.pkl", f"bytes={kept}-", f'"{sha256(body)}"')
+    assert not part_path.exists()
+
+
+def test_resume_restarts_when_the_file_changed_upstream(tmp_path, server):
+    server.files["model.pkl"] = artifact(1)
+    server.cut_after = 20_000
+    with pytest.raises(requests.RequestException):
+        make_cache(tmp_path).fetch("model", server.url("model.pkl"))
+
+    # If-Range no longer matches, so the server sends the whole new file
+    server.files["model.pkl"] = body = artifact(2)
+    path = make_cache(tmp_path).fetch("model", server.url("model.pkl"))
+    assert read(path) == body
+
+
+def test_cache_hit_sends_no_request(tmp_path, server):
+    body = artifact(1)
+    server.files["model.pkl"] = body
+    cache = make_cache(tmp_path)
+    first = cache.fetch("model", server.url("model.pkl"))
+    assert len(server.requests) == 1
+
+    assert make_cache(tmp_path).fetch("model", server.url("model.pkl")) == first
+    # A pinned hash finds the blob under any name
+    assert cache.fetch("other", server.url("elsewhere.pkl"), sha256(body).upper()) == first
+    assert len(server.requests) == 1
+
+
+def test_checksum_mismatch_is_rejected(tmp_path, server):
+    server.files["model.pkl"] = artifact(1)
+    cache = make_cache(tmp_path)
+    with pytest.raises(ChecksumMismatch):
+        cache.fetch("model", server.url("model.pkl"), sha256(artifact(2)))
+    assert os.listdir(tmp_path / "cache" / "blobs") == []
+    assert os.listdir(tmp_path / "cache" / "refs") == []
+
+
+def test_corrupt_blob_is_downloaded_again(tmp_path, server):
+    body = artifact(1)
+    server.files["model.pkl"] = body
+    cache = make_cache(tmp_path)
+    path = cache.fetch("model", server.url("model.pkl"))
+    with open(path, "r+b") as f:
+        f.write(b"\0" * 16)
+
+    assert read(cache.fetch("model", server.url("model.pkl"))) == body
+    assert len(server.requests) == 2
+
+
+def test_least_recently_used_unreferenced_blobs_are_evicted(tmp_path, server):
+    cache = make_cache(tmp_path, max_bytes=2 * SIZE)
+    versions = [artifact(seed) for seed in range(3)]
+    for body in versions:
+        server.files["model.pkl"] = body
+        cache.fetch("model", server.url("model.pkl"), refresh=True)
+
+    # The active version is referenced; of the two old ones only the most recent fits
+    assert not os.path.exists(cache.blob_path(sha256(versions[0])))
+    assert read(cache.blob_path(sha256(versions[1]))) == versions[1]
+    assert read(cache.blob_path(sha256(versions[2]))) == versions[2]
+
+
+def test_referenced_blobs_are_never_evicted(tmp_path, server):
+    cache = make_cache(tmp_path, max_bytes=SIZE)
+    for seed in range(3):
+        server.files[f"{seed}.pkl"] = artifact(seed)
+        cache.fetch(f"model{seed}", server.url(f"{seed}.pkl"))
+    assert len(os.listdir(tmp_path / "cache" / "blobs")) == 3
+
+
+def test_file_already_in_models_dir_is_adopted(tmp_path, server):
+    body = artifact(1)
+    local_path = tmp_path / "model.pkl"
+    local_path.write_bytes(body)
+
+    # No server file: the fetch must not need the network
+    path = make_cache(tmp_path).fetch("model", server.url("model.pkl"), local_path=str(local_path))
+    assert read(path) == body
+    assert server.requests == []
+
+
+def test_local_file_with_the_wrong_hash_is_not_adopted(tmp_path, server):
+    body = artifact(1)
+    server.files["model.pkl"] = body
+    local_path = tmp_path / "model.pkl"
+    local_path.write_bytes(artifact(2))
+
+    path = make_cache(tmp_path).fetch("model", server.url("model.pkl"), sha256(body), local_path=str(local_path))
+    assert read(path) == body
+    assert len(server.requests) == 1
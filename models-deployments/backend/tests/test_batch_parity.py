@@ -0,0 +1,70 @@
+"""Every /predict/batch result matches the single-record route for the same record"""
+import pandas as pd
+import pytest
+
+from conftest import CHURN_CSV, HEART_CSV, MEDICAL_CSV, read_records
+
+
+def churn_records(limit):
+    frame = pd.read_csv(CHURN_CSV, nrows=limit)
+    frame["TotalCharges"] = pd.to_numeric(frame["TotalCharges"], errors="coerce")
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def uplift_records(limit):
+    return [
+        {
+            "age": 20 + i % 50, "monthlyIncome": 1000.0 * (i + 1), "tenure": i % 36,
+            "engagementScore": (i % 10) / 10, "sessionTime": 5 + i % 40, "activityChange": (i % 7 - 3) / 10,
+            "churnRisk": (i % 9) / 10, "appVisitsPerWeek": i % 12, "regionCode": i % 5,
+            "totalClicks": 3 * i, "customerRating": 1 + i % 5, "satisfactionTrend": (i % 5 - 2) / 10,
+        }
+        for i in range(limit)
+    ]
+
+
+ROUTES = {
+    "medical_charge": ("/medical-charge/predict", "/medical-charge/predict/batch", lambda n: read_records(MEDICAL_CSV, n)),
+    "heart_disease": ("/heart-disease/predict", "/heart-disease/predict/batch", lambda n: read_records(HEART_CSV, n)),
+    "customer_churn": ("/customer-churn/prediction", "/customer-churn/predict/batch", churn_records),
+    "customer_uplift": ("/predict_uplift/predict", "/predict_uplift/predict/batch", uplift_records),
+}
+
+
+def expected_result(response) -> dict:
+    """The batch result the single-record response corresponds to"""
+    body = response.json()
+    body.pop("input_data", None)
+    return body
+
+
+@pytest.mark.parametrize("model", sorted(ROUTES))
+def test_batch_matches_single(client, model):
+    single_path, batch_path, records_for = ROUTES[model]
+    records = records_for(60)
+
+    response = client.post(batch_path, json={"records": records})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == len(records)
+
+    for i, (record, result) in enumerate(zip(records, body["results"])):
+        assert result.pop("index") == i
+        single = client.post(single_path, json=record)
+        if single.status_code == 200:
+            assert result == expected_result(single)
+        else:
+            assert result["success"] is False
+
+
+@pytest.mark.parametrize("model", sorted(ROUTES))
+def test_batch_reports_invalid_records_in_place(client, model):
+    single_path, batch_path, records_for = ROUTES[model]
+    valid = [record for record in records_for(60) if client.post(single_path, json=record).status_code == 200][:2]
+
+    response = client.post(batch_path, json={"records": [valid[0], {}, "not a record", valid[1]]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["success"] for result in results] == [True, False, False, True]
+    assert all(result["error"] for result in results[1:3])
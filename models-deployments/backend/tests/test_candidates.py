@@ -0,0 +1,166 @@
+"""Shadow and canary serving: the traffic split, isolated shadow failures, promotion and rollback"""
+import random
+import threading
+import time
+
+import pytest
+
+from config.settings import settings
+from utils import candidates
+from utils.candidates import attach_candidate, detach_candidate, serve_candidates, shutdown_shadow_pool
+from utils.model_loader import load_version, models, registry
+from utils.model_registry import CANARY, SHADOW, STANDBY
+
+ADMIN = {"X-Admin-Token": "secret"}
+
+
+class Scorer:
+    """
+    Scores on whichever "test_model" its store holds ("active" unless a
+    candidate's is swapped in); set fail to make the candidate's scoring raise
+    """
+
+    def __init__(self):
+        self.fail = False
+        self.release = None
+        self.route = serve_candidates("test_model")(self.score_records)
+
+    def score_records(self, records, store=None):
+        model = getattr(store or models, "test_model", "active")
+        if model == "candidate":
+            if self.release is not None:
+                self.release.wait(10)
+            if self.fail:
+                raise RuntimeError("candidate is broken")
+        return [{"model": model, "value": record["x"] * 2} for record in records]
+
+
+@pytest.fixture
+def scorer():
+    return Scorer()
+
+
+@pytest.fixture
+def candidate_version():
+    """A loaded "test_model" version whose artifact marks the records it scores"""
+    version = registry.register("test_model", {"test_model": "candidate"}, {}, 0.0)
+    yield version
+    detach_candidate("test_model")
+    registry.discard(version)
+    shutdown_shadow_pool()
+
+
+def records(n: int):
+    return [{"x": i} for i in range(n)]
+
+
+def wait_until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("percent", [0, 30, 100])
+def test_canary_answers_its_share_of_records(monkeypatch, scorer, candidate_version, percent):
+    monkeypatch.setattr(candidates, "random", random.Random(0))
+    candidate = attach_candidate(candidate_version, CANARY, percent)
+
+    results = scorer.route(records(2000))
+
+    # Every record is answered once, in order, by one version or the other
+    assert [result["value"] for result in results] == [2 * i for i in range(2000)]
+    on_canary = sum(result["model"] == "candidate" for result in results)
+    assert on_canary == candidate.records
+    assert candidate.primary_records == 2000 - on_canary
+    assert abs(on_canary / 2000 - percent / 100) < 0.05
+
+
+def test_failing_canary_falls_back_to_the_active_version(scorer, candidate_version):
+    candidate = attach_candidate(candidate_version, CANARY, 100)
+    scorer.fail = True
+
+    results = scorer.route(records(10))
+
+    assert [result["model"] for result in results] == ["active"] * 10
+    assert candidate.errors == 1
+    assert candidate.primary_records == 10
+
+
+def test_shadow_sees_every_record_without_changing_responses(scorer, candidate_version):
+    candidate = attach_candidate(candidate_version, SHADOW)
+
+    results = scorer.route(records(10))
+
+    assert [result["model"] for result in results] == ["active"] * 10
+    wait_until(lambda: candidate.compared == 10)
+    stats = candidate.stats()
+    assert stats["records"] == stats["primary_records"] == 10
+    # Only the "model" field differs, so no comparison agrees
+    assert stats["agreement_rate"] == 0.0
+    assert stats["mean_abs_diff"] == {}
+
+
+def test_shadow_failures_never_reach_the_caller(scorer, candidate_version):
+    candidate = attach_candidate(candidate_version, SHADOW)
+    scorer.fail = True
+
+    results = scorer.route(records(10))
+
+    assert results == [{"model": "active", "value": 2 * i} for i in range(10)]
+    wait_until(lambda: candidate.errors == 1)
+    assert candidate.records == 0
+
+
+def test_shadow_work_past_the_queue_is_dropped(monkeypatch, scorer, candidate_version):
+    monkeypatch.setattr(settings, "SHADOW_WORKERS", 1)
+    monkeypatch.setattr(settings, "SHADOW_QUEUE_SIZE", 1)
+    candidate = attach_candidate(candidate_version, SHADOW)
+    scorer.release = threading.Event()
+
+    # One batch running, one queued, the third dropped: the caller is answered every time
+    for _ in range(3):
+        assert [result["model"] for result in scorer.route(records(5))] == ["active"] * 5
+    assert candidate.dropped == 5
+
+    scorer.release.set()
+    wait_until(lambda: candidate.compared == 10)
+
+
+def test_detached_candidate_stops_serving(scorer, candidate_version):
+    attach_candidate(candidate_version, CANARY, 100)
+    assert detach_candidate("test_model").stats()["records"] == 0
+    assert candidate_version.status == STANDBY
+    assert [result["model"] for result in scorer.route(records(3))] == ["active"] * 3
+
+
+def test_canary_is_promoted_then_rolled_back(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    previous = registry.active("heart_disease")
+
+    # A second copy of the active files, as /load registers after a retrain
+    version = load_version("heart_disease").version
+    try:
+        response = client.post(f"/admin/models/heart_disease/canary/{version}?percent=50", headers=ADMIN)
+        assert response.status_code == 200
+        assert response.json()["candidate"]["percent"] == 50
+        assert candidates.canary_serving()
+
+        # Promotion ends the canary: the version is active and answers every record
+        assert client.post(f"/admin/models/heart_disease/activate/{version}", headers=ADMIN).status_code == 200
+        promoted = registry.get("heart_disease", version)
+        assert registry.active("heart_disease") is promoted
+        assert models.heart_disease_model is promoted.artifacts["heart_disease_model"]
+        assert not candidates.canary_serving()
+        assert previous.status == STANDBY
+
+        # Rollback swaps the previous version back in
+        response = client.post(f"/admin/models/heart_disease/activate/{previous.version}", headers=ADMIN)
+        assert response.status_code == 200
+        assert registry.active("heart_disease") is previous
+        assert models.heart_disease_model is previous.artifacts["heart_disease_model"]
+        assert promoted.status == STANDBY
+    finally:
+        detach_candidate("heart_disease")
+        if registry.active("heart_disease") is not previous:
+            registry.activate(previous, previous.artifacts)
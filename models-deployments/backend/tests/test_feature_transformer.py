@@ -0,0 +1,151 @@
+"""Compiled feature transformers and builders produce exactly the pandas pipeline's features on the bundled datasets"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import CHURN_CSV, HEART_CSV, read_records
+from utils import feature_transformer
+from utils.helpers import process_churn_batch, process_input_batch, process_input_data
+from utils.model_loader import models
+
+
+def csv_records(path):
+    """Rows as pandas.read_csv parses them, missing cells as NaN (blank TotalCharges too)"""
+    frame = pd.read_csv(path)
+    if "TotalCharges" in frame:
+        frame["TotalCharges"] = pd.to_numeric(frame["TotalCharges"], errors="coerce")
+    return frame.to_dict(orient="records")
+
+
+def features(frame: pd.DataFrame) -> np.ndarray:
+    return frame.to_numpy(dtype=np.float64)
+
+
+def same(actual: np.ndarray, expected: np.ndarray) -> bool:
+    return actual.shape == expected.shape and np.array_equal(actual, expected, equal_nan=True)
+
+
+@pytest.fixture
+def heart_transformer(client):
+    transformer = models.heart_disease_transformer
+    assert transformer is not None
+    return transformer
+
+
+def heart_variants(transformer):
+    """CSV rows as NaN and as None, plus rows with categorical fields missing or null"""
+    nan_rows = csv_records(HEART_CSV)
+    none_rows = read_records(HEART_CSV)
+    records = nan_rows[::100] + none_rows[::100]
+    for i, col in enumerate(transformer.categorical_cols):
+        record = dict(nan_rows[i])
+        del record[col]
+        records.append(record)
+        records.append({**nan_rows[i], col: None})
+        records.append({**nan_rows[i], col: math.nan})
+    # A numeric field left out entirely, and one sent as null
+    col = transformer.numeric_cols[0]
+    records.append({key: value for key, value in nan_rows[0].items() if key != col})
+    records.append({**nan_rows[0], col: None})
+    return records
+
+
+def test_heart_transform_matches_process_input_data(heart_transformer):
+    pipeline = heart_transformer.pipeline
+    for record in heart_variants(heart_transformer):
+        try:
+            expected = features(process_input_data(record, *pipeline))
+        except ValueError:
+            with pytest.raises(ValueError):
+                heart_transformer.transform(record)
+            continue
+        assert same(heart_transformer.transform(record), expected), record
+
+
+@pytest.mark.parametrize("rows", ["nan", "none"])
+def test_heart_transform_batch_matches_process_input_batch(heart_transformer, rows):
+    records = csv_records(HEART_CSV) if rows == "nan" else read_records(HEART_CSV)
+    expected = features(process_input_batch(records, *heart_transformer.pipeline))
+    assert same(heart_transformer.transform_batch(records), expected)
+
+
+def test_heart_batch_with_missing_fields_matches_process_input_batch(heart_transformer):
+    records = heart_variants(heart_transformer)
+    # Without the record lacking a numeric column, which pandas refuses for the whole batch
+    records = [record for record in records if set(heart_transformer.numeric_cols) <= set(record)]
+    expected = features(process_input_batch(records, *heart_transformer.pipeline))
+    assert same(heart_transformer.transform_batch(records), expected)
+
+
+def test_heart_csv_rows_take_the_compiled_path(monkeypatch, heart_transformer):
+    # NaN cells are imputed or scaled without pandas; only None categoricals need the fallback
+    records = csv_records(HEART_CSV)
+    expected = features(process_input_batch(records, *heart_transformer.pipeline))
+
+    def fallback(*args):
+        raise AssertionError("the batch went through process_input_batch")
+
+    monkeypatch.setattr(feature_transformer, "process_input_batch", fallback)
+    assert same(heart_transformer.transform_batch(records), expected)
+
+
+@pytest.fixture
+def churn_builder(client):
+    builder = models.customer_churn_builder
+    assert builder is not None
+    return builder
+
+
+def churn_variants(builder):
+    """
+    CSV rows (blank TotalCharges as NaN, as None and as the raw blank string)
+    plus rows with unknown or null categories
+    """
+    rows = csv_records(CHURN_CSV)
+    blank = [row for row in rows if math.isnan(row["TotalCharges"])]
+    assert blank
+    records = rows[::100] + blank
+    records += [{**row, "TotalCharges": None} for row in blank]
+    records += [{**row, "TotalCharges": " "} for row in blank[:2]]
+    for i, (col, table) in enumerate(builder.category_tables):
+        known = next(iter(table))
+        records.append({**rows[i], col: "__unknown__"})
+        records.append({**rows[i], col: known.upper()})
+        records.append({**rows[i], col: None})
+    return records
+
+
+def test_churn_build_matches_process_churn_batch(churn_builder):
+    pipeline = churn_builder.pipeline
+    for record in churn_variants(churn_builder):
+        try:
+            expected = features(process_churn_batch([record], *pipeline))
+        except Exception as e:
+            with pytest.raises(type(e)):
+                churn_builder.build(record)
+            continue
+        assert same(churn_builder.build(record), expected), record
+
+
+def test_churn_build_batch_matches_process_churn_batch(churn_builder):
+    records = [
+        record for record in churn_variants(churn_builder)
+        if record["TotalCharges"] != " " and all(record[col] is not None for col, _ in churn_builder.category_tables)
+    ]
+    records += csv_records(CHURN_CSV)
+    expected = features(process_churn_batch(records, *churn_builder.pipeline))
+    assert same(churn_builder.build_batch(records), expected)
+
+
+def test_churn_unknown_categories_and_blank_totals_take_the_compiled_path(monkeypatch, churn_builder):
+    rows = csv_records(CHURN_CSV)
+    records = rows + [{**rows[0], "TotalCharges": None}, {**rows[1], "PaymentMethod": "Cash"}]
+    expected = features(process_churn_batch(records, *churn_builder.pipeline))
+
+    def fallback(*args):
+        raise AssertionError("the batch went through process_churn_batch")
+
+    monkeypatch.setattr(feature_transformer, "process_churn_batch", fallback)
+    assert same(churn_builder.build_batch(records), expected)
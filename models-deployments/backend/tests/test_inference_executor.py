@@ -0,0 +1,93 @@
+"""Admission control of the bounded inference executor, and what process mode rules out"""
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from config.settings import settings
+from utils import inference_executor
+from utils.candidates import candidate_stats, canary_serving
+from utils.inference_executor import InferenceQueueFull, executor_stats, run_inference, shutdown_executor
+from utils.model_loader import registry
+
+
+@pytest.fixture
+def single_slot_executor(monkeypatch):
+    """A thread executor with one worker and no queue, so its capacity is one job"""
+    shutdown_executor()
+    monkeypatch.setattr(settings, "INFERENCE_EXECUTOR", "thread")
+    monkeypatch.setattr(settings, "INFERENCE_WORKERS", 1)
+    monkeypatch.setattr(settings, "INFERENCE_QUEUE_SIZE", 0)
+    yield
+    shutdown_executor()
+
+
+def test_cancelled_request_keeps_its_slot_until_the_job_ends(single_slot_executor):
+    release = threading.Event()
+
+    async def scenario():
+        waiting = asyncio.create_task(run_inference(release.wait, 10))
+        await asyncio.sleep(0.05)
+        assert executor_stats()["in_flight"] == 1
+
+        # The client goes away: the request stops waiting, the job keeps running
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert executor_stats()["in_flight"] == 1
+        with pytest.raises(InferenceQueueFull):
+            await run_inference(sum, [1, 2])
+
+        release.set()
+        for _ in range(100):
+            if executor_stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor_stats()["in_flight"] == 0
+        assert await run_inference(sum, [1, 2]) == 3
+
+    asyncio.run(scenario())
+
+
+def test_failed_job_frees_its_slot(single_slot_executor):
+    async def scenario():
+        with pytest.raises(ZeroDivisionError):
+            await run_inference(divmod, 1, 0)
+        assert executor_stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+    assert inference_executor._in_flight == 0
+
+
+def test_executor_is_sized_by_the_server_processes_actually_running(monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_WORKERS", 0)
+    monkeypatch.setattr(inference_executor.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "WORKERS", 4)
+    monkeypatch.delitem(sys.modules, "gunicorn", raising=False)
+    assert inference_executor.inference_workers() == 2
+
+    # Under gunicorn (the Dockerfile), one worker by default gets every CPU
+    monkeypatch.setitem(sys.modules, "gunicorn", object())
+    assert settings.GUNICORN_WORKERS == 1
+    assert inference_executor.inference_workers() == 8
+
+
+@pytest.mark.parametrize("path", [
+    "/admin/models/heart_disease/reload",
+    "/admin/models/heart_disease/activate/1",
+    "/admin/models/heart_disease/shadow/1",
+    "/admin/models/heart_disease/canary/1",
+])
+def test_process_pool_refuses_version_changes(client, monkeypatch, path):
+    # Pool processes score with the models they loaded at start and would never see the change
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(settings, "INFERENCE_EXECUTOR", "process")
+    active = registry.active("heart_disease")
+
+    response = client.post(path, headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 409
+    assert "INFERENCE_EXECUTOR" in response.json()["detail"]
+    assert registry.active("heart_disease") is active
+    assert canary_serving() is False
+    assert "heart_disease" not in candidate_stats()
@@ -0,0 +1,165 @@
+"""Background jobs: resuming after a restart and cancellation"""
+import asyncio
+import json
+import threading
+
+import pytest
+
+from utils.inference_executor import shutdown_executor
+from utils.jobs import CANCELLED, COMPLETED, QUEUED, RUNNING, JobManager, JobScorer
+
+CHUNK_SIZE = 10
+
+
+class Upload:
+    """The parts of a Request that JobManager.create_job reads"""
+
+    def __init__(self, body: bytes, content_type: str = "application/x-ndjson"):
+        self.headers = {"content-type": content_type}
+        self.body = body
+
+    async def stream(self):
+        yield self.body
+
+
+class Scorer:
+    """Doubles "x"; records at or past block_from wait until release is set"""
+
+    def __init__(self, block_from: int = None):
+        self.block_from = block_from
+        self.release = threading.Event()
+        self.scored = []
+
+    async def require_model(self):
+        pass
+
+    def validate_record(self, record):
+        return record
+
+    def score_records(self, records):
+        if self.block_from is not None and records[-1]["x"] >= self.block_from:
+            self.release.wait(10)
+        self.scored.extend(record["x"] for record in records)
+        return [{"value": 2 * record["x"]} for record in records]
+
+    def job_scorer(self) -> JobScorer:
+        return JobScorer(self.require_model, self.validate_record, self.score_records)
+
+
+def ndjson(n: int) -> bytes:
+    return b"".join(json.dumps({"x": i}).encode() + b"\n" for i in range(n))
+
+
+@pytest.fixture(autouse=True)
+def fresh_executor():
+    shutdown_executor()
+    yield
+    shutdown_executor()
+
+
+async def wait_for(manager: JobManager, job_id: str, condition, timeout: float = 10):
+    for _ in range(int(timeout / 0.01)):
+        manifest = manager.read_manifest(job_id)
+        if condition(manifest):
+            return manifest
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} stuck at {manager.read_manifest(job_id)}")
+
+
+def test_job_resumes_after_restart_from_its_last_chunk(tmp_path):
+    first = Scorer(block_from=2 * CHUNK_SIZE)
+    second = Scorer()
+
+    async def scenario():
+        manager = JobManager(str(tmp_path), {"model": first.job_scorer()}, 1, CHUNK_SIZE)
+        await manager.start()
+        job_id = (await manager.create_job("model", Upload(ndjson(5 * CHUNK_SIZE))))["id"]
+        await wait_for(manager, job_id, lambda manifest: manifest["chunks_done"] == 2)
+
+        # Shut down while the third chunk is scoring
+        await manager.stop()
+        first.release.set()
+        manifest = manager.read_manifest(job_id)
+        assert manifest["status"] == RUNNING
+        assert manifest["records_done"] == 2 * CHUNK_SIZE
+
+        restarted = JobManager(str(tmp_path), {"model": second.job_scorer()}, 1, CHUNK_SIZE)
+        await restarted.start()
+        manifest = await wait_for(restarted, job_id, lambda manifest: manifest["status"] == COMPLETED)
+        await restarted.stop()
+        return restarted, manifest
+
+    manager, manifest = asyncio.run(scenario())
+    # Only the chunks not finished before the restart were scored again
+    assert second.scored == list(range(2 * CHUNK_SIZE, 5 * CHUNK_SIZE))
+    assert manifest["records_done"] == manifest["succeeded"] == 5 * CHUNK_SIZE
+    with open(manager.results_path(manifest["id"])) as f:
+        results = [json.loads(line) for line in f]
+    assert results == [{"index": i, "success": True, "value": 2 * i} for i in range(5 * CHUNK_SIZE)]
+
+
+def test_running_job_stops_after_its_current_chunk(tmp_path):
+    scorer = Scorer(block_from=0)
+
+    async def scenario():
+        manager = JobManager(str(tmp_path), {"model": scorer.job_scorer()}, 1, CHUNK_SIZE)
+        await manager.start()
+        job_id = (await manager.create_job("model", Upload(ndjson(3 * CHUNK_SIZE))))["id"]
+        await wait_for(manager, job_id, lambda manifest: manifest["status"] == RUNNING)
+
+        assert manager.cancel_job(job_id)["status"] == RUNNING
+        assert manager.job_status(job_id)["cancel_requested"]
+        scorer.release.set()
+        manifest = await wait_for(manager, job_id, lambda manifest: manifest["status"] == CANCELLED)
+        await manager.stop()
+        return manager, manifest
+
+    manager, manifest = asyncio.run(scenario())
+    assert manifest["chunks_done"] == 1
+    assert scorer.scored == list(range(CHUNK_SIZE))
+    assert not manager.job_status(manifest["id"])["results_available"]
+
+
+def test_cancelled_queued_job_is_not_resumed(tmp_path):
+    scorer = Scorer()
+
+    async def scenario():
+        # Not started yet, so the job stays queued
+        manager = JobManager(str(tmp_path), {"model": scorer.job_scorer()}, 1, CHUNK_SIZE)
+        manifest = await manager.create_job("model", Upload(b"x\n1\n2\n", content_type="text/csv"))
+        assert manifest["status"] == QUEUED
+        assert manager.cancel_job(manifest["id"])["status"] == CANCELLED
+
+        await manager.start()
+        await asyncio.sleep(0.1)
+        await manager.stop()
+        return manager.read_manifest(manifest["id"])
+
+    manifest = asyncio.run(scenario())
+    assert manifest["status"] == CANCELLED
+    assert manifest["records_done"] == 0
+    assert scorer.scored == []
+
+
+def test_job_files_are_written_off_the_event_loop(monkeypatch, tmp_path):
+    writer_threads = []
+    for name in ("_write_manifest", "_write_chunk"):
+        write = getattr(JobManager, name)
+
+        def recording(self, *args, write=write):
+            writer_threads.append(threading.get_ident())
+            return write(self, *args)
+
+        monkeypatch.setattr(JobManager, name, recording)
+
+    async def scenario():
+        manager = JobManager(str(tmp_path), {"model": Scorer().job_scorer()}, 1, CHUNK_SIZE)
+        await manager.start()
+        job_id = (await manager.create_job("model", Upload(ndjson(3 * CHUNK_SIZE))))["id"]
+        await wait_for(manager, job_id, lambda manifest: manifest["status"] == COMPLETED)
+        await manager.stop()
+
+    asyncio.run(scenario())
+    # Creation, start, three chunks with their checkpoints and the final manifest
+    assert len(writer_threads) == 9
+    assert threading.get_ident() not in writer_threads
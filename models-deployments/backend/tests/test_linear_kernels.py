@@ -0,0 +1,68 @@
+"""The native linear kernels against sklearn, on every row of the bundled datasets"""
+import numpy as np
+import pandas as pd
+import pytest
+from pydantic import ValidationError
+from sklearn.linear_model import LogisticRegression
+
+from api.machine_learning.medical_charge import build_features, validate_record
+from conftest import HEART_CSV, MEDICAL_CSV, read_records
+from utils.linear_kernels import LinearKernel, compile_linear_kernel
+from utils.model_loader import models
+
+
+@pytest.fixture(scope="module")
+def store(client):
+    return models.snapshot()
+
+
+def sklearn_input(estimator, X: np.ndarray):
+    if hasattr(estimator, "feature_names_in_"):
+        return pd.DataFrame(X, columns=estimator.feature_names_in_)
+    return X
+
+
+@pytest.mark.parametrize("group", ["smoker", "non_smoker"])
+def test_medical_charge_kernels_match_sklearn(store, group):
+    estimator, kernel = getattr(store, f"{group}_model"), getattr(store, f"{group}_kernel")
+    assert kernel is not None
+    # Every row the request model accepts (a few BMIs in the dataset are above its bound of 50)
+    requests = []
+    for record in read_records(MEDICAL_CSV):
+        try:
+            requests.append(validate_record(record))
+        except ValidationError:
+            pass
+    X = build_features(requests)
+
+    expected = estimator.predict(sklearn_input(estimator, X))
+    np.testing.assert_allclose(kernel.predict(X), expected, rtol=1e-9, atol=1e-9)
+    # One row at a time gives the same answers as the whole matrix
+    np.testing.assert_allclose(np.concatenate([kernel.predict(row) for row in X[:50]]), expected[:50], rtol=1e-12)
+
+
+def test_heart_disease_kernel_matches_sklearn(store):
+    estimator, kernel = store.heart_disease_model["model"], store.heart_disease_kernel
+    assert kernel is not None
+    # Every row with all its numeric values (the bundle's imputer only fills categories)
+    numeric_cols = store.heart_disease_model["numeric_cols"]
+    records = [record for record in read_records(HEART_CSV) if all(record[col] is not None for col in numeric_cols)]
+    X = store.heart_disease_transformer.transform_batch(records)
+
+    sklearn_X = sklearn_input(estimator, X)
+    np.testing.assert_array_equal(kernel.predict(X), estimator.predict(sklearn_X))
+    np.testing.assert_allclose(kernel.predict_proba(X), estimator.predict_proba(sklearn_X), rtol=1e-9, atol=1e-12)
+
+
+def test_kernel_rejects_bad_input():
+    kernel = LinearKernel(np.array([[1.0, 2.0]]), np.array([0.5]), np.array([0, 1]))
+    with pytest.raises(ValueError):
+        kernel.predict(np.array([[1.0, 2.0, 3.0]]))
+    with pytest.raises(ValueError):
+        kernel.predict(np.array([[np.nan, 1.0]]))
+
+
+def test_unsupported_estimator_keeps_sklearn():
+    rng = np.random.default_rng(0)
+    multiclass = LogisticRegression().fit(rng.normal(size=(60, 3)), np.arange(60) % 3)
+    assert compile_linear_kernel(multiclass, "multiclass") is None
@@ -0,0 +1,117 @@
+"""Log formatting, and logging through the queue and writer thread in the server process and forked children"""
+import logging
+import math
+import os
+import sys
+import time
+import uuid
+
+import pytest
+
+from config.logging_config import FastJSONFormatter, JSONFormatter, logger, logging_stats
+
+EXTRAS = [
+    {},
+    {"request_id": "1f-ab12cd34-7", "status_code": 200, "duration_ms": 12.34},
+    {"client_ip": "127.0.0.1", "flag": True, "missing": None, "items": [1, "two", 3.0], "nested": {"a": [None]}},
+    {"ratio": math.nan, "high": math.inf, "low": -math.inf, "big": 2 ** 70, "tiny": 1e-7, "large": 1e16},
+    {"příjmení": "Dvořák", "emoji": "✓ ☃", "escapes": "quote \" backslash \\ newline \n \u0001"},
+    # An extra named like a fixed field replaces its value in place
+    {"module": "overridden", "timestamp": "custom"},
+]
+
+TIMESTAMPS = [
+    1700000000.0,
+    1700000000.5,
+    1700000000.123456,
+    1700000000.9999994,
+    1700000000.9999996,
+    1700000059.9999999,
+    1700000000.0000004,
+    1700000000.0000006,
+    0.000001,
+    time.time(),
+]
+
+
+def make_record(message: str = "Request completed", created: float = 1700000000.25, exc_info=None, **extra):
+    record = logging.LogRecord("app.requests", logging.INFO, "/app/utils/request_middleware.py", 42, message, None, exc_info)
+    record.created = created
+    record.__dict__.update(extra)
+    return record
+
+
+def assert_same_output(record: logging.LogRecord):
+    # Formatting caches exception text on the record, so each formatter gets the record as it came
+    expected = JSONFormatter().format(logging.makeLogRecord(dict(record.__dict__)))
+    assert FastJSONFormatter().format(logging.makeLogRecord(dict(record.__dict__))) == expected
+
+
+@pytest.mark.parametrize("extra", EXTRAS)
+def test_fast_formatter_matches_json_formatter_on_extras(extra):
+    assert_same_output(make_record(**extra))
+
+
+@pytest.mark.parametrize("message", ["plain", "žluťoučký kůň ✓ 日本語", "quote \" tab \t \x7f \ud83d", ""])
+def test_fast_formatter_matches_json_formatter_on_text(message):
+    assert_same_output(make_record(message))
+
+
+@pytest.mark.parametrize("created", TIMESTAMPS)
+def test_fast_formatter_rounds_timestamps_like_datetime(created):
+    assert_same_output(make_record(created=created))
+    # The per-second cache must not leak into the next record
+    formatter = FastJSONFormatter()
+    for value in (created, created + 0.4, created + 1.0000004):
+        expected = JSONFormatter().format(make_record(created=value))
+        assert formatter.format(make_record(created=value)) == expected
+
+
+def test_fast_formatter_matches_json_formatter_on_exceptions():
+    try:
+        raise ValueError("nelze načíst model ✗")
+    except ValueError:
+        exc_info = sys.exc_info()
+    assert_same_output(make_record("Prediction failed", exc_info=exc_info, request_id="7-abc"))
+
+
+def read_log(path: str = "logs/app.log") -> str:
+    with open(path) as f:
+        return f.read()
+
+
+def wait_for_line(text: str, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if text in read_log():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_records_reach_the_log_file():
+    message = f"written {uuid.uuid4().hex}"
+    logger.info(message)
+    assert wait_for_line(message)
+
+
+def test_forked_child_writes_its_records():
+    # As a gunicorn worker forked from a preloading master, or a process-pool inference worker
+    message = f"from a forked child {uuid.uuid4().hex}"
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            logger.info(message)
+            status = 0 if wait_for_line(message) and logging_stats()["queued"] == 0 else 1
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert read_log().count(message) == 1
+
+    # The parent's writer thread still runs
+    message = f"parent after fork {uuid.uuid4().hex}"
+    logger.info(message)
+    assert wait_for_line(message)
@@ -0,0 +1,156 @@
+"""The /metrics exposition: text format, per-thread counts and bounded route labels"""
+import re
+import threading
+
+from utils.metrics import CONTENT_TYPE, Counter, Histogram, MetricsRegistry, PerThreadCells, model_metrics
+
+# One line of the Prometheus text format, version 0.0.4
+SAMPLE = re.compile(
+    r'^(?P<name>[a-zA-Z_:][a-zA-Z0-9_:]*)'
+    r'(?:\{(?P<labels>[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*"'
+    r'(?:,[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*")*)\})?'
+    r' (?P<value>[-+]?(?:[0-9.]+(?:e[-+]?[0-9]+)?|Inf|NaN))$'
+)
+HEADER = re.compile(r"^# (?:HELP [a-zA-Z_:][a-zA-Z0-9_:]* .*|TYPE [a-zA-Z_:][a-zA-Z0-9_:]* (?:counter|gauge|histogram))$")
+
+
+def samples(text: str, name: str):
+    """(labels, value) of every sample of a metric"""
+    found = {}
+    for line in text.splitlines():
+        match = SAMPLE.match(line)
+        if match and match["name"] == name:
+            found[match["labels"]] = float(match["value"])
+    return found
+
+
+def in_threads(n: int, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_rendered_text_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests by path", ("path",))
+    latency = registry.histogram("latency_seconds", "Latency", (), buckets=(0.1, 1.0))
+    registry.callback("queue_depth", "Queued jobs", "gauge", (), lambda: {(): 3})
+
+    requests.labels('/a "quoted"\\path\n').inc()
+    requests.labels("/b").inc(2.5)
+    for value in (0.05, 0.5, 0.5, 7.0):
+        latency.labels().observe(value)
+
+    assert registry.render() == "\n".join([
+        "# HELP requests_total Requests by path",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a \\"quoted\\"\\\\path\\n"} 1',
+        'requests_total{path="/b"} 2.5',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 8.05",
+        "latency_seconds_count 4",
+        "# HELP queue_depth Queued jobs",
+        "# TYPE queue_depth gauge",
+        "queue_depth 3",
+    ]) + "\n"
+
+
+def test_failing_callback_does_not_break_the_scrape():
+    registry = MetricsRegistry()
+    registry.callback("broken", "Raises", "gauge", (), lambda: 1 / 0)
+    registry.counter("ok_total", "Fine").labels().inc()
+    assert registry.render().splitlines()[-3:] == [
+        "# HELP ok_total Fine", "# TYPE ok_total counter", "ok_total 1",
+    ]
+
+
+def test_metrics_endpoint_is_valid_exposition_text(client):
+    client.post("/heart-disease/predict", json={})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == f"{CONTENT_TYPE}; charset=utf-8"
+
+    typed = set()
+    for line in response.text.splitlines():
+        if line.startswith("#"):
+            assert HEADER.match(line), line
+            if line.startswith("# TYPE "):
+                typed.add(line.split()[2])
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        # Every sample belongs to a family declared above it
+        name = match["name"]
+        assert name in typed or re.sub(r"_(bucket|sum|count)$", "", name) in typed, line
+
+
+def test_counts_from_many_threads_are_merged():
+    counter = Counter()
+    histogram = Histogram((1.0, 10.0))
+
+    def work():
+        for i in range(10_000):
+            counter.inc()
+            histogram.observe(i % 20)
+
+    in_threads(8, work)
+
+    assert counter.cells.totals() == [80_000]
+    assert len(counter.cells._cells) == 8
+    text = "\n".join(histogram.samples("h", (), ()))
+    # i % 20 is at most 1 twice, at most 10 eleven times in every 20 values
+    assert 'h_bucket{le="1"} 8000' in text
+    assert 'h_bucket{le="10"} 44000' in text
+    assert 'h_bucket{le="+Inf"} 80000' in text
+    assert "h_sum 760000" in text
+
+
+def test_cells_shared_by_several_metrics_stay_separate():
+    cells = PerThreadCells(2)
+    first, second = Counter(cells, 0), Counter(cells, 1)
+
+    def work():
+        for _ in range(1000):
+            first.inc()
+            second.inc(2)
+
+    in_threads(4, work)
+    assert cells.totals() == [4000, 8000]
+
+
+def test_model_stage_metrics_from_many_threads(client):
+    recorder = model_metrics("threads_test")
+
+    def work():
+        for _ in range(1000):
+            # 1 ms preprocessing, 2 ms predict, 3 ms format, 4 records
+            recorder.observe_scoring(4, 0, 1_000_000, 3_000_000, 6_000_000)
+
+    in_threads(4, work)
+    text = client.get("/metrics").text
+
+    counts = samples(text, "model_stage_duration_seconds_count")
+    sums = samples(text, "model_stage_duration_seconds_sum")
+    for stage, seconds in (("preprocess", 0.001), ("predict", 0.002), ("format", 0.003)):
+        labels = f'model="threads_test",stage="{stage}"'
+        assert counts[labels] == 4000
+        assert abs(sums[labels] - 4000 * seconds) < 1e-9
+    assert counts['model="threads_test",stage="validation"'] == 0
+    assert samples(text, "model_batch_size_records_sum")['model="threads_test"'] == 16000
+
+
+def test_route_labels_are_templates_not_paths(client):
+    for job_id in ("0" * 32, "1" * 32, "f" * 32):
+        assert client.get(f"/jobs/{job_id}").status_code == 404
+    client.get("/no/such/path")
+
+    requests = samples(client.get("/metrics").text, "http_requests_total")
+    assert requests['route="/jobs/{job_id}",method="GET",status="404"'] >= 3
+    assert requests['route="unmatched",method="GET",status="404"'] >= 1
+    assert not any("0" * 32 in labels or "/no/such/path" in labels for labels in requests)
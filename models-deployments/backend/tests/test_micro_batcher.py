@@ -0,0 +1,109 @@
+"""Coalescing concurrent single-record predictions"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from utils.micro_batcher import MicroBatcher
+
+
+class Scorer:
+    """Doubles "x" and records every batch; "fail" records make the whole batch raise"""
+
+    def __init__(self, error: Exception = None):
+        self.batches = []
+        self.error = error
+
+    def __call__(self, records):
+        self.batches.append([record["x"] for record in records])
+        if self.error is not None:
+            raise self.error
+        if any(record.get("fail") for record in records):
+            raise ValueError("bad record")
+        return [{"value": 2 * record["x"]} for record in records]
+
+
+async def submit_all(batcher: MicroBatcher, records):
+    return await asyncio.gather(*(batcher.submit(record) for record in records), return_exceptions=True)
+
+
+def test_full_batch_is_flushed_without_waiting():
+    scorer = Scorer()
+    # A wait no test would sit through: only the size can flush the batch
+    batcher = MicroBatcher("test", scorer, max_batch_size=4, max_wait_ms=60_000)
+
+    results = asyncio.run(asyncio.wait_for(submit_all(batcher, [{"x": i} for i in range(8)]), 5))
+
+    assert results == [{"value": 2 * i} for i in range(8)]
+    assert scorer.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert (batcher.size_flushes, batcher.timeout_flushes) == (2, 0)
+
+
+def test_partial_batch_is_flushed_after_the_wait():
+    scorer = Scorer()
+    batcher = MicroBatcher("test", scorer, max_batch_size=32, max_wait_ms=20)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await submit_all(batcher, [{"x": i} for i in range(3)])
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == [{"value": 0}, {"value": 2}, {"value": 4}]
+    assert scorer.batches == [[0, 1, 2]]
+    assert elapsed >= 0.02
+    assert (batcher.size_flushes, batcher.timeout_flushes) == (0, 1)
+    assert batcher.stats()["avg_batch_size"] == 3
+
+
+def test_results_reach_their_callers_in_order():
+    scorer = Scorer()
+    batcher = MicroBatcher("test", scorer, max_batch_size=5, max_wait_ms=5)
+
+    async def caller(i):
+        # Staggered arrivals spread the callers over several batches
+        await asyncio.sleep((i % 3) / 1000)
+        return i, await batcher.submit({"x": i})
+
+    async def scenario():
+        return await asyncio.gather(*(caller(i) for i in range(23)))
+
+    for i, result in asyncio.run(scenario()):
+        assert result == {"value": 2 * i}
+    assert sorted(x for batch in scorer.batches for x in batch) == list(range(23))
+
+
+def test_failed_batch_falls_back_to_single_records():
+    scorer = Scorer()
+    batcher = MicroBatcher("test", scorer, max_batch_size=3, max_wait_ms=60_000)
+    records = [{"x": 0}, {"x": 1, "fail": True}, {"x": 2}]
+
+    results = asyncio.run(submit_all(batcher, records))
+
+    assert results[0] == {"value": 0}
+    assert isinstance(results[1], ValueError)
+    assert results[2] == {"value": 4}
+    assert scorer.batches[0] == [0, 1, 2]
+    assert sorted(scorer.batches[1:]) == [[0], [1], [2]]
+    assert batcher.fallbacks == 1
+
+
+def test_http_exception_reaches_every_caller_without_fallback():
+    error = HTTPException(status_code=503, detail="Inference queue is full")
+    scorer = Scorer(error)
+    batcher = MicroBatcher("test", scorer, max_batch_size=3, max_wait_ms=60_000)
+
+    results = asyncio.run(submit_all(batcher, [{"x": i} for i in range(3)]))
+
+    assert results == [error, error, error]
+    assert scorer.batches == [[0, 1, 2]]
+    assert batcher.fallbacks == 0
+
+
+@pytest.mark.parametrize("max_batch_size", [0, 1])
+def test_batch_of_one_is_scored_at_once(max_batch_size):
+    scorer = Scorer()
+    batcher = MicroBatcher("test", scorer, max_batch_size=max_batch_size, max_wait_ms=60_000)
+    assert asyncio.run(asyncio.wait_for(batcher.submit({"x": 5}), 5)) == {"value": 10}
+    assert scorer.batches == [[5]]
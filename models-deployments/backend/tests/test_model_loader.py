@@ -0,0 +1,121 @@
+"""Model loading: retrying failed loads, and hot swaps of changed model files"""
+import asyncio
+import hashlib
+import os
+
+import joblib
+import pytest
+
+from api.admin import validate_version
+from config.settings import settings
+from conftest import HEART_CSV, read_records
+from utils import model_loader
+from utils.model_loader import FAILED, LOADED, load_models, models, registry, reload_model, submit_model_load
+from utils.model_registry import REJECTED, STANDBY
+
+
+@pytest.fixture
+def flaky_loader(monkeypatch):
+    """A model whose first load fails and whose later loads succeed"""
+    calls = []
+
+    def load_model(name):
+        calls.append(name)
+        loaded = len(calls) > 1
+        models.load_state[name] = LOADED if loaded else FAILED
+        return loaded
+
+    monkeypatch.setattr(model_loader, "load_model", load_model)
+    monkeypatch.setattr(model_loader, "_load_futures", {})
+    monkeypatch.setitem(models.load_state, "flaky", None)
+    return calls
+
+
+def test_failed_load_is_retried_by_the_next_request(flaky_loader):
+    assert submit_model_load("flaky").result() is False
+    assert "flaky" not in model_loader._load_futures
+
+    assert asyncio.run(load_models("flaky")) is True
+    assert models.load_state["flaky"] == LOADED
+    # A successful load is shared by later requests
+    assert submit_model_load("flaky") is model_loader._load_futures["flaky"]
+    assert flaky_loader == ["flaky", "flaky"]
+
+
+def test_load_that_raises_is_retried(monkeypatch, flaky_loader):
+    def broken(name):
+        flaky_loader.append(name)
+        raise OSError("artifact store unreachable")
+
+    monkeypatch.setattr(model_loader, "load_model", broken)
+    with pytest.raises(OSError):
+        submit_model_load("flaky").result()
+    assert "flaky" not in model_loader._load_futures
+
+
+@pytest.fixture
+def heart_model_file(client):
+    """Path of the heart disease model file, restored and reloaded after the test"""
+    path = os.path.join(settings.MODELS_DIR, "Heart_Disease_Predictor.joblib")
+    with open(path, "rb") as f:
+        original = f.read()
+    yield path
+    with open(path, "wb") as f:
+        f.write(original)
+    reload_model("heart_disease")
+    restored = registry.active("heart_disease").sha256
+    assert restored == {"Heart_Disease_Predictor.joblib": hashlib.sha256(original).hexdigest()}
+
+
+def write_retrained(path: str):
+    """Replace the model file with a version whose coefficients differ"""
+    bundle = joblib.load(path)
+    bundle["model"].coef_ = bundle["model"].coef_ * 1.5
+    joblib.dump(bundle, path)
+
+
+def test_unchanged_files_are_not_loaded_again(monkeypatch, heart_model_file):
+    active = registry.active("heart_disease")
+
+    def load_version(name, refresh=False):
+        raise AssertionError("unchanged files were loaded")
+
+    monkeypatch.setattr(model_loader, "load_version", load_version)
+    result = reload_model("heart_disease", validate_version)
+    assert result["changed"] is False
+    assert registry.active("heart_disease") is active
+
+
+def test_changed_file_is_hot_swapped(client, heart_model_file):
+    record = next(record for record in read_records(HEART_CSV, 50) if None not in record.values())
+    before = client.post("/heart-disease/predict", json=record).json()
+    previous = registry.active("heart_disease")
+
+    write_retrained(heart_model_file)
+    result = reload_model("heart_disease", validate_version)
+
+    assert result["changed"] is True
+    active = registry.active("heart_disease")
+    assert active.version == result["active"]["version"] > previous.version
+    assert models.heart_disease_model is active.artifacts["heart_disease_model"]
+    assert previous.status == STANDBY
+    after = client.post("/heart-disease/predict", json=record).json()
+    assert after["confidence"] != before["confidence"]
+
+
+def test_version_failing_validation_is_rolled_back(client, heart_model_file):
+    previous = registry.active("heart_disease")
+    serving = models.heart_disease_model
+
+    def reject(name, view):
+        raise ValueError("smoke test failed")
+
+    write_retrained(heart_model_file)
+    with pytest.raises(ValueError, match="smoke test failed"):
+        reload_model("heart_disease", reject)
+
+    assert registry.active("heart_disease") is previous
+    assert models.heart_disease_model is serving
+    rejected = max(registry.describe()["heart_disease"], key=lambda version: version["version"])
+    assert rejected["status"] == REJECTED
+    assert rejected["error"] == "smoke test failed"
@@ -0,0 +1,132 @@
+"""The prediction cache: expiry, eviction, model swaps and canary bypass"""
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from utils import micro_batcher, prediction_cache
+from utils.micro_batcher import score_one
+from utils.model_loader import models
+from utils.prediction_cache import PredictionCache, canonical_key
+
+
+class Clock:
+    """Stands in for the time module, so entries expire without sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def caching(monkeypatch):
+    """Caching on, with fresh caches"""
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "MICRO_BATCHING_ENABLED", False)
+    monkeypatch.setattr(prediction_cache, "caches", {})
+
+
+class Scorer:
+    def __init__(self, on_call=None):
+        self.calls = 0
+        self.on_call = on_call
+
+    def __call__(self, records):
+        self.calls += 1
+        if self.on_call is not None:
+            self.on_call()
+        return [{"value": record["x"] * 2} for record in records]
+
+
+def test_canonical_key_ignores_field_order():
+    assert canonical_key({"a": 1, "b": "x"}) == canonical_key({"b": "x", "a": 1})
+    assert canonical_key({"a": 1, "b": "x"}) != canonical_key({"a": 1, "b": "y"})
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = PredictionCache("test", max_entries=10, ttl_seconds=60)
+    cache.put("key", {"value": 1})
+
+    clock.now += 59.9
+    assert cache.get("key") == {"value": 1}
+    clock.now += 0.1
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PredictionCache("test", max_entries=2, ttl_seconds=60)
+    cache.put("a", {"value": 1})
+    cache.put("b", {"value": 2})
+    # Reading "a" makes "b" the least recently used
+    assert cache.get("a") == {"value": 1}
+    cache.put("c", {"value": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("c") == {"value": 3}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_model_swap_drops_every_entry(monkeypatch, client):
+    cache = PredictionCache("heart_disease", max_entries=10, ttl_seconds=60)
+    cache.put("key", {"value": 1})
+    assert cache.get("key") == {"value": 1}
+
+    monkeypatch.setattr(models, "heart_disease_model", object())
+    assert cache.get("key") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_result_computed_before_a_swap_is_not_stored(monkeypatch, client):
+    cache = PredictionCache("heart_disease", max_entries=10, ttl_seconds=60)
+    generation = cache.current_generation()
+
+    # A reload lands while the result is being computed
+    monkeypatch.setattr(models, "heart_disease_model", object())
+    cache.put("key", {"value": 1}, generation)
+    assert cache.get("key") is None
+
+    cache.put("key", {"value": 2}, cache.current_generation())
+    assert cache.get("key") == {"value": 2}
+
+
+def test_score_one_answers_repeats_from_the_cache(caching):
+    scorer = Scorer()
+    for _ in range(3):
+        assert asyncio.run(score_one("test", scorer, {"x": 4})) == {"value": 8}
+    assert scorer.calls == 1
+    assert prediction_cache.caches["test"].stats()["hits"] == 2
+
+
+def test_score_one_drops_a_result_scored_across_a_swap(monkeypatch, client, caching):
+    monkeypatch.setattr(models, "heart_disease_model", models.heart_disease_model)
+    scorer = Scorer(on_call=lambda: setattr(models, "heart_disease_model", object()))
+
+    asyncio.run(score_one("heart_disease", scorer, {"x": 4}))
+    assert prediction_cache.caches["heart_disease"].stats()["entries"] == 0
+    asyncio.run(score_one("heart_disease", scorer, {"x": 4}))
+    assert scorer.calls == 2
+
+
+def test_cache_is_bypassed_while_a_canary_runs(monkeypatch, caching):
+    scorer = Scorer()
+    asyncio.run(score_one("test", scorer, {"x": 4}))
+    stats = prediction_cache.caches["test"].stats()
+
+    monkeypatch.setattr(micro_batcher, "canary_serving", lambda: True)
+    for _ in range(3):
+        assert asyncio.run(score_one("test", scorer, {"x": 4})) == {"value": 8}
+    # Every repeat was scored, so the canary gets its share of them; the cache was not touched
+    assert scorer.calls == 4
+    assert prediction_cache.caches["test"].stats() == stats
@@ -0,0 +1,155 @@
+"""The rules RecordSchema compiles from a fitted pipeline"""
+import math
+
+import pandas as pd
+import pytest
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+from api.machine_learning import customer_churn, heart_disease
+from config.settings import settings
+from conftest import HEART_CSV, read_records
+from utils.batch import RecordValidationError
+from utils.model_loader import models
+from utils.record_schema import UNBOUNDED, compile_record_schema, training_ranges
+
+TRAINING = pd.DataFrame({
+    "tenure": [10.0, 15.0, 20.0],
+    "balance": [-50.0, 0.0, 50.0],
+    "plan": ["basic", "pro", "basic"],
+    "region": ["north", "south", "north"],
+})
+NUMERIC_COLS = ["tenure", "balance"]
+CATEGORICAL_COLS = ["plan", "region"]
+VALID = {"tenure": 12, "balance": -10.5, "plan": "pro", "region": "north"}
+
+
+@pytest.fixture(autouse=True)
+def range_margin(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEMA_RANGE_MARGIN", 1.0)
+
+
+def compile_schema(imputed_cols, require_all_keys: bool = False):
+    imputer = SimpleImputer(strategy="most_frequent").fit(TRAINING[imputed_cols])
+    scaler = MinMaxScaler().fit(TRAINING[NUMERIC_COLS])
+    encoder = OneHotEncoder(handle_unknown="ignore").fit(TRAINING[CATEGORICAL_COLS])
+    return compile_record_schema("test", NUMERIC_COLS, CATEGORICAL_COLS, [imputer], scaler, encoder, require_all_keys)
+
+
+@pytest.fixture
+def schema():
+    return compile_schema(["region"])
+
+
+def rejects(schema, record, message: str):
+    with pytest.raises(RecordValidationError, match=message):
+        schema.validate(record)
+
+
+def test_valid_record_is_returned_unchanged(schema):
+    assert schema.validate(VALID) is VALID
+    # Other keys are ignored
+    assert schema.validate({**VALID, "customer_id": "7590-VHVEG"})["customer_id"] == "7590-VHVEG"
+
+
+@pytest.mark.parametrize("value", [True, False, "12", "12.5", [12], {"value": 12}])
+def test_numeric_fields_reject_booleans_and_strings(schema, value):
+    rejects(schema, {**VALID, "tenure": value}, "Invalid numeric value for field: tenure")
+
+
+@pytest.mark.parametrize("value", [1, True, 1.5, "Pro", "enterprise"])
+def test_categorical_fields_accept_only_known_categories(schema, value):
+    rejects(schema, {**VALID, "plan": value}, "Invalid value for field plan")
+
+
+@pytest.mark.parametrize("value", [None, math.nan])
+def test_imputed_columns_may_be_null_or_nan(schema, value):
+    assert schema.validate({**VALID, "region": value})["region"] is value
+
+
+@pytest.mark.parametrize("value", [None, math.nan])
+def test_columns_without_an_imputer_are_required(schema, value):
+    rejects(schema, {**VALID, "plan": value}, "Missing required field: plan")
+    rejects(schema, {**VALID, "balance": value}, "Missing required field: balance")
+
+
+def test_imputed_numeric_columns_may_be_null():
+    schema = compile_schema(["tenure", "region"])
+    assert schema.validate({**VALID, "tenure": None})["tenure"] is None
+    assert math.isnan(schema.validate({**VALID, "tenure": math.nan})["tenure"])
+
+
+def test_missing_keys(schema):
+    # Absent keys count as null: fine for imputed columns unless every key is required
+    assert schema.validate({key: value for key, value in VALID.items() if key != "region"})
+    rejects(schema, {"plan": "pro", "region": "north"}, "Missing required field: tenure")
+
+    strict = compile_schema(["region"], require_all_keys=True)
+    rejects(strict, {key: value for key, value in VALID.items() if key != "region"}, r"Missing required fields: \['region'\]")
+
+
+@pytest.mark.parametrize("record", [{}, None, [VALID], "tenure=12"])
+def test_empty_or_non_dict_records(schema, record):
+    rejects(schema, record, "No data provided")
+
+
+def test_ranges_are_widened_by_the_margin(schema):
+    # tenure trained on 10..20 (never negative), balance on -50..50; margin 1.0 adds one span on each side
+    assert schema.describe()["numeric"]["tenure"] == {"min": 0.0, "max": 30.0, "nullable": False}
+    assert schema.describe()["numeric"]["balance"] == {"min": -150.0, "max": 150.0, "nullable": False}
+
+    for tenure, balance in ((0, -150), (30, 150), (0.0, 149.99)):
+        assert schema.validate({**VALID, "tenure": tenure, "balance": balance})
+    rejects(schema, {**VALID, "tenure": 30.001}, r"Value out of range for field tenure: 30.001 \(expected 0 to 30\)")
+    rejects(schema, {**VALID, "tenure": -1}, "Value out of range for field tenure")
+    rejects(schema, {**VALID, "balance": -150.5}, "Value out of range for field balance")
+
+
+def test_margin_setting():
+    scaler = MinMaxScaler().fit(TRAINING[NUMERIC_COLS])
+    assert training_ranges(scaler, NUMERIC_COLS, 0.5) == {"tenure": (5.0, 25.0), "balance": (-100.0, 100.0)}
+    assert training_ranges(scaler, NUMERIC_COLS, 0.0) == {"tenure": (10.0, 20.0), "balance": (-50.0, 50.0)}
+    # A negative margin turns range checks off, though infinity is still out of range
+    assert training_ranges(scaler, NUMERIC_COLS, -1) == {"tenure": UNBOUNDED, "balance": UNBOUNDED}
+
+
+def test_infinity_is_out_of_range_without_range_checks(monkeypatch):
+    monkeypatch.setattr(settings, "SCHEMA_RANGE_MARGIN", -1.0)
+    schema = compile_schema(["region"])
+    assert schema.validate({**VALID, "tenure": 1e300})
+    rejects(schema, {**VALID, "tenure": math.inf}, "Value out of range for field tenure")
+
+
+def test_bundle_that_does_not_fit_keeps_route_validation():
+    imputer = SimpleImputer(strategy="most_frequent").fit(TRAINING[["region"]])
+    scaler = MinMaxScaler().fit(TRAINING[NUMERIC_COLS])
+    encoder = OneHotEncoder().fit(TRAINING[["plan"]])
+    assert compile_record_schema("test", NUMERIC_COLS, CATEGORICAL_COLS, [imputer], scaler, encoder, False) is None
+
+
+def test_heart_schema_accepts_every_complete_training_row(client):
+    schema = models.heart_disease_schema
+    assert schema is not None
+    numeric_cols = models.heart_disease_model["numeric_cols"]
+    records = [record for record in read_records(HEART_CSV) if all(record[col] is not None for col in numeric_cols)]
+    assert records
+    for record in records:
+        schema.validate(record)
+
+
+@pytest.mark.parametrize("router, path", [
+    (heart_disease, "/heart-disease/predict"),
+    (customer_churn, "/customer-churn/prediction"),
+])
+def test_single_record_routes_score_the_validated_record(client, monkeypatch, router, path):
+    validated = {"validated": True}
+    scored = []
+
+    async def score_one(name, score_records, record):
+        scored.append(record)
+        return {"prediction": 0}
+
+    monkeypatch.setattr(router, "validate_record", lambda record: validated)
+    monkeypatch.setattr(router, "score_one", score_one)
+    assert client.post(path, json={"raw": True}).status_code == 200
+    assert scored == [validated]
@@ -0,0 +1,110 @@
+"""RequestLoggingMiddleware: response headers, unbuffered streaming and the request ID of failed requests"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import global_exception_handler
+from conftest import HEART_CSV
+from utils import request_middleware
+from utils.request_middleware import RequestLoggingMiddleware
+
+
+def assert_tracing_headers(response):
+    assert response.headers["x-request-id"].startswith(request_middleware._ID_PREFIX)
+    assert float(response.headers["x-process-time"]) >= 0
+
+
+@pytest.fixture(scope="module")
+def test_app():
+    """A small app with the middleware and the server's exception handler"""
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+    app.add_exception_handler(Exception, global_exception_handler)
+
+    @app.get("/ok")
+    async def ok():
+        return {"ok": True}
+
+    @app.get("/chunks")
+    async def chunks():
+        async def body():
+            for i in range(3):
+                yield f"chunk {i}\n".encode()
+        return StreamingResponse(body(), media_type="text/plain")
+
+    @app.get("/fail")
+    async def fail():
+        raise RuntimeError("scoring blew up")
+
+    return app
+
+
+def test_headers_on_a_normal_response(client):
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert_tracing_headers(response)
+
+
+def test_headers_on_a_streamed_response(client):
+    body = b"\n".join(HEART_CSV.read_bytes().splitlines()[:20])
+    response = client.post("/heart-disease/predict/stream", content=body, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 19
+    assert_tracing_headers(response)
+
+
+def test_every_request_gets_its_own_id(test_app):
+    with TestClient(test_app) as client:
+        ids = {client.get("/ok").headers["x-request-id"] for _ in range(5)}
+        streamed = client.get("/chunks")
+    assert len(ids) == 5
+    assert streamed.text == "chunk 0\nchunk 1\nchunk 2\n"
+    assert_tracing_headers(streamed)
+
+
+def test_streamed_body_is_passed_through_chunk_by_chunk():
+    # The app sends its second chunk only once the first has reached the server;
+    # a middleware buffering the body until the end would never let it through
+    first_chunk_sent = asyncio.Event()
+    messages = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"first", "more_body": True})
+        await asyncio.wait_for(first_chunk_sent.wait(), 2)
+        await send({"type": "http.response.body", "body": b"second", "more_body": False})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+        if message.get("body") == b"first":
+            first_chunk_sent.set()
+
+    scope = {"type": "http", "method": "GET", "path": "/chunks", "headers": [], "client": ("127.0.0.1", 1234)}
+    asyncio.run(RequestLoggingMiddleware(app)(scope, receive, send))
+
+    assert [message.get("body") for message in messages] == [None, b"first", b"second"]
+    headers = dict(messages[0]["headers"])
+    assert headers[b"x-request-id"].decode() == scope["state"]["request_id"]
+
+
+def test_request_id_reaches_the_exception_handler(test_app, monkeypatch):
+    ids = []
+    next_request_id = request_middleware.next_request_id
+
+    def recording():
+        ids.append(next_request_id())
+        return ids[-1]
+
+    monkeypatch.setattr(request_middleware, "next_request_id", recording)
+    with TestClient(test_app, raise_server_exceptions=False) as client:
+        response = client.get("/fail")
+
+    assert response.status_code == 500
+    assert response.json()["error"] == "Internal server error"
+    assert response.json()["request_id"] == ids[0]
@@ -0,0 +1,116 @@
+"""FAST_RESPONSES: the orjson-encoded responses are byte for byte what JSONResponse sends"""
+import math
+
+import numpy as np
+import pytest
+from fastapi.responses import JSONResponse
+
+from api.warmups import MODEL_WARMUPS
+from config.settings import settings
+from utils import responses
+from utils.responses import render_json
+
+# Single-record and batch endpoint of each model
+ENDPOINTS = {
+    "medical_charge": ("/medical-charge/predict", "/medical-charge/predict/batch"),
+    "heart_disease": ("/heart-disease/predict", "/heart-disease/predict/batch"),
+    "customer_churn": ("/customer-churn/prediction", "/customer-churn/predict/batch"),
+    "customer_uplift": ("/predict_uplift/predict", "/predict_uplift/predict/batch"),
+}
+
+CONTENT = [
+    {"a": 1, "b": [1.5, -0.0, 0.1 + 0.2, 1 / 3, 123456789.125], "c": None, "d": True},
+    {"small": 1e-05, "large": 1e16, "negative": -2.5e-7, "text": "1e5 is not a float"},
+    {"unicode": "žluťoučký kůň ✓", "escapes": "quote \" backslash \\ newline \n tab \t \u0001"},
+    {"huge": 2 ** 70, "negative": -(2 ** 63) - 1},
+    {1: "non-string key"},
+    [{"index": i, "value": round(i / 7, 4)} for i in range(100)],
+]
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    monkeypatch.setattr(settings, "FAST_RESPONSES", True)
+
+
+class NoFallback:
+    """Stands in for the json module of utils.responses, failing any body not encoded by orjson"""
+
+    @staticmethod
+    def dumps(*args, **kwargs):
+        raise AssertionError("the body was encoded by the json.dumps fallback")
+
+
+@pytest.fixture
+def orjson_only(fast, monkeypatch):
+    monkeypatch.setattr(responses, "json", NoFallback)
+
+
+def test_orjson_is_installed():
+    # A requirement: without it every response silently takes the slower json.dumps path
+    assert responses.orjson is not None
+
+
+def test_prediction_bodies_are_encoded_by_orjson(orjson_only):
+    content = {"prediction": 1, "probability": 0.8731, "risk_level": "High", "scores": np.round(np.array([0.1, 0.25]), 4)}
+    assert render_json(content) == b'{"prediction":1,"probability":0.8731,"risk_level":"High","scores":[0.1,0.25]}'
+
+
+@pytest.mark.parametrize("name", sorted(ENDPOINTS))
+def test_endpoints_answer_through_orjson(client, orjson_only, name):
+    single_path, batch_path = ENDPOINTS[name]
+    record = MODEL_WARMUPS[name].record
+    assert client.post(single_path, json=record).status_code == 200
+    assert client.post(batch_path, json={"records": [record] * 5}).status_code == 200
+
+
+@pytest.mark.parametrize("content", CONTENT)
+def test_render_json_matches_json_response(fast, content):
+    assert render_json(content) == JSONResponse(content).body
+
+
+def test_numpy_values_serialize_as_their_python_equivalents(fast):
+    content = {"scores": np.round(np.array([0.123456, 0.5]), 4), "label": np.int64(1), "p": np.float64(0.25)}
+    assert render_json(content) == JSONResponse({"scores": [0.1235, 0.5], "label": 1, "p": 0.25}).body
+
+
+@pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf, np.float64("nan")])
+@pytest.mark.parametrize("fast_responses", [True, False])
+def test_nan_and_infinity_are_refused_like_json_response(monkeypatch, value, fast_responses):
+    monkeypatch.setattr(settings, "FAST_RESPONSES", fast_responses)
+    with pytest.raises(ValueError):
+        JSONResponse({"value": value})
+    with pytest.raises(ValueError):
+        render_json({"value": value})
+
+
+def vary(record, i: int):
+    """The warmup record with its float fields scaled by up to 10%, so predictions differ"""
+    return {
+        key: value * (1 + (i % 11) / 100) if isinstance(value, float) else value
+        for key, value in record.items()
+    }
+
+
+def requests_to_send():
+    for name, (single_path, batch_path) in ENDPOINTS.items():
+        record = MODEL_WARMUPS[name].record
+        yield single_path, record
+        # An invalid record, so per-record error results are compared too
+        yield batch_path, {"records": [vary(record, i) for i in range(200)] + [{"invalid": True}]}
+        yield single_path, {"invalid": True}
+
+
+@pytest.mark.parametrize("path, body", list(requests_to_send()))
+def test_fast_responses_are_wire_compatible(client, monkeypatch, path, body):
+    # The prediction cache would answer the second request from the first
+    monkeypatch.setattr(settings, "PREDICTION_CACHE_ENABLED", False)
+    responses = []
+    for fast_responses in (False, True):
+        monkeypatch.setattr(settings, "FAST_RESPONSES", fast_responses)
+        responses.append(client.post(path, json=body))
+
+    slow, fast = responses
+    assert fast.status_code == slow.status_code
+    assert fast.headers["content-type"] == slow.headers["content-type"]
+    assert fast.content == slow.content
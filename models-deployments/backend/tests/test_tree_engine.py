@@ -0,0 +1,76 @@
+"""The compiled tree engine is bit-exact with sklearn's predict_proba"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.machine_learning.customer_churn import build_features
+from conftest import CHURN_CSV
+from utils.model_loader import models
+from utils.tree_engine import CompiledForest, parity_sample, sequential_proba
+
+
+@pytest.fixture(scope="module")
+def store(client):
+    return models.snapshot()
+
+
+def churn_rows() -> np.ndarray:
+    """Every row of the bundled Telco CSV, preprocessed as the /customer-churn router does"""
+    raw = pd.read_csv(CHURN_CSV)
+    raw["TotalCharges"] = pd.to_numeric(raw["TotalCharges"], errors="coerce")
+    records = raw.astype(object).where(raw.notna(), None).to_dict(orient="records")
+    return np.asarray(build_features(records), dtype=np.float64)
+
+
+def assert_bit_exact(forest, compiled: CompiledForest, X: np.ndarray):
+    expected = sequential_proba(forest, X)
+    actual = compiled.predict_proba(X)
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual, expected), f"{np.count_nonzero(actual != expected)} probabilities differ"
+
+
+def test_churn_forest_on_every_dataset_row(store):
+    forest = store.customer_churn_model["model"]
+    assert store.customer_churn_forest is not None
+    X = churn_rows()
+    assert len(X) == 7043
+    assert_bit_exact(forest, store.customer_churn_forest, X)
+    # And against sklearn's own entry point, as the router calls it
+    assert np.array_equal(
+        store.customer_churn_forest.predict_proba(X),
+        forest.predict_proba(pd.DataFrame(X, columns=forest.feature_names_in_)),
+    )
+
+
+@pytest.mark.parametrize("name", ["customer_churn", "uplift_treated", "uplift_control"])
+def test_rows_on_float32_thresholds(store, name):
+    forest = store.customer_churn_model["model"] if name == "customer_churn" else getattr(store, f"{name}_model")
+    compiled = CompiledForest.from_sklearn(forest)
+    # Every feature exactly on a split threshold or one float32 step above it
+    boundary = parity_sample(compiled, 4096)
+    assert_bit_exact(forest, compiled, boundary)
+
+    # Exactly on the thresholds only: these go left (feature <= threshold) in sklearn
+    slots = np.arange(0, len(compiled.children), 2)
+    thresholds = compiled.threshold[slots[compiled.children[slots] != slots]]
+    on_threshold = np.tile(thresholds[:, None], (1, compiled.n_features)).astype(np.float32)
+    assert_bit_exact(forest, compiled, on_threshold)
+
+
+@pytest.mark.parametrize("name", ["uplift_treated", "uplift_control"])
+def test_uplift_forests_on_synthetic_rows(store, name):
+    forest = getattr(store, f"{name}_model")
+    compiled = getattr(store, f"{name}_forest")
+    assert compiled is not None
+    X = np.random.default_rng(1).normal(0, 10, size=(20000, compiled.n_features))
+    assert_bit_exact(forest, compiled, X)
+
+
+def test_fused_uplift_scorer_matches_both_forests(store):
+    X = np.random.default_rng(2).normal(0, 10, size=(5000, 12))
+    p_treat, p_control, uplift = store.uplift_scorer.score(X)
+    expected_treat = sequential_proba(store.uplift_treated_model, X)[:, 1]
+    expected_control = sequential_proba(store.uplift_control_model, X)[:, 1]
+    assert np.array_equal(p_treat, expected_treat)
+    assert np.array_equal(p_control, expected_control)
+    assert np.array_equal(uplift, expected_treat - expected_control)
@@ -0,0 +1,322 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.logging_config import logger
+from config.settings import settings
+
+HASH_READ_SIZE = 1 << 20
+
+
+class ChecksumMismatch(ValueError):
+    """Raised when an artifact's SHA-256 differs from the expected one"""
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content-addressed local store for downloaded model files
+
+    Layout under the cache directory:
+        blobs/<sha256>         verified artifact contents, named by their hash
+        refs/<name>.json       the blob a model name resolves to, and its source URL
+        meta/<sha256>.json     size and last use of a blob, for LRU eviction
+        partial/<name>.part    an interrupted download, resumed with an HTTP Range request
+        locks/<name>.lock      serializes fetches of one name across threads and processes
+
+    A blob only appears through an atomic rename of a fully downloaded file
+    whose hash has been computed (and checked, when an expected hash is
+    configured), and every blob is re-hashed before it is handed out, so a
+    killed download or a damaged file is never loaded.
+    """
+
+    def __init__(self, root: str, max_bytes: int, chunk_size: int, retries: int, timeout: int, pool_size: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = max(8192, chunk_size)
+        self.retries = max(0, retries)
+        self.timeout = timeout
+        self.pool_size = max(1, pool_size)
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+        for sub in ("blobs", "refs", "meta", "partial", "locks"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    # ----- paths and metadata -----
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def blob_path(self, sha256: str) -> str:
+        return self._path("blobs", sha256)
+
+    def _read_json(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_json(self, path: str, data: Dict[str, Any]):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _touch(self, sha256: str):
+        """Record a blob's use for LRU eviction (the blob itself is never modified)"""
+        self._write_json(
+            self._path("meta", f"{sha256}.json"),
+            {"size": os.path.getsize(self.blob_path(sha256)), "last_used": time.time()},
+        )
+
+    @contextmanager
+    def _locked(self, name: str) -> Iterator[None]:
+        with open(self._path("locks", f"{name}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    @property
+    def session(self) -> requests.Session:
+        """Shared session so downloads reuse pooled keep-alive connections"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    # ----- public API -----
+
+    def fetch(
+        self, name: str, url: str, sha256: Optional[str] = None, local_path: Optional[str] = None, refresh: bool = False
+    ) -> str:
+        """
+        Return the path of a verified copy of a model file
+
+        Uses the cached blob for this name and URL (or for the expected hash)
+        when it passes verification; otherwise adopts a file already present
+        at local_path, and finally downloads from url. refresh ignores the
+        cached blob for the name (unless a hash is pinned) to pick up a new
+        version of the file.
+        """
+        sha256 = sha256.lower() if sha256 else None
+        with self._locked(name):
+            path = None if refresh and sha256 is None else self._resolve(name, url, sha256)
+            if path is None and local_path and os.path.exists(local_path):
+                path = self._adopt(name, url, local_path, sha256)
+            if path is None:
+                path = self._download(name, url, sha256)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete the least recently used unreferenced blobs beyond max_bytes"""
+        with self._locked(".evict"):
+            referenced = set()
+            for ref_name in os.listdir(self._path("refs")):
+                ref = self._read_json(self._path("refs", ref_name))
+                if ref:
+                    referenced.add(ref["sha256"])
+
+            blobs = []
+            for sha256 in os.listdir(self._path("blobs")):
+                meta = self._read_json(self._path("meta", f"{sha256}.json")) or {}
+                size = os.path.getsize(self.blob_path(sha256))
+                blobs.append((meta.get("last_used", 0.0), sha256, size))
+
+            total = sum(size for _, _, size in blobs)
+            for _, sha256, size in sorted(blobs):
+                if total <= self.max_bytes:
+                    break
+                if sha256 in referenced:
+                    continue
+                os.remove(self.blob_path(sha256))
+                try:
+                    os.remove(self._path("meta", f"{sha256}.json"))
+                except FileNotFoundError:
+                    pass
+                total -= size
+                logger.info(f"Evicted cached artifact {sha256[:12]} ({size} bytes)")
+
+    # ----- resolution -----
+
+    def _verified_blob(self, sha256: str) -> Optional[str]:
+        path = self.blob_path(sha256)
+        if not os.path.exists(path):
+            return None
+        actual = file_sha256(path)
+        if actual != sha256:
+            logger.error(f"Cached artifact {sha256[:12]} is corrupt (hash {actual[:12]}), discarding it")
+            os.remove(path)
+            return None
+        return path
+
+    def _resolve(self, name: str, url: str, sha256: Optional[str]) -> Optional[str]:
+        ref = self._read_json(self._path("refs", f"{name}.json"))
+        if sha256 is None and ref and ref["url"] == url:
+            sha256 = ref["sha256"]
+        if sha256 is None:
+            return None
+
+        path = self._verified_blob(sha256)
+        if path is not None:
+            if not ref or ref["sha256"] != sha256:
+                self._write_ref(name, url, sha256)
+            self._touch(sha256)
+            logger.info(f"Artifact {name} found in cache ({sha256[:12]})")
+        return path
+
+    def _write_ref(self, name: str, url: str, sha256: str):
+        self._write_json(
+            self._path("refs", f"{name}.json"),
+            {
+                "sha256": sha256,
+                "url": url,
+                "size": os.path.getsize(self.blob_path(sha256)),
+                "fetched_at": datetime.utcnow().isoformat(),
+            },
+        )
+
+    def _store(self, name: str, url: str, tmp_path: str, sha256: Optional[str]) -> str:
+        """Verify a complete file and move it into the blob store"""
+        actual = file_sha256(tmp_path)
+        if sha256 is not None and actual != sha256:
+            os.remove(tmp_path)
+            raise ChecksumMismatch(f"{name}: expected sha256 {sha256}, got {actual}")
+
+        path = self.blob_path(actual)
+        if os.path.exists(path) and file_sha256(path) == actual:
+            # Same content as a cached version: keep the existing blob (and its mappings)
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+        self._write_ref(name, url, actual)
+        self._touch(actual)
+        return path
+
+    def _adopt(self, name: str, url: str, local_path: str, sha256: Optional[str]) -> Optional[str]:
+        """Import a model file placed in MODELS_DIR by hand or by an older release"""
+        tmp_path = self._path("partial", f"{name}.adopt")
+        shutil.copyfile(local_path, tmp_path)
+        try:
+            path = self._store(name, url, tmp_path, sha256)
+        except ChecksumMismatch as e:
+            logger.warning(f"Ignoring {local_path}: {str(e)}")
+            return None
+        logger.info(f"Artifact {name} imported into cache from {local_path}")
+        return path
+
+    # ----- download -----
+
+    def _download(self, name: str, url: str, sha256: Optional[str]) -> str:
+        part_path = self._path("partial", f"{name}.part")
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                self._download_part(url, part_path)
+                break
+            except requests.RequestException as e:
+                if attempt == self.retries:
+                    raise
+                delay = min(2 ** attempt, 10)
+                logger.warning(
+                    f"Download of {name} interrupted ({str(e)}), resuming in {delay}s "
+                    f"(attempt {attempt + 2}/{self.retries + 1})"
+                )
+                time.sleep(delay)
+
+        path = self._store(name, url, part_path, sha256)
+        os.remove(f"{part_path}.json")
+        logger.info(
+            f"Artifact {name} downloaded: {os.path.getsize(path)} bytes "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+        return path
+
+    def _download_part(self, url: str, part_path: str):
+        """Download into part_path, continuing from whatever an earlier attempt left there"""
+        meta_path = f"{part_path}.json"
+        meta = self._read_json(meta_path)
+        if not meta or meta["url"] != url:
+            meta = {"url": url, "validator": None}
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            # If the file changed upstream the server answers 200 with the new content
+            if meta["validator"]:
+                headers["If-Range"] = meta["validator"]
+
+        with self.session.get(url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 416 and offset:
+                # Range starts past the end: the earlier attempt already got everything
+                return
+            response.raise_for_status()
+            if response.headers.get("Content-Type", "").startswith("text/html"):
+                # Google Drive serves its confirmation page instead of large files
+                raise ValueError(f"Got an HTML page instead of a model file from {url}")
+
+            resumed = response.status_code == 206
+            if not resumed:
+                offset = 0
+            meta["validator"] = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            self._write_json(meta_path, meta)
+            if resumed:
+                logger.info(f"Resuming download at byte {offset}")
+
+            expected = response.headers.get("Content-Length")
+            written = 0
+            with open(part_path, "ab" if resumed else "wb") as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        if expected is not None and written != int(expected):
+            raise requests.ConnectionError(f"Connection closed after {written} of {expected} bytes")
+
+
+_cache: Optional[ArtifactCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Return the shared artifact cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ArtifactCache(
+                    settings.ARTIFACT_CACHE_DIR,
+                    settings.ARTIFACT_CACHE_MAX_BYTES,
+                    settings.ARTIFACT_DOWNLOAD_CHUNK_SIZE,
+                    settings.ARTIFACT_DOWNLOAD_RETRIES,
+                    settings.ARTIFACT_DOWNLOAD_TIMEOUT,
+                    settings.MODEL_LOAD_WORKERS,
+                )
+    return _cache
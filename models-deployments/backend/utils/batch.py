@@ -0,0 +1,83 @@
+import time
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from utils.metrics import ModelMetrics
+
+
+class RecordValidationError(ValueError):
+    """Raised when a single record of a batch fails validation"""
+
+
+class BatchPredictionRequest(BaseModel):
+    records: List[Any] = Field(..., min_length=1, max_length=settings.BATCH_MAX_RECORDS)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "records": [{"...": "one object per record, same fields as /predict"}]
+            }
+        }
+
+
+def format_validation_error(exc: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into a single readable line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'record'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+def score_batch(
+    records: List[Any],
+    validate_record: Callable[[Any], Any],
+    predict_valid: Callable[[List[Any]], List[Dict[str, Any]]],
+    metrics: Optional[ModelMetrics] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Validate records one by one, then score all valid ones in a single call
+
+    Args:
+        records: Raw records in request order
+        validate_record: Returns the validated record or raises RecordValidationError
+        predict_valid: Vectorized scorer returning one result dict per valid record
+        metrics: The model's metrics, to time the validation stage
+
+    Returns:
+        One result per input record, in the same order
+    """
+    results: List[Dict[str, Any]] = [None] * len(records)
+    valid_indices = []
+    valid_records = []
+    start = time.perf_counter_ns()
+
+    for index, record in enumerate(records):
+        try:
+            valid_records.append(validate_record(record))
+            valid_indices.append(index)
+        except ValidationError as e:
+            results[index] = {"index": index, "success": False, "error": format_validation_error(e)}
+        except RecordValidationError as e:
+            results[index] = {"index": index, "success": False, "error": str(e)}
+
+    if metrics is not None:
+        metrics.observe("validation", start, time.perf_counter_ns())
+
+    if valid_records:
+        for index, prediction in zip(valid_indices, predict_valid(valid_records)):
+            results[index] = {"index": index, "success": True, **prediction}
+
+    return results
+
+
+def batch_response(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Wrap per-record results into the batch response body"""
+    succeeded = sum(1 for result in results if result["success"])
+    return {
+        "success": True,
+        "count": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
@@ -0,0 +1,357 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.logging_config import logger
+from config.settings import settings
+from utils.metrics import metrics
+from utils.model_loader import ModelStore, check_version, models, registry, version_artifacts
+from utils.model_registry import CANARY, SHADOW, STANDBY, ModelVersion
+
+# Latency samples kept per candidate for the percentiles
+LATENCY_WINDOW = 1024
+
+
+def flatten(result: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Nested prediction fields as one level of dotted keys"""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(primary: Dict[str, Any], candidate: Dict[str, Any], tolerance: float) -> Tuple[bool, Dict[str, float]]:
+    """
+    Whether two predictions agree, and the absolute difference of every float field
+
+    Labels, classes and decisions must match exactly; floats (probabilities,
+    charges) may differ by up to tolerance.
+    """
+    primary, candidate = flatten(primary), flatten(candidate)
+    agree = primary.keys() == candidate.keys()
+    diffs = {}
+    for key, value in primary.items():
+        other = candidate.get(key)
+        if isinstance(value, float) and isinstance(other, (int, float)):
+            diffs[key] = abs(value - other)
+            agree = agree and diffs[key] <= tolerance
+        else:
+            agree = agree and value == other
+    return agree, diffs
+
+
+def latency_summary(samples: "deque[float]") -> Dict[str, float]:
+    if not samples:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0}
+    values = np.fromiter(samples, dtype=float)
+    return {
+        "mean": round(float(values.mean()), 3),
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+    }
+
+
+class Candidate:
+    """A version scored next to (shadow) or instead of (canary) the active one, with its statistics"""
+
+    def __init__(self, version: ModelVersion, mode: str, percent: float, artifacts: Dict[str, Any]):
+        self.version = version
+        self.mode = mode
+        self.percent = percent
+        self.artifacts = artifacts
+        self.attached_at = time.time()
+        self._lock = threading.Lock()
+
+        # Metrics (latencies are per record, so batches of any size compare)
+        self.records = 0
+        self.primary_records = 0
+        self.dropped = 0
+        self.errors = 0
+        self.compared = 0
+        self.agreed = 0
+        self.abs_diff_sums: Dict[str, float] = {}
+        self.primary_latency: "deque[float]" = deque(maxlen=LATENCY_WINDOW)
+        self.candidate_latency: "deque[float]" = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def serving(self) -> bool:
+        """False once the version was activated, rejected or detached"""
+        return self.version.status == self.mode
+
+    def record_primary(self, count: int, elapsed_ms: float):
+        with self._lock:
+            self.primary_records += count
+            self.primary_latency.append(elapsed_ms / count)
+
+    def record_candidate(self, count: int, elapsed_ms: float):
+        with self._lock:
+            self.records += count
+            self.candidate_latency.append(elapsed_ms / count)
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def record_dropped(self, count: int):
+        with self._lock:
+            self.dropped += count
+
+    def record_comparison(self, primary_results: List[Dict[str, Any]], candidate_results: List[Dict[str, Any]]):
+        tolerance = settings.SHADOW_NUMERIC_TOLERANCE
+        with self._lock:
+            for primary, candidate in zip(primary_results, candidate_results):
+                agree, diffs = compare(primary, candidate, tolerance)
+                self.compared += 1
+                self.agreed += agree
+                for key, diff in diffs.items():
+                    self.abs_diff_sums[key] = self.abs_diff_sums.get(key, 0.0) + diff
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {
+                "version": self.version.version,
+                "mode": self.mode,
+                "status": self.version.status,
+                "attached_seconds": round(time.time() - self.attached_at, 1),
+                "records": self.records,
+                "primary_records": self.primary_records,
+                "errors": self.errors,
+                "latency_ms_per_record": {
+                    "primary": latency_summary(self.primary_latency),
+                    "candidate": latency_summary(self.candidate_latency),
+                },
+            }
+            if self.mode == CANARY:
+                stats["percent"] = self.percent
+            else:
+                stats["dropped"] = self.dropped
+                stats["compared"] = self.compared
+                stats["agreement_rate"] = round(self.agreed / self.compared, 4) if self.compared else None
+                stats["mean_abs_diff"] = {
+                    key: round(total / self.compared, 6) for key, total in self.abs_diff_sums.items()
+                }
+            return stats
+
+
+_candidates: Dict[str, Candidate] = {}
+_candidates_lock = threading.Lock()
+
+_shadow_pool: Optional[ThreadPoolExecutor] = None
+_shadow_in_flight = 0
+_shadow_lock = threading.Lock()
+
+
+def attach_candidate(
+    version: ModelVersion,
+    mode: str,
+    percent: float = 0.0,
+    validate: Optional[Callable[[str, ModelStore], Dict[str, Any]]] = None,
+) -> Candidate:
+    """Validate a loaded version and start serving it as the shadow or canary of its model"""
+    if mode not in (SHADOW, CANARY):
+        raise ValueError(f"Unknown candidate mode: {mode}")
+
+    with _candidates_lock:
+        artifacts = version_artifacts(version)
+        check_version(version, artifacts, validate)
+
+        previous = _candidates.get(version.name)
+        if previous is not None and previous.version is not version and previous.serving:
+            registry.set_status(previous.version, STANDBY)
+        registry.set_status(version, mode)
+        candidate = Candidate(version, mode, max(0.0, min(100.0, percent)), artifacts)
+        _candidates[version.name] = candidate
+
+    share = f" for {candidate.percent:g}% of records" if mode == CANARY else ""
+    logger.info(f"🧪 {version.name} v{version.version} attached as {mode}{share}")
+    return candidate
+
+
+def detach_candidate(name: str) -> Optional[Candidate]:
+    """Stop serving a model's candidate; its version stays loaded for a later activation"""
+    with _candidates_lock:
+        candidate = _candidates.pop(name, None)
+        if candidate is not None and candidate.serving:
+            registry.set_status(candidate.version, STANDBY)
+    if candidate is not None:
+        logger.info(f"{name} v{candidate.version.version} detached ({candidate.mode})")
+    return candidate
+
+
+def serving_candidates(names: Tuple[str, ...], mode: str) -> List[Candidate]:
+    candidates = []
+    for name in names:
+        candidate = _candidates.get(name)
+        if candidate is not None and candidate.mode == mode and candidate.serving:
+            candidates.append(candidate)
+    return candidates
+
+
+def canary_serving() -> bool:
+    """Whether any model currently sends part of its traffic to a canary version"""
+    return any(candidate.mode == CANARY and candidate.serving for candidate in list(_candidates.values()))
+
+
+def candidate_view(candidates: List[Candidate]) -> ModelStore:
+    """The current models with the candidates' versions swapped in"""
+    view = models.snapshot()
+    for candidate in candidates:
+        view.swap(candidate.artifacts)
+    return view
+
+
+def _timed(score_records: Callable, records: List[Any], store: ModelStore) -> Tuple[List[Dict[str, Any]], float]:
+    start = time.perf_counter()
+    results = score_records(records, store)
+    return results, (time.perf_counter() - start) * 1000
+
+
+def _score_with_canary(
+    candidates: List[Candidate], score_records: Callable, records: List[Any], primary: ModelStore
+) -> List[Dict[str, Any]]:
+    """Score a random percent of the records on the canary version, the rest on the active one"""
+    percent = candidates[0].percent
+    canary_indices = [i for i in range(len(records)) if random.random() * 100 < percent]
+    if not canary_indices:
+        results, elapsed_ms = _timed(score_records, records, primary)
+        for candidate in candidates:
+            candidate.record_primary(len(records), elapsed_ms)
+        return results
+
+    selected = set(canary_indices)
+    primary_indices = [i for i in range(len(records)) if i not in selected]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+
+    try:
+        canary_results, elapsed_ms = _timed(
+            score_records, [records[i] for i in canary_indices], candidate_view(candidates)
+        )
+        for candidate in candidates:
+            candidate.record_candidate(len(canary_indices), elapsed_ms)
+    except Exception as e:
+        # A failing canary must not fail requests: those records go to the active version
+        logger.warning(f"Canary scoring failed, using the active version: {str(e)}")
+        for candidate in candidates:
+            candidate.record_error()
+        primary_indices = list(range(len(records)))
+    else:
+        for i, result in zip(canary_indices, canary_results):
+            results[i] = result
+
+    if primary_indices:
+        primary_results, elapsed_ms = _timed(score_records, [records[i] for i in primary_indices], primary)
+        for candidate in candidates:
+            candidate.record_primary(len(primary_indices), elapsed_ms)
+        for i, result in zip(primary_indices, primary_results):
+            results[i] = result
+    return results
+
+
+def get_shadow_pool() -> ThreadPoolExecutor:
+    """Return the shadow scoring pool, creating it on first use"""
+    global _shadow_pool
+    if _shadow_pool is None:
+        with _shadow_lock:
+            if _shadow_pool is None:
+                _shadow_pool = ThreadPoolExecutor(
+                    max_workers=max(1, settings.SHADOW_WORKERS),
+                    thread_name_prefix="shadow",
+                )
+    return _shadow_pool
+
+
+def _run_shadow(
+    candidates: List[Candidate], score_records: Callable, records: List[Any], primary_results: List[Dict[str, Any]]
+):
+    global _shadow_in_flight
+    try:
+        shadow_results, elapsed_ms = _timed(score_records, records, candidate_view(candidates))
+        for candidate in candidates:
+            candidate.record_candidate(len(records), elapsed_ms)
+            candidate.record_comparison(primary_results, shadow_results)
+    except Exception as e:
+        logger.warning(f"Shadow scoring failed: {str(e)}")
+        for candidate in candidates:
+            candidate.record_error()
+    finally:
+        with _shadow_lock:
+            _shadow_in_flight -= 1
+
+
+def submit_shadow(
+    candidates: List[Candidate], score_records: Callable, records: List[Any], primary_results: List[Dict[str, Any]]
+):
+    """Queue shadow scoring of records already answered by the active version, dropping it when the queue is full"""
+    global _shadow_in_flight
+    pool = get_shadow_pool()
+    with _shadow_lock:
+        if _shadow_in_flight >= max(1, settings.SHADOW_WORKERS) + settings.SHADOW_QUEUE_SIZE:
+            for candidate in candidates:
+                candidate.record_dropped(len(records))
+            return
+        _shadow_in_flight += 1
+    pool.submit(_run_shadow, candidates, score_records, records, primary_results)
+
+
+def serve_candidates(*names: str):
+    """
+    Route a router's score_records through the shadow and canary versions of its models
+
+    Only live calls (no explicit store) are routed. Shadow scoring runs after
+    the response is computed, on the shadow pool, and never delays it.
+    """
+    def decorate(score_records: Callable[..., List[Dict[str, Any]]]):
+        @wraps(score_records)
+        def route(records: List[Any], store: Optional[ModelStore] = None) -> List[Dict[str, Any]]:
+            if store is not None or not _candidates or not records:
+                return score_records(records, store)
+
+            primary = models.snapshot()
+            canaries = serving_candidates(names, CANARY)
+            shadows = serving_candidates(names, SHADOW)
+            if canaries:
+                results = _score_with_canary(canaries, score_records, records, primary)
+            else:
+                results, elapsed_ms = _timed(score_records, records, primary)
+                for candidate in shadows:
+                    candidate.record_primary(len(records), elapsed_ms)
+
+            if shadows:
+                submit_shadow(shadows, score_records, records, results)
+            return results
+        return route
+    return decorate
+
+
+def candidate_stats() -> Dict[str, Dict[str, Any]]:
+    """Return agreement, traffic and latency statistics for every attached candidate"""
+    return {name: candidate.stats() for name, candidate in list(_candidates.items())}
+
+
+def shutdown_shadow_pool():
+    """Stop the shadow pool, dropping queued comparisons"""
+    global _shadow_pool, _shadow_in_flight
+    with _shadow_lock:
+        pool, _shadow_pool = _shadow_pool, None
+        _shadow_in_flight = 0
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+metrics.callback(
+    "shadow_queue_depth", "Shadow scoring batches running or waiting", "gauge", (),
+    lambda: {(): _shadow_in_flight},
+)
+metrics.callback(
+    "shadow_dropped_records_total", "Records not shadow-scored because the shadow queue was full", "counter",
+    ("model",), lambda: {(name,): candidate.dropped for name, candidate in list(_candidates.items())},
+)
@@ -0,0 +1,321 @@
+import math
+import numpy as np
+from numbers import Real
+from typing import Any, Dict, List, Optional
+
+from config.logging_config import logger
+from utils.helpers import process_churn_batch, process_input_batch
+
+
+class FeatureTransformer:
+    """
+    Compiled form of helpers.process_input_batch for one fitted pipeline
+
+    Holds the imputer fill values, the scaler's scale/offset vectors and a
+    "<column>_<category>" to output-index map (the names pd.get_dummies would
+    produce), and writes each record straight into a preallocated float64
+    row. Records whose values pandas would coerce or encode in other ways
+    (numeric strings, booleans, unexpected keys) make the whole batch go
+    through process_input_batch instead, so the output always matches it.
+    """
+
+    def __init__(self, imputer, scaler, encoder, numeric_cols: list, categorical_cols: list, encoded_cols: list):
+        if getattr(imputer, "add_indicator", False):
+            raise ValueError("Imputers with missing indicators are not supported")
+        if not _is_missing(imputer.missing_values):
+            raise ValueError("Only NaN missing_values are supported")
+        if list(scaler.feature_names_in_) != list(numeric_cols):
+            raise ValueError("Scaler columns do not match numeric_cols")
+
+        # Keep the original pipeline for the fallback path
+        self.pipeline = (imputer, scaler, encoder, numeric_cols, categorical_cols, encoded_cols)
+
+        self.numeric_cols = list(numeric_cols)
+        self.categorical_cols = list(categorical_cols)
+        self.feature_names = self.numeric_cols + list(encoded_cols)
+        self.n_features = len(self.feature_names)
+
+        self.fill_values = dict(zip(imputer.feature_names_in_, imputer.statistics_))
+        if any(_is_missing(value) for value in self.fill_values.values()):
+            raise ValueError("Imputer has columns without a fill value")
+
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self.offset = np.asarray(scaler.min_, dtype=np.float64)
+
+        n_numeric = len(self.numeric_cols)
+        self.category_index = {name: n_numeric + i for i, name in enumerate(encoded_cols)}
+        self.known_keys = set(self.numeric_cols) | set(self.categorical_cols) | set(self.fill_values)
+        self.reserved_keys = set(self.feature_names)
+        # Keys whose non-string values could still become an encoded column in a mixed batch
+        self.encoded_prefixes = {
+            name[:i] for name in encoded_cols for i, char in enumerate(name) if char == "_"
+        }
+
+    def _fill_row(self, record: Dict[str, Any], row: np.ndarray) -> bool:
+        """
+        Write one record into a zeroed output row (numeric columns unscaled)
+
+        Returns False when the record needs the pandas pipeline.
+        """
+        for i, col in enumerate(self.numeric_cols):
+            value = record.get(col, math.nan)
+            if col in self.fill_values and _is_missing(value):
+                # SimpleImputer only fills NaN; how a None survives depends on the batch dtypes
+                if value is None:
+                    return False
+                value = self.fill_values[col]
+            elif col not in record:
+                # pandas raises on a missing scaler column; let it report the error
+                return False
+            elif value is None:
+                value = math.nan
+            if not _is_number(value):
+                return False
+            row[i] = value
+
+        for col, value in record.items():
+            if col in self.reserved_keys and col not in self.known_keys:
+                return False
+            if col in self.numeric_cols:
+                continue
+            if _is_missing(value):
+                continue
+            if not isinstance(value, str):
+                if col in self.known_keys or col in self.encoded_prefixes:
+                    return False
+                continue
+            index = self.category_index.get(f"{col}_{value}")
+            if index is not None:
+                row[index] = 1.0
+
+        # Imputed categories for absent or NaN values (None is not imputed, and get_dummies skips it)
+        for col, fill in self.fill_values.items():
+            value = record.get(col, math.nan)
+            if col in self.numeric_cols or not (isinstance(value, float) and value != value):
+                continue
+            if not isinstance(fill, str):
+                return False
+            index = self.category_index.get(f"{col}_{fill}")
+            if index is not None:
+                row[index] = 1.0
+
+        return True
+
+    def transform_batch(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """Return the (n_records, n_features) float64 feature matrix"""
+        output = np.zeros((len(records), self.n_features))
+        for row, record in zip(output, records):
+            if not isinstance(record, dict) or not self._fill_row(record, row):
+                return process_input_batch(records, *self.pipeline).to_numpy(dtype=np.float64)
+
+        numeric = output[:, :len(self.numeric_cols)]
+        numeric *= self.scale
+        numeric += self.offset
+        return output
+
+    def transform(self, record: Dict[str, Any]) -> np.ndarray:
+        """Return the (1, n_features) float64 feature row for a single record"""
+        return self.transform_batch([record])
+
+
+def _is_missing(value: Any) -> bool:
+    """None or NaN, the values pandas and SimpleImputer treat as missing"""
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, Real) and not isinstance(value, bool)
+
+
+class OneHotFeatureBuilder:
+    """
+    Compiled form of helpers.process_churn_batch for one fitted pipeline
+
+    Each categorical column gets a lookup table from category to output
+    column, taken from the fitted OneHotEncoder, so records are written
+    straight into the final feature matrix. Unknown categories follow the
+    encoder's handle_unknown: all zeros for "ignore", the encoder's own error
+    otherwise. Values pandas/sklearn would coerce (numeric strings, booleans,
+    missing categories) send the whole batch through process_churn_batch.
+    """
+
+    def __init__(self, imputer_num, scaler, encoder, numerical_cols: list, categorical_cols: list, encoded_cols: list):
+        if encoder.handle_unknown not in ("ignore", "error"):
+            raise ValueError(f"handle_unknown={encoder.handle_unknown!r} is not supported")
+        if getattr(encoder, "drop_idx_", None) is not None or getattr(encoder, "_infrequent_enabled", False):
+            raise ValueError("Encoders with dropped or infrequent categories are not supported")
+        if list(encoder.get_feature_names_out(categorical_cols)) != list(encoded_cols):
+            raise ValueError("Encoder output does not match encoded_cols")
+        if getattr(imputer_num, "add_indicator", False) or not _is_missing(imputer_num.missing_values):
+            raise ValueError("Only NaN imputers without indicators are supported")
+        if getattr(scaler, "clip", False):
+            raise ValueError("Clipping scalers are not supported")
+        for step in (imputer_num, scaler):
+            if list(step.feature_names_in_) != list(numerical_cols):
+                raise ValueError(f"{type(step).__name__} columns do not match numerical_cols")
+
+        # Keep the original pipeline for the fallback path
+        self.pipeline = (imputer_num, scaler, encoder, numerical_cols, categorical_cols, encoded_cols)
+
+        self.numerical_cols = list(numerical_cols)
+        self.categorical_cols = list(categorical_cols)
+        self.feature_names = self.numerical_cols + list(encoded_cols)
+        self.n_features = len(self.feature_names)
+        self.ignore_unknown = encoder.handle_unknown == "ignore"
+
+        self.fill_values = np.asarray(imputer_num.statistics_, dtype=np.float64)
+        self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        self.offset = np.asarray(scaler.min_, dtype=np.float64)
+
+        # (column, {category: output index}) in encoder order
+        self.category_tables = []
+        index = len(self.numerical_cols)
+        for col, categories in zip(self.categorical_cols, encoder.categories_):
+            self.category_tables.append((col, {
+                category: index + i for i, category in enumerate(categories) if isinstance(category, str)
+            }))
+            index += len(categories)
+
+    def _fill_row(self, record: Dict[str, Any], row: np.ndarray) -> bool:
+        """
+        Write one record into a zeroed output row (numerical columns unscaled)
+
+        Returns False when the record needs the pandas pipeline.
+        """
+        for i, col in enumerate(self.numerical_cols):
+            if col not in record:
+                return False
+            value = record[col]
+            if _is_missing(value):
+                value = self.fill_values[i]
+            elif not _is_number(value):
+                return False
+            row[i] = value
+
+        for col, table in self.category_tables:
+            value = record.get(col)
+            index = table.get(value) if isinstance(value, str) else None
+            if index is not None:
+                row[index] = 1.0
+            elif not isinstance(value, str) or not self.ignore_unknown:
+                return False
+
+        return True
+
+    def build_batch(self, records: List[Dict[str, Any]]) -> np.ndarray:
+        """Return the (n_records, n_features) float64 feature matrix"""
+        output = np.zeros((len(records), self.n_features))
+        for row, record in zip(output, records):
+            if not isinstance(record, dict) or not self._fill_row(record, row):
+                return process_churn_batch(records, *self.pipeline).to_numpy(dtype=np.float64)
+
+        numeric = output[:, :len(self.numerical_cols)]
+        numeric *= self.scale
+        numeric += self.offset
+        return output
+
+    def build(self, record: Dict[str, Any]) -> np.ndarray:
+        """Return the (1, n_features) float64 feature row for a single record"""
+        return self.build_batch([record])
+
+
+def sample_records(transformer: FeatureTransformer, n_records: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Random records covering every known category, unknown ones and missing values"""
+    rng = np.random.default_rng(seed)
+    categories = {col: ["__unknown__"] for col in transformer.categorical_cols}
+    for name in transformer.feature_names[len(transformer.numeric_cols):]:
+        for col in transformer.categorical_cols:
+            if name.startswith(f"{col}_"):
+                categories[col].append(name[len(col) + 1:])
+
+    records = []
+    for _ in range(n_records):
+        record = {col: float(rng.normal(0, 100)) for col in transformer.numeric_cols}
+        for col, values in categories.items():
+            record[col] = values[rng.integers(len(values))]
+        for col in transformer.fill_values:
+            if rng.random() < 0.1:
+                record.pop(col, None)
+            elif rng.random() < 0.1:
+                record[col] = None
+        records.append(record)
+    return records
+
+
+def compile_feature_transformer(model_data: Dict[str, Any], name: str) -> Optional[FeatureTransformer]:
+    """
+    Build a transformer from a model bundle and check it against process_input_batch
+
+    Returns None (so callers keep using the pandas pipeline) if compilation
+    fails or any output differs.
+    """
+    try:
+        transformer = FeatureTransformer(
+            model_data["imputer"],
+            model_data["scaler"],
+            model_data["encoder"],
+            model_data["numeric_cols"],
+            model_data["categorical_cols"],
+            model_data["encoded_cols"],
+        )
+
+        records = sample_records(transformer, 256)
+        expected = process_input_batch(records, *transformer.pipeline).to_numpy(dtype=np.float64)
+        for record, row in zip(records, expected):
+            output = transformer.transform(record)
+            if not np.array_equal(output[0], row, equal_nan=True):
+                raise ValueError("output differs from process_input_data")
+        if not np.array_equal(transformer.transform_batch(records), expected, equal_nan=True):
+            raise ValueError("batch output differs from process_input_batch")
+
+        logger.info(f"Feature transformer compiled for {name} ({transformer.n_features} features)")
+        return transformer
+
+    except Exception as e:
+        logger.warning(f"Feature transformer disabled for {name}, using pandas preprocessing: {str(e)}")
+        return None
+
+
+def compile_feature_builder(model_data: Dict[str, Any], name: str) -> Optional[OneHotFeatureBuilder]:
+    """
+    Build a one-hot feature builder from a model bundle and check it against
+    process_churn_batch
+
+    Returns None (so callers keep using the pandas pipeline) if compilation
+    fails or any output differs.
+    """
+    try:
+        builder = OneHotFeatureBuilder(
+            model_data["imputer_num"],
+            model_data["scaler"],
+            model_data["encoder"],
+            model_data["numerical_cols"],
+            model_data["categorical_cols"],
+            model_data["encoded_cols"],
+        )
+
+        rng = np.random.default_rng(0)
+        records = []
+        for _ in range(256):
+            record = {
+                col: None if rng.random() < 0.1 else float(rng.normal(0, 100))
+                for col in builder.numerical_cols
+            }
+            for col, table in builder.category_tables:
+                categories = list(table) + (["__unknown__"] if builder.ignore_unknown else [])
+                record[col] = categories[rng.integers(len(categories))]
+            records.append(record)
+
+        expected = process_churn_batch(records, *builder.pipeline).to_numpy(dtype=np.float64)
+        for record, row in zip(records, expected):
+            if not np.array_equal(builder.build(record)[0], row):
+                raise ValueError("output differs from process_churn_batch")
+        if not np.array_equal(builder.build_batch(records), expected):
+            raise ValueError("batch output differs from process_churn_batch")
+
+        logger.info(f"Feature builder compiled for {name} ({builder.n_features} features)")
+        return builder
+
+    except Exception as e:
+        logger.warning(f"Feature builder disabled for {name}, using pandas preprocessing: {str(e)}")
+        return None
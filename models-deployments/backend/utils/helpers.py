@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
 
 def validate_age(age: int) -> bool:
     """Validate age input"""
@@ -51,9 +51,43 @@ def process_input_data(
     Returns:
         Processed DataFrame ready for prediction
     """
+    return process_input_batch(
+        [data],
+        imputer,
+        scaler,
+        encoder,
+        numeric_cols,
+        categorical_cols,
+        encoded_cols
+    )
+
+def process_input_batch(
+    records: List[Dict[str, Any]],
+    imputer,
+    scaler,
+    encoder,
+    numeric_cols: list,
+    categorical_cols: list,
+    encoded_cols: list
+) -> pd.DataFrame:
+    """
+    Process many input records through the preprocessing pipeline at once
+    
+    Args:
+        records: Raw input records, one row each
+        imputer: Fitted imputer
+        scaler: Fitted scaler
+        encoder: Fitted encoder
+        numeric_cols: List of numeric column names
+        categorical_cols: List of categorical column names
+        encoded_cols: List of encoded column names
+    
+    Returns:
+        Processed DataFrame ready for prediction, one row per record
+    """
     try:
         # Create DataFrame
-        input_df = pd.DataFrame([data])
+        input_df = pd.DataFrame(records)
         
         # Add missing numeric columns with NaN
         imputer_cols = imputer.feature_names_in_
@@ -82,4 +116,45 @@ def process_input_data(
         return input_encoded
     
     except Exception as e:
-        raise ValueError(f"Error processing input data: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Error processing input data: {str(e)}")
+
+def process_churn_batch(
+    records: List[Dict[str, Any]],
+    imputer_num,
+    scaler,
+    encoder,
+    numerical_cols: list,
+    categorical_cols: list,
+    encoded_cols: list
+) -> pd.DataFrame:
+    """
+    Impute, scale and one-hot encode churn records into the model's feature frame
+    
+    Args:
+        records: Raw input records, one row each
+        imputer_num: Fitted numerical imputer
+        scaler: Fitted scaler
+        encoder: Fitted one-hot encoder
+        numerical_cols: List of numerical column names
+        categorical_cols: List of categorical column names
+        encoded_cols: List of encoded column names
+    
+    Returns:
+        Numerical columns followed by encoded columns, one row per record
+    """
+    # Convert input JSON → DataFrame (same as Flask)
+    input_df = pd.DataFrame(records)
+    
+    # Numerical preprocessing
+    input_df[numerical_cols] = imputer_num.transform(input_df[numerical_cols])
+    input_df[numerical_cols] = scaler.transform(input_df[numerical_cols])
+    
+    # Categorical preprocessing
+    encoded_values = encoder.transform(input_df[categorical_cols])
+    encoded_df = pd.DataFrame(encoded_values, columns=encoded_cols)
+    
+    # Final feature set
+    return pd.concat(
+        [input_df[numerical_cols], encoded_df],
+        axis=1,
+    )
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from config.logging_config import logger
+from config.settings import settings
+from utils.metrics import metrics
+
+
+class InferenceQueueFull(HTTPException):
+    """Raised when the inference executor already holds its maximum number of jobs"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Inference queue is full. Please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+
+_executor: Optional[Executor] = None
+_capacity = 0
+_in_flight = 0
+_rejected = 0
+_lock = threading.Lock()
+
+
+def server_workers() -> int:
+    """Server processes sharing the CPUs: gunicorn's workers when gunicorn runs the app"""
+    if "gunicorn" in sys.modules:
+        return settings.GUNICORN_WORKERS
+    return settings.WORKERS
+
+
+def inference_workers() -> int:
+    """Executor size: explicit setting, or the CPUs left per server worker"""
+    if settings.INFERENCE_WORKERS > 0:
+        return settings.INFERENCE_WORKERS
+    return max(1, (os.cpu_count() or 1) // max(1, server_workers()))
+
+
+def process_pool_enabled() -> bool:
+    """Whether inference runs in pool processes with their own model copies.
+
+    Pool processes load models once, at start. Hot reloads, version activations and
+    shadow or canary versions change only this process's models, so the admin API
+    refuses them in process mode; metrics recorded inside the pool are not exported.
+    """
+    return settings.INFERENCE_EXECUTOR == "process"
+
+
+def _init_worker_process():
+    """Make sure a pool process has models to score with (loaded once, never swapped)"""
+    from utils.model_loader import load_all_models, models
+
+    if models.heart_disease_model is None and models.customer_churn_model is None:
+        load_all_models()
+
+
+def get_executor() -> Executor:
+    """Return the shared inference executor, creating it on first use"""
+    global _executor, _capacity
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = inference_workers()
+                if process_pool_enabled():
+                    executor = ProcessPoolExecutor(
+                        max_workers=workers,
+                        initializer=_init_worker_process,
+                    )
+                else:
+                    executor = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix="inference",
+                    )
+                _capacity = workers + settings.INFERENCE_QUEUE_SIZE
+                _executor = executor
+                logger.info(
+                    f"Inference executor started: {settings.INFERENCE_EXECUTOR} pool, "
+                    f"{workers} workers, queue size {settings.INFERENCE_QUEUE_SIZE}"
+                )
+    return _executor
+
+
+async def run_inference(fn: Callable, *args: Any) -> Any:
+    """Run a preprocessing/model call on the inference executor without blocking the event loop"""
+    global _in_flight, _rejected
+    executor = get_executor()
+    with _lock:
+        if _in_flight >= _capacity:
+            _rejected += 1
+            raise InferenceQueueFull()
+        _in_flight += 1
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        _release_slot()
+        raise
+    # The slot is freed when the job ends, not when the caller stops waiting: a job
+    # whose request was cancelled (client disconnect) keeps running on the executor
+    future.add_done_callback(_release_slot)
+    return await asyncio.wrap_future(future)
+
+
+def _release_slot(future: Optional[Future] = None):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+
+
+def executor_stats() -> Dict[str, Any]:
+    """Return executor sizing and current occupancy"""
+    workers = inference_workers()
+    return {
+        "kind": settings.INFERENCE_EXECUTOR,
+        "workers": workers,
+        "capacity": workers + settings.INFERENCE_QUEUE_SIZE,
+        "in_flight": _in_flight,
+        "queued": max(0, _in_flight - workers),
+        "rejected": _rejected,
+    }
+
+
+def shutdown_executor():
+    """Stop the inference executor, waiting for running jobs"""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+metrics.callback(
+    "inference_in_flight", "Inference jobs running or queued on the executor", "gauge", (),
+    lambda: {(): _in_flight},
+)
+metrics.callback(
+    "inference_queue_depth", "Inference jobs waiting for an executor worker", "gauge", (),
+    lambda: {(): executor_stats()["queued"]},
+)
+metrics.callback(
+    "inference_rejected_total", "Inference jobs refused because the queue was full", "counter", (),
+    lambda: {(): _rejected},
+)
@@ -0,0 +1,319 @@
+import asyncio
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+from fastapi import Request
+
+from config.logging_config import logger
+from utils.batch import score_batch
+from utils.inference_executor import InferenceQueueFull, run_inference
+from utils.model_loader import ModelLoading
+from utils.streaming import encode_results, iter_lines, iter_record_chunks, validate_stream_record
+
+JOB_READ_SIZE = 1 << 16
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobScorer(NamedTuple):
+    """The router functions a job needs to score one model"""
+    require_model: Callable[[], Awaitable[None]]
+    validate_record: Callable[[Any], Any]
+    score_records: Callable[[List[Any]], List[Dict[str, Any]]]
+
+
+class JobManager:
+    """
+    Local batch scoring jobs persisted under JOBS_DIR
+
+    Each job directory holds the uploaded input, a manifest.json with status
+    and progress, one result file per completed chunk and, once finished,
+    results.ndjson. The manifest is rewritten atomically after every chunk, so
+    a restarted server resumes each unfinished job from its last completed
+    chunk. A file lock per job keeps two server processes from running the
+    same job, and cancellation is a marker file any process can create.
+    """
+
+    def __init__(self, jobs_dir: str, scorers: Dict[str, JobScorer], workers: int, chunk_size: int):
+        self.jobs_dir = jobs_dir
+        self.scorers = scorers
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ----- paths and manifests -----
+
+    def job_dir(self, job_id: str) -> str:
+        # Job ids are generated hex strings; anything else never maps to a directory
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _path(self, job_id: str, name: str) -> str:
+        return os.path.join(self.job_dir(job_id), name)
+
+    def read_manifest(self, job_id: str) -> Dict[str, Any]:
+        """Return a job's manifest, raising KeyError for unknown jobs"""
+        try:
+            with open(self._path(job_id, "manifest.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(job_id)
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        path = self._path(manifest["id"], "manifest.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def results_path(self, job_id: str) -> str:
+        return self._path(job_id, "results.ndjson")
+
+    # ----- API operations -----
+
+    async def create_job(self, model: str, request: Request) -> Dict[str, Any]:
+        """Persist an uploaded CSV/NDJSON dataset and queue it for scoring"""
+        job_id = uuid.uuid4().hex
+        await asyncio.to_thread(os.makedirs, self._path(job_id, "chunks"))
+
+        input_format = "csv" if "csv" in request.headers.get("content-type", "").lower() else "ndjson"
+        content_encoding = request.headers.get("content-encoding", "")
+        size = 0
+        # Disk writes run off the event loop, like every other job file access
+        with open(self._path(job_id, "input"), "wb") as f:
+            async for chunk in request.stream():
+                await asyncio.to_thread(f.write, chunk)
+                size += len(chunk)
+
+        manifest = {
+            "id": job_id,
+            "model": model,
+            "status": QUEUED,
+            "format": input_format,
+            "content_encoding": content_encoding,
+            "input_bytes": size,
+            "chunk_size": self.chunk_size,
+            "chunks_done": 0,
+            "records_done": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "run_seconds": 0.0,
+        }
+        await asyncio.to_thread(self._write_manifest, manifest)
+        logger.info(f"Job {job_id} created for {model}: {size} bytes of {input_format}")
+
+        await self._enqueue(job_id)
+        return manifest
+
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """Request cancellation; a running job stops after its current chunk"""
+        manifest = self.read_manifest(job_id)
+        if manifest["status"] not in FINISHED_STATES:
+            open(self._path(job_id, "cancel"), "w").close()
+            if manifest["status"] == QUEUED:
+                manifest["status"] = CANCELLED
+                manifest["finished_at"] = datetime.utcnow().isoformat()
+                self._write_manifest(manifest)
+        return manifest
+
+    def job_status(self, job_id: str) -> Dict[str, Any]:
+        """Manifest plus progress and throughput"""
+        manifest = self.read_manifest(job_id)
+        run_seconds = manifest["run_seconds"]
+        if manifest["status"] == RUNNING and manifest.get("resumed_at"):
+            run_seconds += time.time() - manifest["resumed_at"]
+        return {
+            **manifest,
+            "cancel_requested": os.path.exists(self._path(job_id, "cancel")),
+            "records_per_second": round(manifest["records_done"] / run_seconds, 1) if run_seconds else 0.0,
+            "results_available": manifest["status"] == COMPLETED,
+        }
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        jobs = []
+        if os.path.isdir(self.jobs_dir):
+            for job_id in sorted(os.listdir(self.jobs_dir)):
+                try:
+                    jobs.append(self.read_manifest(job_id))
+                except (KeyError, ValueError):
+                    continue
+        return sorted(jobs, key=lambda manifest: manifest["created_at"])
+
+    # ----- workers -----
+
+    async def start(self):
+        """Start the worker pool and queue every unfinished job found on disk"""
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        for manifest in self.list_jobs():
+            if manifest["status"] in (QUEUED, RUNNING):
+                logger.info(f"Resuming job {manifest['id']} from chunk {manifest['chunks_done']}")
+                await self._enqueue(manifest["id"])
+
+    async def stop(self):
+        """Stop the workers; running jobs stay resumable"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _enqueue(self, job_id: str):
+        if self._queue is not None:
+            await self._queue.put(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_claimed(job_id)
+            except Exception as e:
+                logger.error(f"Job {job_id} worker error: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _run_claimed(self, job_id: str):
+        """Run a job unless another process already holds it"""
+        lock = open(self._path(job_id, "lock"), "w")
+        try:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info(f"Job {job_id} is running in another process")
+                return
+            await self._run(job_id)
+        finally:
+            lock.close()
+
+    async def _iter_input(self, job_id: str) -> AsyncIterator[bytes]:
+        # File reads run off the event loop, as every job file write does
+        with open(self._path(job_id, "input"), "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, JOB_READ_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    async def _run(self, job_id: str):
+        manifest = self.read_manifest(job_id)
+        if manifest["status"] in FINISHED_STATES:
+            return
+        scorer = self.scorers.get(manifest["model"])
+
+        manifest["status"] = RUNNING
+        manifest["started_at"] = manifest["started_at"] or datetime.utcnow().isoformat()
+        manifest["resumed_at"] = time.time()
+        await asyncio.to_thread(self._write_manifest, manifest)
+
+        try:
+            await self._wait_for_model(scorer)
+            validate = partial(validate_stream_record, scorer.validate_record)
+            lines = iter_lines(self._iter_input(job_id), manifest["content_encoding"])
+            chunks = iter_record_chunks(lines, manifest["format"], manifest["chunk_size"])
+
+            index = 0
+            async for records in chunks:
+                # Chunks finished before a restart are already on disk
+                if index < manifest["chunks_done"]:
+                    index += 1
+                    continue
+                if os.path.exists(self._path(job_id, "cancel")):
+                    await asyncio.to_thread(self._finish, manifest, CANCELLED)
+                    logger.info(f"Job {job_id} cancelled after {manifest['records_done']} records")
+                    return
+
+                results = await self._score_chunk(records, validate, scorer.score_records)
+                body = encode_results(results, manifest["records_done"])
+                await asyncio.to_thread(self._write_chunk, job_id, index, body)
+
+                succeeded = sum(1 for result in results if result["success"])
+                manifest["chunks_done"] = index + 1
+                manifest["records_done"] += len(records)
+                manifest["succeeded"] += succeeded
+                manifest["failed"] += len(records) - succeeded
+                await asyncio.to_thread(self._checkpoint, manifest)
+                index += 1
+
+            await asyncio.to_thread(self._merge_chunks, job_id, manifest["chunks_done"])
+            await asyncio.to_thread(self._finish, manifest, COMPLETED)
+            logger.info(
+                f"Job {job_id} completed: {manifest['records_done']} records "
+                f"in {manifest['run_seconds']:.1f}s"
+            )
+
+        except asyncio.CancelledError:
+            # Server shutdown: keep RUNNING so the next start resumes it
+            await asyncio.to_thread(self._checkpoint, manifest)
+            raise
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            manifest["error"] = getattr(e, "detail", None) or str(e)
+            await asyncio.to_thread(self._finish, manifest, FAILED)
+
+    async def _wait_for_model(self, scorer: JobScorer):
+        # Jobs resumed during a degraded startup wait for their model to finish loading
+        while True:
+            try:
+                return await scorer.require_model()
+            except ModelLoading:
+                await asyncio.sleep(0.5)
+
+    async def _score_chunk(self, records: List[Any], validate, score_records) -> List[Dict[str, Any]]:
+        # Jobs yield to interactive traffic instead of failing when the executor is full
+        while True:
+            try:
+                return await run_inference(score_batch, records, validate, score_records)
+            except InferenceQueueFull:
+                await asyncio.sleep(0.5)
+
+    def _write_chunk(self, job_id: str, index: int, body: bytes):
+        path = self._path(job_id, os.path.join("chunks", f"{index:06d}.ndjson"))
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _merge_chunks(self, job_id: str, n_chunks: int):
+        path = self.results_path(job_id)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as output:
+            for index in range(n_chunks):
+                with open(self._path(job_id, os.path.join("chunks", f"{index:06d}.ndjson")), "rb") as f:
+                    shutil.copyfileobj(f, output)
+        os.replace(tmp_path, path)
+        shutil.rmtree(self._path(job_id, "chunks"), ignore_errors=True)
+
+    def _checkpoint(self, manifest: Dict[str, Any]):
+        now = time.time()
+        manifest["run_seconds"] += now - manifest["resumed_at"]
+        manifest["resumed_at"] = now
+        self._write_manifest(manifest)
+
+    def _finish(self, manifest: Dict[str, Any], status: str):
+        manifest["status"] = status
+        manifest["finished_at"] = datetime.utcnow().isoformat()
+        manifest["run_seconds"] += time.time() - manifest.pop("resumed_at")
+        self._write_manifest(manifest)
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+from typing import Optional
+
+from config.logging_config import logger
+
+# Random rows scored by both sklearn and the kernel before the kernel is used
+PARITY_ROWS = 256
+
+
+class LinearKernel:
+    """
+    Coefficient/intercept form of a fitted LinearRegression or binary LogisticRegression
+
+    Mirrors the sklearn estimator API used by the routers (predict, predict_proba)
+    but skips sklearn's input validation wrappers, so a single row costs one dot
+    product instead of a full check_array/feature-name round trip.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept, classes: Optional[np.ndarray] = None):
+        self.coef = np.array(coef, dtype=np.float64)
+        self.intercept = np.array(intercept, dtype=np.float64)
+        self.classes = classes
+        self.n_features = self.coef.shape[-1]
+
+    @classmethod
+    def from_estimator(cls, estimator) -> "LinearKernel":
+        """Extract the kernel from a fitted sklearn linear estimator"""
+        classes = getattr(estimator, "classes_", None)
+        if classes is not None and len(classes) != 2:
+            raise ValueError("Only binary classifiers are supported")
+        return cls(estimator.coef_, estimator.intercept_, classes)
+
+    def _as_matrix(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model expects {self.n_features}"
+            )
+        if not np.isfinite(X).all():
+            raise ValueError("Input X contains NaN or infinity.")
+        return X
+
+    def decision_function(self, X) -> np.ndarray:
+        """Linear scores, computed exactly as sklearn does (X @ coef.T + intercept)"""
+        scores = self._as_matrix(X) @ self.coef.T + self.intercept
+        return scores.ravel() if scores.ndim == 2 and scores.shape[1] == 1 else scores
+
+    def predict(self, X) -> np.ndarray:
+        """Regression values, or class labels for a classifier"""
+        scores = self.decision_function(X)
+        if self.classes is None:
+            return scores
+        return self.classes[(scores > 0).astype(int)]
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities [P(classes[0]), P(classes[1])] for a classifier"""
+        if self.classes is None:
+            raise AttributeError("predict_proba is only available for classifiers")
+        positive = expit(self.decision_function(X))
+        proba = np.empty((positive.shape[0], 2))
+        proba[:, 1] = positive
+        np.subtract(1, positive, out=proba[:, 0])
+        return proba
+
+
+def compile_linear_kernel(estimator, name: str) -> Optional[LinearKernel]:
+    """
+    Build a kernel for an estimator and check it against sklearn on random rows
+
+    Returns None (so callers keep using sklearn) if extraction fails or the
+    kernel's outputs do not match the estimator's.
+    """
+    try:
+        kernel = LinearKernel.from_estimator(estimator)
+
+        sample = np.random.default_rng(0).uniform(-1, 1, size=(PARITY_ROWS, kernel.n_features))
+        sample_input = sample
+        if hasattr(estimator, "feature_names_in_"):
+            sample_input = pd.DataFrame(sample, columns=estimator.feature_names_in_)
+
+        expected = estimator.predict(sample_input)
+        predicted = kernel.predict(sample)
+        if kernel.classes is None:
+            matches = np.allclose(predicted, expected, rtol=1e-9, atol=1e-9)
+        else:
+            matches = np.array_equal(predicted, expected) and np.allclose(
+                kernel.predict_proba(sample),
+                estimator.predict_proba(sample_input),
+                rtol=1e-9,
+                atol=1e-12,
+            )
+        if not matches:
+            raise ValueError("output differs from sklearn")
+
+        logger.info(f"Native kernel compiled for {name} ({kernel.n_features} features)")
+        return kernel
+
+    except Exception as e:
+        logger.warning(f"Native kernel disabled for {name}, using sklearn: {str(e)}")
+        return None
@@ -0,0 +1,431 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+from config.logging_config import logging_stats
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the utf-8 charset
+
+# Seconds, from 25 µs (a cached single prediction) to 10 s (a large batch)
+LATENCY_BUCKETS = (
+    0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Records per scoring call, up to BATCH_MAX_RECORDS
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+# Scoring stages timed inside the routers
+STAGES = ("validation", "preprocess", "predict", "format", "serialize")
+
+Labels = Tuple[str, ...]
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class PerThreadCells:
+    """
+    Counts kept in one list per writing thread
+
+    Each thread only ever updates its own list, so the hot path needs no
+    lock (a lock round trip costs more than the update itself); the lists
+    are summed when the metrics are rendered. Several metrics can share one
+    object, so recording a whole request is a single thread-local lookup.
+    """
+
+    __slots__ = ("size", "_local", "_cells", "_lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._cells: List[list] = []
+        self._lock = threading.Lock()
+
+    def local(self) -> list:
+        """This thread's list"""
+        try:
+            return self._local.cells
+        except AttributeError:
+            return self._new_cells()
+
+    def _new_cells(self) -> list:
+        cells = [0] * self.size
+        self._local.cells = cells
+        with self._lock:
+            self._cells.append(cells)
+        return cells
+
+    def totals(self) -> list:
+        with self._lock:
+            shards = list(self._cells)
+        return [sum(values) for values in zip(*shards)] if shards else [0] * self.size
+
+
+class Counter:
+    """A monotonically increasing value for one label set"""
+
+    __slots__ = ("cells", "offset")
+
+    def __init__(self, cells: Optional[PerThreadCells] = None, offset: int = 0):
+        self.cells = cells or PerThreadCells(1)
+        self.offset = offset
+
+    def inc(self, amount: float = 1.0):
+        self.cells.local()[self.offset] += amount
+
+    def samples(self, name: str, labelnames: Sequence[str], labels: Labels) -> Iterator[str]:
+        yield f"{name}{format_labels(labelnames, labels)} {format_value(self.cells.totals()[self.offset])}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram for one label set
+
+    Occupies len(buckets) + 2 cells (one count per bucket, +Inf, the sum),
+    on its own or at an offset of a PerThreadCells shared with other
+    metrics. Buckets are only made cumulative when rendered. Values are
+    observed in units of 1/scale (scale=1e9 takes integer nanoseconds,
+    rendered as seconds).
+    """
+
+    __slots__ = ("cells", "offset", "bounds", "scale", "sum_index")
+
+    def __init__(
+        self, buckets: Sequence[float], scale: float = 1.0, cells: Optional[PerThreadCells] = None, offset: int = 0
+    ):
+        self.bounds = tuple(bound * scale for bound in buckets)
+        self.scale = scale
+        self.cells = cells or PerThreadCells(self.width(buckets))
+        self.offset = offset
+        self.sum_index = offset + len(self.bounds) + 1
+
+    @staticmethod
+    def width(buckets: Sequence[float]) -> int:
+        return len(buckets) + 2
+
+    def observe(self, value: float):
+        cells = self.cells.local()
+        cells[self.offset + bisect_left(self.bounds, value)] += 1
+        cells[self.sum_index] += value
+
+    def count(self, totals: list) -> int:
+        return sum(totals[self.offset:self.sum_index])
+
+    def samples(self, name: str, labelnames: Sequence[str], labels: Labels) -> Iterator[str]:
+        totals = self.cells.totals()
+        cumulative = 0
+        bounds = [bound / self.scale for bound in self.bounds] + [float("inf")]
+        for bound, count in zip(bounds, totals[self.offset:self.sum_index]):
+            cumulative += count
+            le = 'le="' + format_value(bound) + '"'
+            yield f"{name}_bucket{format_labels(labelnames, labels, le)} {cumulative}"
+        yield f"{name}_sum{format_labels(labelnames, labels)} {format_value(totals[self.sum_index] / self.scale)}"
+        yield f"{name}_count{format_labels(labelnames, labels)} {cumulative}"
+
+
+class HistogramCount:
+    """A counter read from the observation count of a histogram"""
+
+    __slots__ = ("histogram",)
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def samples(self, name: str, labelnames: Sequence[str], labels: Labels) -> Iterator[str]:
+        count = self.histogram.count(self.histogram.cells.totals())
+        yield f"{name}{format_labels(labelnames, labels)} {count}"
+
+
+class MetricFamily:
+    """A named metric and its children, one per label set"""
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Sequence[str], factory: Callable[[], Any]):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children: Dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """The child for a label set; hot paths keep the returned object instead of calling this per event"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def bind(self, labels: Labels, child):
+        """Render an existing metric (sharing cells with others) under this family"""
+        with self._lock:
+            self._children[labels] = child
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            children = sorted(self._children.items())
+        for labels, child in children:
+            yield from child.samples(self.name, self.labelnames, labels)
+
+
+class CallbackFamily:
+    """A metric whose samples are read from existing statistics when scraped"""
+
+    def __init__(self, name: str, help_text: str, kind: str, labelnames: Sequence[str], read: Callable[[], Dict[Labels, float]]):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in sorted(self.read().items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+
+class MetricsRegistry:
+    """Every metric of the process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._families: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family):
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f"Metric already registered: {family.name}")
+            self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(MetricFamily(name, help_text, "counter", labelnames, Counter))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        scale: float = 1.0,
+    ) -> MetricFamily:
+        return self._register(
+            MetricFamily(name, help_text, "histogram", labelnames, lambda: Histogram(buckets, scale))
+        )
+
+    def callback(
+        self, name: str, help_text: str, kind: str, labelnames: Sequence[str], read: Callable[[], Dict[Labels, float]]
+    ) -> CallbackFamily:
+        """Register a gauge or counter computed from existing statistics at scrape time"""
+        return self._register(CallbackFamily(name, help_text, kind, labelnames, read))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            try:
+                lines.extend(family.render())
+            except Exception as e:
+                lines.append(f"# {family.name} unavailable: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route template, method and status code", ("route", "method", "status")
+)
+http_errors = metrics.counter(
+    "http_request_errors_total", "HTTP requests answered with a 5xx or raising an exception",
+    ("route", "method", "status"),
+)
+http_duration = metrics.histogram(
+    "http_request_duration_seconds", "Time from request received to response returned",
+    ("route", "method", "status"),
+)
+stage_duration = metrics.histogram(
+    "model_stage_duration_seconds", "Time per scoring stage, per model", ("model", "stage")
+)
+batch_size = metrics.histogram(
+    "model_batch_size_records",
+    "Records per scoring call (micro-batches, batches, stream chunks); _sum is the records scored",
+    ("model",), SIZE_BUCKETS,
+)
+
+metrics.callback(
+    "log_queue_depth", "Log records waiting for the log writer thread", "gauge", (),
+    lambda: {(): logging_stats()["queued"]},
+)
+metrics.callback(
+    "log_dropped_records_total", "Log records dropped because the log queue was full", "counter", (),
+    lambda: {(): logging_stats()["dropped"]},
+)
+
+# Model of the request being served, for the stages outside the scoring functions
+current_model: ContextVar[Optional["ModelMetrics"]] = ContextVar("current_model", default=None)
+
+# Each process's ModelMetrics by model name
+_model_metrics: Dict[str, "ModelMetrics"] = {}
+
+
+class ModelMetrics(PerThreadCells):
+    """
+    A model's stage histograms and batch size histogram in one set of cells
+
+    Stage durations are recorded in integer nanoseconds straight from
+    time.perf_counter_ns(). observe_scoring() records a whole scoring call
+    with one thread-local lookup.
+    """
+
+    __slots__ = ("model", "bounds", "width", "offsets", "batch_offset")
+
+    def __init__(self, model: str):
+        self.model = model
+        self.bounds = tuple(bound * 1e9 for bound in LATENCY_BUCKETS)
+        self.width = Histogram.width(LATENCY_BUCKETS)
+        self.offsets = {stage: i * self.width for i, stage in enumerate(STAGES)}
+        self.batch_offset = len(STAGES) * self.width
+        super().__init__(self.batch_offset + Histogram.width(SIZE_BUCKETS))
+
+        for stage, offset in self.offsets.items():
+            stage_duration.bind((model, stage), Histogram(LATENCY_BUCKETS, 1e9, self, offset))
+        batch_size.bind((model,), Histogram(SIZE_BUCKETS, 1.0, self, self.batch_offset))
+        _model_metrics[model] = self
+
+    def __reduce__(self):
+        # Passed to process-pool inference by name; the pool process records into its own instance
+        return model_metrics, (self.model,)
+
+    def observe(self, stage: str, start_ns: int, end_ns: int):
+        try:
+            cells = self._local.cells
+        except AttributeError:
+            cells = self._new_cells()
+        offset = self.offsets[stage]
+        elapsed = end_ns - start_ns
+        cells[offset + bisect_left(self.bounds, elapsed)] += 1
+        cells[offset + self.width - 1] += elapsed
+
+    def observe_batch(self, count: int):
+        try:
+            cells = self._local.cells
+        except AttributeError:
+            cells = self._new_cells()
+        cells[self.batch_offset + bisect_left(SIZE_BUCKETS, count)] += 1
+        cells[-1] += count
+
+    def observe_scoring(self, count: int, start_ns: int, preprocessed_ns: int, predicted_ns: int, formatted_ns: int):
+        """Record one scoring call: preprocessing, model call, result formatting and batch size"""
+        try:
+            cells = self._local.cells
+        except AttributeError:
+            cells = self._new_cells()
+        bounds, width = self.bounds, self.width
+        # preprocess, predict and format are STAGES[1:4], `width` cells each with the sum last
+        elapsed = preprocessed_ns - start_ns
+        cells[width + bisect_left(bounds, elapsed)] += 1
+        cells[2 * width - 1] += elapsed
+        elapsed = predicted_ns - preprocessed_ns
+        cells[2 * width + bisect_left(bounds, elapsed)] += 1
+        cells[3 * width - 1] += elapsed
+        elapsed = formatted_ns - predicted_ns
+        cells[3 * width + bisect_left(bounds, elapsed)] += 1
+        cells[4 * width - 1] += elapsed
+        cells[self.batch_offset + bisect_left(SIZE_BUCKETS, count)] += 1
+        cells[-1] += count
+
+    def serving(self):
+        """Attribute the response serialization of the current request to this model"""
+        current_model.set(self)
+
+
+def model_metrics(model: str) -> ModelMetrics:
+    """This process's ModelMetrics for a model, created on first use"""
+    metrics_for_model = _model_metrics.get(model)
+    return metrics_for_model if metrics_for_model is not None else ModelMetrics(model)
+
+
+class MetricsJSONResponse(JSONResponse):
+    """JSONResponse timing its encoding as the serialize stage of the model being served"""
+
+    def encode(self, content: Any) -> bytes:
+        return super().render(content)
+
+    def render(self, content: Any) -> bytes:
+        model = current_model.get()
+        if model is None:
+            return self.encode(content)
+        start = time.perf_counter_ns()
+        body = self.encode(content)
+        model.observe("serialize", start, time.perf_counter_ns())
+        return body
+
+
+class RequestMetrics(PerThreadCells):
+    """Duration histogram of one route, method and status; the request and error counters read its count"""
+
+    __slots__ = ("bounds", "sum_index")
+
+    def __init__(self, route: str, method: str, status_code: int):
+        super().__init__(Histogram.width(LATENCY_BUCKETS))
+        labels = (route, method, str(status_code))
+        duration = Histogram(LATENCY_BUCKETS, 1.0, self)
+        self.bounds = duration.bounds
+        self.sum_index = duration.sum_index
+        http_duration.bind(labels, duration)
+        http_requests.bind(labels, HistogramCount(duration))
+        if status_code >= 500:
+            http_errors.bind(labels, HistogramCount(duration))
+
+    def observe(self, duration_s: float):
+        try:
+            cells = self._local.cells
+        except AttributeError:
+            cells = self._new_cells()
+        cells[bisect_left(self.bounds, duration_s)] += 1
+        cells[self.sum_index] += duration_s
+
+
+_request_metrics: Dict[Tuple[str, str, int], RequestMetrics] = {}
+_request_metrics_lock = threading.Lock()
+
+
+def observe_request(route: str, method: str, status_code: int, duration_s: float):
+    """Count and time one HTTP request (status 500 for requests that raised)"""
+    request_metrics = _request_metrics.get((route, method, status_code))
+    if request_metrics is None:
+        with _request_metrics_lock:
+            request_metrics = _request_metrics.get((route, method, status_code))
+            if request_metrics is None:
+                request_metrics = RequestMetrics(route, method, status_code)
+                _request_metrics[(route, method, status_code)] = request_metrics
+    request_metrics.observe(duration_s)
+
+
+def render_metrics() -> str:
+    return metrics.render()
@@ -0,0 +1,181 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config.logging_config import logger
+from config.settings import settings
+from utils.candidates import canary_serving
+from utils.inference_executor import run_inference
+from utils.metrics import metrics
+from utils.prediction_cache import canonical_key, get_cache
+
+
+class MicroBatcher:
+    """Coalesce concurrent single-record predictions into one vectorized call"""
+
+    def __init__(
+        self,
+        name: str,
+        score_records: Callable[[List[Any]], List[Dict[str, Any]]],
+        max_batch_size: int,
+        max_wait_ms: float,
+    ):
+        self.name = name
+        self.score_records = score_records
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        # Metrics
+        self.batches = 0
+        self.records = 0
+        self.size_flushes = 0
+        self.timeout_flushes = 0
+        self.fallbacks = 0
+
+    async def submit(self, record: Any) -> Dict[str, Any]:
+        """Queue one record and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((record, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self.size_flushes += 1
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._on_timeout)
+
+        return await future
+
+    def _on_timeout(self):
+        self._timer = None
+        self.timeout_flushes += 1
+        self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batches += 1
+        self.records += len(batch)
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        records = [record for record, _ in batch]
+        try:
+            results = await run_inference(self.score_records, records)
+        except HTTPException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            # One bad record must not fail every request coalesced with it
+            logger.warning(f"Micro-batch for {self.name} failed, scoring records individually: {str(e)}")
+            self.fallbacks += 1
+            await asyncio.gather(*[
+                self._score_single(record, future) for record, future in batch
+            ])
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _score_single(self, record: Any, future: asyncio.Future):
+        try:
+            result = (await run_inference(self.score_records, [record]))[0]
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters and the average fill ratio"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "records": self.records,
+            "size_flushes": self.size_flushes,
+            "timeout_flushes": self.timeout_flushes,
+            "fallbacks": self.fallbacks,
+            "avg_batch_size": round(self.records / self.batches, 2) if self.batches else 0.0,
+            "fill_ratio": (
+                round(self.records / (self.batches * self.max_batch_size), 4)
+                if self.batches else 0.0
+            ),
+        }
+
+
+batchers: Dict[str, MicroBatcher] = {}
+
+
+def get_batcher(name: str, score_records: Callable[[List[Any]], List[Dict[str, Any]]]) -> MicroBatcher:
+    """Return the micro-batcher for a model, creating it on first use"""
+    batcher = batchers.get(name)
+    if batcher is None:
+        batcher = MicroBatcher(
+            name,
+            score_records,
+            settings.MICRO_BATCH_MAX_SIZE,
+            settings.MICRO_BATCH_MAX_WAIT_MS,
+        )
+        batchers[name] = batcher
+    return batcher
+
+
+async def score_one(
+    name: str,
+    score_records: Callable[[List[Any]], List[Dict[str, Any]]],
+    record: Any,
+) -> Dict[str, Any]:
+    """
+    Score a single record, answering repeats from the prediction cache and
+    coalescing it with concurrent ones when micro-batching is enabled. The
+    cache is bypassed while a canary runs, so repeats are split like the rest.
+    """
+    cache = None if canary_serving() else get_cache(name)
+    if cache is not None:
+        key = canonical_key(record)
+        result = cache.get(key)
+        if result is not None:
+            return result
+        generation = cache.current_generation()
+
+    if settings.MICRO_BATCHING_ENABLED:
+        result = await get_batcher(name, score_records).submit(record)
+    else:
+        result = (await run_inference(score_records, [record]))[0]
+
+    if cache is not None:
+        cache.put(key, result, generation)
+    return result
+
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """Return statistics for every active micro-batcher"""
+    return {name: batcher.stats() for name, batcher in batchers.items()}
+
+
+metrics.callback(
+    "micro_batch_pending_records", "Single-record requests waiting to join a micro-batch", "gauge", ("model",),
+    lambda: {(name,): len(batcher._pending) for name, batcher in list(batchers.items())},
+)
+metrics.callback(
+    "micro_batches_total", "Micro-batches scored", "counter", ("model",),
+    lambda: {(name,): batcher.batches for name, batcher in list(batchers.items())},
+)
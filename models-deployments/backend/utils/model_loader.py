@@ -1,10 +1,23 @@
+import asyncio
+import importlib
 import pickle
-import joblib
 import os
-import requests
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Callable, Dict, List, Optional
+from fastapi import HTTPException, status
 from config.logging_config import logger
 from config.settings import settings
+from utils.artifact_cache import get_artifact_cache
+from utils.feature_transformer import compile_feature_builder, compile_feature_transformer
+from utils.record_schema import compile_record_schema
+from utils.linear_kernels import compile_linear_kernel
+from utils.model_registry import ModelRegistry, ModelVersion
+from utils.shared_models import load_artifact, load_derived
+from utils.tree_engine import compile_forest
+from utils.uplift_scorer import build_uplift_scorer
 
 class ModelStore:
     """Global storage for loaded ML models"""
@@ -14,116 +27,524 @@ class ModelStore:
     customer_churn_model = None
     uplift_treated_model =None
     uplift_control_model =None
+    
+    # Native NumPy kernels compiled from the linear models (None = use sklearn)
+    smoker_kernel = None
+    non_smoker_kernel = None
+    heart_disease_kernel = None
+    
+    # Precompiled preprocessing replacing the per-request pandas pipeline (None = use pandas)
+    heart_disease_transformer = None
+    customer_churn_builder = None
+    
+    # Strict request decoders compiled from the bundles' columns, categories and ranges (None = route validation)
+    heart_disease_schema = None
+    customer_churn_schema = None
+    
+    # Flattened tree ensembles compiled from the random forests (None = use sklearn)
+    customer_churn_forest = None
+    uplift_treated_forest = None
+    uplift_control_forest = None
+    uplift_scorer = None
+    
+    # Per-model load state and timings (see MODEL_LOADERS)
+    load_state: Dict[str, str] = {}
+    load_times_ms: Dict[str, float] = {}
+    
+    def __init__(self):
+        # Model file name -> verified artifact path, filled in by the loaders
+        self.files: Dict[str, str] = {}
+    
+    def snapshot(self) -> "ModelStore":
+        """A consistent view of the current models for one request; hot swaps never change it"""
+        view = ModelStore.__new__(ModelStore)
+        view.__dict__.update(self.__dict__)
+        return view
+    
+    def swap(self, artifacts: Dict[str, object]):
+        """Replace several models at once (a single dict update, atomic for readers)"""
+        self.__dict__.update(artifacts)
 
 models = ModelStore()
 
-def download_model_if_needed(url: str, local_path: str) -> Optional[str]:
-    """Download model file from Google Drive if not cached"""
-    try:
-        if os.path.exists(local_path):
-            logger.info(f"Model already exists: {local_path}")
-            return local_path
-            
-        logger.info(f"Downloading model to {local_path}")
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        
-        response = requests.get(url, stream=True, timeout=300)
-        response.raise_for_status()
-        
-        with open(local_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-        
-        logger.info(f"Model downloaded successfully: {local_path}")
-        return local_path
-        
-    except Exception as e:
-        logger.error(f"Failed to download model: {str(e)}", exc_info=True)
-        return None
+# Model load states
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+LOADED = "loaded"
+WARM = "warm"
+FAILED = "failed"
+READY_STATES = (LOADED, WARM)
+
+
+class ModelLoading(HTTPException):
+    """Raised when a route's model is still loading after a degraded startup"""
+
+    def __init__(self, name: str):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Model {name} is still loading. Please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+def download_model_if_needed(
+    url: str, local_path: str, sha256: str = "", store: Optional["ModelStore"] = None, refresh: bool = False
+) -> str:
+    """
+    Return the path of a verified copy of a model file
+    
+    Served from the content-addressed artifact cache, downloading (or
+    resuming an interrupted download) when needed. A file already at
+    local_path is imported into the cache on first use. refresh skips the
+    cached copy to pick up a new version; the path is recorded in
+    store.files.
+    """
+    name = os.path.basename(local_path)
+    path = get_artifact_cache().fetch(name, url, sha256 or None, local_path, refresh)
+    if store is not None:
+        store.files[name] = path
+    logger.info(f"Model ready: {name} ({path})")
+    return path
+
+# Google Drive file id setting, file name in MODELS_DIR and expected SHA-256 setting of each model's files
+MODEL_FILES = {
+    "medical_charge": (
+        ("SMOKER_MODEL_ID", "smoker_model.pkl", "SMOKER_MODEL_SHA256"),
+        ("NON_SMOKER_MODEL_ID", "non_smoker_model.pkl", "NON_SMOKER_MODEL_SHA256"),
+    ),
+    "heart_disease": (("HEART_DISEASE_MODEL_ID", "Heart_Disease_Predictor.joblib", "HEART_DISEASE_MODEL_SHA256"),),
+    "customer_churn": (("CUSTOMER_CHURN_MODEL_ID", "customer_churn_prediction.joblib", "CUSTOMER_CHURN_MODEL_SHA256"),),
+    "uplift_treated": (("UPLIFT_TREATED_MODEL_ID", "uplift_treated_model.joblib", "UPLIFT_TREATED_MODEL_SHA256"),),
+    "uplift_control": (("UPLIFT_CONTROL_MODEL_ID", "uplift_control_model.joblib", "UPLIFT_CONTROL_MODEL_SHA256"),),
+}
+
+def fetch_model_files(name: str, store: Optional["ModelStore"] = None, refresh: bool = False) -> List[str]:
+    """Verified paths of a model's files, in MODEL_FILES order"""
+    return [
+        download_model_if_needed(
+            f"https://drive.google.com/uc?export=download&id={getattr(settings, file_id)}",
+            f"{settings.MODELS_DIR}/{file_name}",
+            getattr(settings, sha256),
+            store,
+            refresh,
+        )
+        for file_id, file_name, sha256 in MODEL_FILES[name]
+    ]
 
-def load_medical_charge_models():
+def model_file_hashes(name: str, refresh: bool = False) -> Dict[str, str]:
+    """SHA-256 per model file (as ModelVersion.sha256 records them), without loading the model"""
+    paths = fetch_model_files(name, refresh=refresh)
+    return {file_name: os.path.basename(path) for (_, file_name, _), path in zip(MODEL_FILES[name], paths)}
+
+def load_medical_charge_models(store: "ModelStore" = models, refresh: bool = False):
     """Load medical charge prediction models"""
     try:
-        SMOKER_URL = f"https://drive.google.com/uc?export=download&id={settings.SMOKER_MODEL_ID}"
-        NON_SMOKER_URL = f"https://drive.google.com/uc?export=download&id={settings.NON_SMOKER_MODEL_ID}"
-        
-        SMOKER_PATH = f"{settings.MODELS_DIR}/smoker_model.pkl"
-        NON_SMOKER_PATH = f"{settings.MODELS_DIR}/non_smoker_model.pkl"
-        
-        download_model_if_needed(SMOKER_URL, SMOKER_PATH)
-        download_model_if_needed(NON_SMOKER_URL, NON_SMOKER_PATH)
+        SMOKER_PATH, NON_SMOKER_PATH = fetch_model_files("medical_charge", store, refresh)
         
         with open(SMOKER_PATH, 'rb') as f:
-            models.smoker_model = pickle.load(f)
+            store.smoker_model = pickle.load(f)
         with open(NON_SMOKER_PATH, 'rb') as f:
-            models.non_smoker_model = pickle.load(f)
+            store.non_smoker_model = pickle.load(f)
+        
+        if settings.NATIVE_KERNELS_ENABLED:
+            store.smoker_kernel = compile_linear_kernel(store.smoker_model, "smoker_model")
+            store.non_smoker_kernel = compile_linear_kernel(store.non_smoker_model, "non_smoker_model")
             
         logger.info("✅ Medical charge models loaded successfully")
         
     except Exception as e:
         logger.error(f"❌ Failed to load medical charge models: {str(e)}", exc_info=True)
 
-def load_heart_disease_model():
+def load_heart_disease_model(store: "ModelStore" = models, refresh: bool = False):
     """Load heart disease prediction model"""
     try:
-        MODEL_URL = f"https://drive.google.com/uc?export=download&id={settings.HEART_DISEASE_MODEL_ID}"
-        LOCAL_PATH = f"{settings.MODELS_DIR}/Heart_Disease_Predictor.joblib"
+        [LOCAL_PATH] = fetch_model_files("heart_disease", store, refresh)
+        store.heart_disease_model = load_artifact(LOCAL_PATH)
         
-        download_model_if_needed(MODEL_URL, LOCAL_PATH)
-        models.heart_disease_model = joblib.load(LOCAL_PATH)
+        if settings.NATIVE_KERNELS_ENABLED:
+            store.heart_disease_kernel = compile_linear_kernel(
+                store.heart_disease_model["model"], "heart_disease_model"
+            )
+        if settings.COMPILED_PREPROCESSING_ENABLED:
+            store.heart_disease_transformer = compile_feature_transformer(
+                store.heart_disease_model, "heart_disease_model"
+            )
+        if settings.SCHEMA_VALIDATION_ENABLED:
+            model_data = store.heart_disease_model
+            # Missing categorical columns are imputed, so only the numeric ones are required
+            store.heart_disease_schema = compile_record_schema(
+                "heart_disease_model",
+                model_data["numeric_cols"],
+                model_data["categorical_cols"],
+                [model_data["imputer"]],
+                model_data["scaler"],
+                model_data["encoder"],
+                require_all_keys=False,
+            )
         logger.info("✅ Heart disease model loaded successfully")
         
     except Exception as e:
         logger.error(f"❌ Failed to load heart disease model: {str(e)}", exc_info=True)
 
-def load_customer_churn_model():
+def load_customer_churn_model(store: "ModelStore" = models, refresh: bool = False):
     """Load customer churn prediction model"""
     try:
-        MODEL_URL = f"https://drive.google.com/uc?export=download&id={settings.CUSTOMER_CHURN_MODEL_ID}"
-        LOCAL_PATH = f"{settings.MODELS_DIR}/customer_churn_prediction.joblib"
+        [LOCAL_PATH] = fetch_model_files("customer_churn", store, refresh)
+        store.customer_churn_model = load_artifact(LOCAL_PATH)
         
-        download_model_if_needed(MODEL_URL, LOCAL_PATH)
-        models.customer_churn_model = joblib.load(LOCAL_PATH)
+        if settings.COMPILED_PREPROCESSING_ENABLED:
+            store.customer_churn_builder = compile_feature_builder(
+                store.customer_churn_model, "customer_churn_model"
+            )
+        if settings.SCHEMA_VALIDATION_ENABLED:
+            model_data = store.customer_churn_model
+            store.customer_churn_schema = compile_record_schema(
+                "customer_churn_model",
+                model_data["numerical_cols"],
+                model_data["categorical_cols"],
+                [model_data["imputer_num"]],
+                model_data["scaler"],
+                model_data["encoder"],
+                require_all_keys=True,
+            )
+        if settings.COMPILED_TREES_ENABLED:
+            store.customer_churn_forest = load_derived(
+                LOCAL_PATH, "forest",
+                lambda: compile_forest(store.customer_churn_model["model"], "customer_churn_model"),
+            )
         logger.info("✅ Customer churn model loaded successfully")
         
     except Exception as e:
         logger.error(f"❌ Failed to load customer churn model: {str(e)}", exc_info=True)
 
-def load_uplift_treated_model():
+def load_uplift_treated_model(store: "ModelStore" = models, refresh: bool = False):
     """Load Uplift Treated Model"""
     try:
-        MODEL_URL = f"https://drive.google.com/uc?export=download&id={settings.UPLIFT_TREATED_MODEL_ID}"
-        LOCAL_PATH = f"{settings.MODELS_DIR}/uplift_treated_model.joblib"
+        [LOCAL_PATH] = fetch_model_files("uplift_treated", store, refresh)
+        store.uplift_treated_model = load_artifact(LOCAL_PATH)
         
-        download_model_if_needed(MODEL_URL, LOCAL_PATH)
-        models.uplift_treated_model = joblib.load(LOCAL_PATH)
+        if settings.COMPILED_TREES_ENABLED:
+            store.uplift_treated_forest = load_derived(
+                LOCAL_PATH, "forest",
+                lambda: compile_forest(store.uplift_treated_model, "uplift_treated_model"),
+            )
         logger.info("✅ Uplift Treated model loaded successfully")
         
     except Exception as e:
         logger.error(f"❌ Failed to load uplift treated model: {str(e)}", exc_info=True)  
         
 
-def load_uplift_control_model():
+def load_uplift_control_model(store: "ModelStore" = models, refresh: bool = False):
     """Load Uplift Control Model"""
     try:
-        MODEL_URL = f"https://drive.google.com/uc?export=download&id={settings.UPLIFT_CONTROL_MODEL_ID}"
-        LOCAL_PATH = f"{settings.MODELS_DIR}/uplift_control_model.joblib"
+        [LOCAL_PATH] = fetch_model_files("uplift_control", store, refresh)
+        store.uplift_control_model = load_artifact(LOCAL_PATH)
         
-        download_model_if_needed(MODEL_URL, LOCAL_PATH)
-        models.uplift_control_model = joblib.load(LOCAL_PATH)
+        if settings.COMPILED_TREES_ENABLED:
+            store.uplift_control_forest = load_derived(
+                LOCAL_PATH, "forest",
+                lambda: compile_forest(store.uplift_control_model, "uplift_control_model"),
+            )
         logger.info("✅ Uplift Control model loaded successfully")
         
     except Exception as e:
         logger.error(f"❌ Failed to load uplift control model: {str(e)}", exc_info=True)  
+
+
+def load_uplift_scorer(store: "ModelStore" = models):
+    """Fuse the compiled uplift forests into one scorer (needs both uplift models)"""
+    store.uplift_scorer = build_uplift_scorer(
+        store.uplift_treated_model,
+        store.uplift_control_model,
+        store.uplift_treated_forest,
+        store.uplift_control_forest,
+    )
     
     
-def load_all_models():
-    """Load all models on startup"""
+# Loader per model and the ModelStore attributes it must fill
+MODEL_LOADERS = {
+    "medical_charge": (load_medical_charge_models, ("smoker_model", "non_smoker_model")),
+    "heart_disease": (load_heart_disease_model, ("heart_disease_model",)),
+    "customer_churn": (load_customer_churn_model, ("customer_churn_model",)),
+    "uplift_treated": (load_uplift_treated_model, ("uplift_treated_model",)),
+    "uplift_control": (load_uplift_control_model, ("uplift_control_model",)),
+}
+
+# Packages the pickled estimators reference. Unpickling imports them lazily,
+# and concurrent first imports of sklearn from several loader threads can
+# deadlock on the import locks, so they are imported up front.
+MODEL_IMPORTS = (
+    "sklearn.linear_model",
+    "sklearn.ensemble",
+    "sklearn.impute",
+    "sklearn.preprocessing",
+)
+
+# Every ModelStore attribute a loader sets; activating a version replaces all of them
+MODEL_ATTRS = {
+    "medical_charge": ("smoker_model", "non_smoker_model", "smoker_kernel", "non_smoker_kernel"),
+    "heart_disease": ("heart_disease_model", "heart_disease_kernel", "heart_disease_transformer", "heart_disease_schema"),
+    "customer_churn": ("customer_churn_model", "customer_churn_builder", "customer_churn_schema", "customer_churn_forest"),
+    "uplift_treated": ("uplift_treated_model", "uplift_treated_forest"),
+    "uplift_control": ("uplift_control_model", "uplift_control_forest"),
+}
+
+registry = ModelRegistry(models, settings.MODEL_REGISTRY_MAX_VERSIONS)
+
+_scorer_lock = threading.Lock()
+
+# One lock per model so a model is never loaded by two threads at once
+_load_locks = {name: threading.Lock() for name in MODEL_LOADERS}
+
+# The in-flight or finished load per model; concurrent requests share it
+_load_futures: Dict[str, Future] = {}
+_futures_lock = threading.Lock()
+_loader_pool: Optional[ThreadPoolExecutor] = None
+
+
+def load_version(name: str, refresh: bool = False) -> Optional[ModelVersion]:
+    """
+    Load a model into a staging store and register it as a new version
+    
+    Nothing visible to requests changes until the version is activated.
+    Returns None if the loader failed.
+    """
+    loader, attrs = MODEL_LOADERS[name]
+    staging = ModelStore()
+    start = time.perf_counter()
+    
+    loader(staging, refresh)
+    
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if any(getattr(staging, attr) is None for attr in attrs):
+        logger.info(f"⏱️ {name} failed in {elapsed_ms:.0f} ms")
+        return None
+    
+    artifacts = {attr: getattr(staging, attr) for attr in MODEL_ATTRS[name]}
+    version = registry.register(name, artifacts, staging.files, elapsed_ms)
+    logger.info(f"⏱️ {name} v{version.version} loaded in {elapsed_ms:.0f} ms")
+    return version
+
+
+def activate_version(
+    version: ModelVersion, validate: Optional[Callable[[str, ModelStore], Dict[str, object]]] = None
+) -> ModelVersion:
+    """
+    Validate a loaded version against the other current models, then swap it in
+    
+    validate(name, view) scores a smoke request on the store as it would look
+    after the swap and raises if the version is unusable.
+    """
+    with _scorer_lock:
+        artifacts = version_artifacts(version)
+        check_version(version, artifacts, validate)
+        registry.activate(version, artifacts)
+    return version
+
+
+def version_artifacts(version: ModelVersion) -> Dict[str, object]:
+    """A version's ModelStore attributes, with the fused uplift scorer rebuilt around it"""
+    artifacts = dict(version.artifacts)
+    if version.name in ("uplift_treated", "uplift_control"):
+        # The fused uplift scorer pairs the version with the active forest of the other uplift model
+        view = models.snapshot()
+        view.swap(artifacts)
+        load_uplift_scorer(view)
+        artifacts["uplift_scorer"] = view.uplift_scorer
+    return artifacts
+
+
+def check_version(
+    version: ModelVersion,
+    artifacts: Dict[str, object],
+    validate: Optional[Callable[[str, ModelStore], Dict[str, object]]] = None,
+):
+    """Run validate on the store as it would look with the version's artifacts, rejecting it on failure"""
+    if validate is None:
+        return
+    view = models.snapshot()
+    view.swap(artifacts)
+    try:
+        version.smoke_test = validate(version.name, view)
+    except Exception as e:
+        registry.reject(version, str(e))
+        raise
+
+
+def load_model(name: str) -> bool:
+    """Load and activate a model's first version, recording its state and timing"""
+    with _load_locks[name]:
+        models.load_state[name] = LOADING
+        start = time.perf_counter()
+        
+        version = load_version(name)
+        if version is not None:
+            activate_version(version)
+        
+        loaded = version is not None
+        models.load_state[name] = LOADED if loaded else FAILED
+        models.load_times_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+    return loaded
+
+
+def reload_model(
+    name: str, validate: Optional[Callable[[str, ModelStore], Dict[str, object]]] = None, activate: bool = True
+) -> Dict[str, object]:
+    """
+    Load the latest artifact of a model in the background and hot-swap it in
+    
+    Requests keep being served by the current version while the new one
+    loads and passes validation. The files are fetched and hashed first, and
+    if they are unchanged nothing is loaded. With activate=False the new
+    version is only registered (for shadow or canary serving).
+    """
+    with _load_locks[name]:
+        active = registry.active(name)
+        if active is not None and model_file_hashes(name, refresh=True) == active.sha256:
+            logger.info(f"{name}: artifacts unchanged, keeping v{active.version}")
+            return {"changed": False, "active": active.describe()}
+        
+        # The cache now resolves the model's files to the blobs just fetched
+        version = load_version(name)
+        if version is None:
+            raise RuntimeError(f"Failed to load a new version of {name}")
+        
+        if active is not None and version.same_content(active):
+            registry.discard(version)
+            logger.info(f"{name}: artifacts unchanged, keeping v{active.version}")
+            return {"changed": False, "active": active.describe()}
+        
+        if not activate:
+            return {"changed": True, "version": version.describe()}
+        
+        activate_version(version, validate)
+        if models.load_state.get(name) == FAILED:
+            models.load_state[name] = LOADED
+        return {"changed": True, "active": version.describe()}
+
+
+def get_loader_pool() -> ThreadPoolExecutor:
+    """Return the model loading pool, creating it on first use"""
+    global _loader_pool
+    if _loader_pool is None:
+        for module in MODEL_IMPORTS:
+            importlib.import_module(module)
+        _loader_pool = ThreadPoolExecutor(
+            max_workers=max(1, min(settings.MODEL_LOAD_WORKERS, len(MODEL_LOADERS))),
+            thread_name_prefix="model-loader",
+        )
+    return _loader_pool
+
+
+def shutdown_loader_pool():
+    """Stop the idle loader threads, e.g. before the gunicorn master forks workers"""
+    global _loader_pool
+    if _loader_pool is not None:
+        _loader_pool.shutdown(wait=True)
+        _loader_pool = None
+
+
+def submit_model_load(name: str) -> Future:
+    """Start loading a model unless a load is already running or has succeeded"""
+    with _futures_lock:
+        future = _load_futures.get(name)
+        if future is not None:
+            return future
+        models.load_state[name] = LOADING
+        future = get_loader_pool().submit(load_model, name)
+        _load_futures[name] = future
+    # Outside the lock: the callback runs at once if the load already finished
+    future.add_done_callback(partial(_forget_failed_load, name))
+    return future
+
+
+def _forget_failed_load(name: str, future: Future):
+    """Drop a failed load so the next request for the model starts a fresh one"""
+    if not future.cancelled() and future.exception() is None and future.result():
+        return
+    with _futures_lock:
+        if _load_futures.get(name) is future:
+            del _load_futures[name]
+
+
+def start_model_loading() -> Dict[str, Future]:
+    """
+    Load every model concurrently in a thread pool and return at once
+    
+    Downloads (I/O) and unpickling/compilation of different models overlap;
+    each model becomes usable as soon as its own loader finishes.
+    """
     logger.info("Loading all models...")
-    load_medical_charge_models()
-    load_heart_disease_model()
-    load_customer_churn_model()
-    load_uplift_treated_model()
-    load_uplift_control_model()
-    logger.info("Model loading complete!")
\ No newline at end of file
+    start = time.perf_counter()
+    futures = {name: submit_model_load(name) for name in MODEL_LOADERS}
+    
+    remaining = [len(futures)]
+    remaining_lock = threading.Lock()
+    
+    def log_complete(_):
+        with remaining_lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        loaded = sum(state == LOADED for state in models.load_state.values())
+        logger.info(
+            f"Model loading complete! {loaded}/{len(MODEL_LOADERS)} loaded "
+            f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+    
+    for future in futures.values():
+        future.add_done_callback(log_complete)
+    return futures
+
+
+def load_all_models():
+    """Load all models on startup, returning once every loader has finished"""
+    wait(start_model_loading().values())
+
+
+async def load_models(*names: str) -> bool:
+    """Load the named models if needed, waiting without blocking the event loop"""
+    results = await asyncio.gather(
+        *(asyncio.wrap_future(submit_model_load(name)) for name in names)
+    )
+    return all(results)
+
+
+def check_model_loading(*names: str):
+    """Raise ModelLoading if any of the named models is still being loaded"""
+    for name in names:
+        if models.load_state.get(name) == LOADING:
+            raise ModelLoading(name)
+
+
+async def ensure_models(*names: str):
+    """
+    Make sure the named models can serve a request
+    
+    In lazy mode a model is loaded on first use; concurrent first requests
+    all wait on the same load. Otherwise a model still loading after a
+    degraded startup raises ModelLoading.
+    """
+    if all(models.load_state.get(name) in READY_STATES for name in names):
+        return
+    if settings.MODEL_LAZY_LOADING:
+        await load_models(*names)
+    else:
+        check_model_loading(*names)
+
+
+def mark_warm(*names: str):
+    """Record that the named models have served a warmup inference"""
+    for name in names:
+        if models.load_state.get(name) == LOADED:
+            models.load_state[name] = WARM
+
+
+def load_states() -> Dict[str, Dict[str, object]]:
+    """Load state and load time per model"""
+    return {
+        name: {
+            "state": models.load_state.get(name, NOT_LOADED),
+            "load_time_ms": models.load_times_ms.get(name),
+        }
+        for name in MODEL_LOADERS
+    }
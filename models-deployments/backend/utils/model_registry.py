@@ -0,0 +1,155 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config.logging_config import logger
+
+# Version statuses
+ACTIVE = "active"
+STANDBY = "standby"
+REJECTED = "rejected"
+SHADOW = "shadow"
+CANARY = "canary"
+
+
+def feature_schema(artifacts: Dict[str, Any]) -> Optional[List[str]]:
+    """Input columns a model version expects, read from its bundle or estimator"""
+    for artifact in artifacts.values():
+        if isinstance(artifact, dict):
+            numeric = artifact.get("numeric_cols") or artifact.get("numerical_cols")
+            if numeric is not None:
+                return list(numeric) + list(artifact.get("categorical_cols", []))
+        names = getattr(artifact, "feature_names_in_", None)
+        if names is not None:
+            return [str(name) for name in names]
+        n_features = getattr(artifact, "n_features_in_", None)
+        if n_features is not None:
+            return [f"x{i}" for i in range(n_features)]
+    return None
+
+
+class ModelVersion:
+    """One loaded version of a model and what is known about it"""
+
+    def __init__(self, name: str, version: int, artifacts: Dict[str, Any], files: Dict[str, str], load_time_ms: float):
+        self.name = name
+        self.version = version
+        self.artifacts = artifacts
+        self.files = files
+        self.load_time_ms = round(load_time_ms, 1)
+        self.loaded_at = datetime.utcnow().isoformat()
+        self.activated_at: Optional[str] = None
+        self.status = STANDBY
+        self.error: Optional[str] = None
+        self.smoke_test: Optional[Dict[str, Any]] = None
+        # Artifact cache blobs are named by their SHA-256
+        self.sha256 = {file: os.path.basename(path) for file, path in files.items()}
+        self.size_bytes = sum(os.path.getsize(path) for path in files.values() if os.path.exists(path))
+        self.feature_schema = feature_schema(artifacts)
+
+    def same_content(self, other: "ModelVersion") -> bool:
+        return self.sha256 == other.sha256
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "status": self.status,
+            "sha256": self.sha256,
+            "size_bytes": self.size_bytes,
+            "load_time_ms": self.load_time_ms,
+            "loaded_at": self.loaded_at,
+            "activated_at": self.activated_at,
+            "feature_schema": self.feature_schema,
+            "smoke_test": self.smoke_test,
+            "error": self.error,
+        }
+
+
+class ModelRegistry:
+    """
+    Loaded versions of every model, one of them active
+
+    Activating a version replaces its ModelStore attributes in a single
+    dict update, so a request always sees either the old or the new set.
+    Requests already running keep the objects they took from their
+    snapshot. Old standby and rejected versions past max_versions are
+    dropped; shadow and canary candidates are kept until detached.
+    """
+
+    def __init__(self, store, max_versions: int):
+        self.store = store
+        self.max_versions = max(1, max_versions)
+        self._versions: Dict[str, "OrderedDict[int, ModelVersion]"] = {}
+        self._next_version: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, artifacts: Dict[str, Any], files: Dict[str, str], load_time_ms: float) -> ModelVersion:
+        with self._lock:
+            number = self._next_version.get(name, 1)
+            self._next_version[name] = number + 1
+            version = ModelVersion(name, number, artifacts, files, load_time_ms)
+            self._versions.setdefault(name, OrderedDict())[number] = version
+            return version
+
+    def get(self, name: str, version: int) -> ModelVersion:
+        """Return a version, raising KeyError for unknown names or versions"""
+        with self._lock:
+            return self._versions[name][version]
+
+    def active(self, name: str) -> Optional[ModelVersion]:
+        with self._lock:
+            for version in self._versions.get(name, {}).values():
+                if version.status == ACTIVE:
+                    return version
+            return None
+
+    def reject(self, version: ModelVersion, error: str):
+        with self._lock:
+            version.status = REJECTED
+            version.error = error
+            self._prune(version.name)
+
+    def discard(self, version: ModelVersion):
+        """Forget a version that will never be activated"""
+        with self._lock:
+            self._versions[version.name].pop(version.version, None)
+
+    def set_status(self, version: ModelVersion, status: str):
+        """Mark an inactive version as a shadow or canary candidate, or back to standby"""
+        with self._lock:
+            if version.status in (ACTIVE, REJECTED):
+                raise ValueError(f"{version.name} v{version.version} is {version.status}")
+            version.status = status
+            self._prune(version.name)
+
+    def activate(self, version: ModelVersion, artifacts: Dict[str, Any]):
+        """Swap a version's artifacts into the store and make it the active one"""
+        if version.status == REJECTED:
+            raise ValueError(f"{version.name} v{version.version} failed validation and cannot be activated")
+        with self._lock:
+            self.store.swap(artifacts)
+            for other in self._versions[version.name].values():
+                if other.status == ACTIVE:
+                    other.status = STANDBY
+            version.status = ACTIVE
+            version.activated_at = datetime.utcnow().isoformat()
+            self._prune(version.name)
+        logger.info(f"🔁 {version.name} v{version.version} is now active")
+
+    def _prune(self, name: str):
+        """Forget the oldest standby and rejected versions past max_versions (lock held)"""
+        versions = self._versions[name]
+        for number in list(versions):
+            if len(versions) <= self.max_versions:
+                break
+            if versions[number].status in (STANDBY, REJECTED):
+                del versions[number]
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                name: [version.describe() for version in versions.values()]
+                for name, versions in self._versions.items()
+            }
@@ -0,0 +1,91 @@
+import asyncio
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config.logging_config import logger
+from config.settings import settings
+from utils.model_loader import MODEL_LOADERS, ModelStore, registry, reload_model
+
+FileStat = Optional[Tuple[int, int]]
+
+
+def file_stat(path: str) -> FileStat:
+    """Size and modification time of a file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ModelWatcher:
+    """
+    Poll the model files in MODELS_DIR and hot-reload a model when one changes
+
+    A change is acted on once the file has stayed the same for a full
+    interval, so a file still being copied in is never loaded half-written.
+    Polling needs no extra dependency and works on any filesystem,
+    including bind mounts where inotify events don't arrive.
+    """
+
+    def __init__(
+        self, models_dir: str, interval: float, validate: Optional[Callable[[str, ModelStore], Dict[str, Any]]] = None
+    ):
+        self.models_dir = models_dir
+        self.interval = max(0.1, interval)
+        self.validate = validate
+        self._seen: Dict[str, FileStat] = {}
+        self._pending: Dict[str, FileStat] = {}
+
+    def _watched_files(self) -> Dict[str, str]:
+        """Path of every file behind an active model version -> model name"""
+        watched = {}
+        for name in MODEL_LOADERS:
+            version = registry.active(name)
+            if version is not None:
+                for file in version.files:
+                    watched[os.path.join(self.models_dir, file)] = name
+        return watched
+
+    async def poll(self):
+        """Check every watched file once and reload the models whose files settled"""
+        changed = set()
+        for path, name in self._watched_files().items():
+            stat = file_stat(path)
+            if path not in self._seen:
+                self._seen[path] = stat
+                continue
+            if stat == self._seen[path]:
+                self._pending.pop(path, None)
+                continue
+            if stat is not None and self._pending.get(path) == stat:
+                # Unchanged since the last poll: the copy is complete
+                del self._pending[path]
+                self._seen[path] = stat
+                changed.add(name)
+            else:
+                self._pending[path] = stat
+
+        for name in sorted(changed):
+            logger.info(f"Model file of {name} changed, reloading")
+            try:
+                await asyncio.to_thread(reload_model, name, self.validate)
+            except Exception as e:
+                logger.error(f"❌ Hot reload of {name} failed: {str(e)}", exc_info=True)
+
+    async def run(self):
+        logger.info(f"Watching {self.models_dir} for new model versions every {self.interval:g}s")
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Model watcher error: {str(e)}", exc_info=True)
+
+
+def start_model_watcher(validate: Optional[Callable[[str, ModelStore], Dict[str, Any]]] = None) -> asyncio.Task:
+    """Run the models directory watcher as a background task"""
+    watcher = ModelWatcher(settings.MODELS_DIR, settings.MODEL_WATCH_INTERVAL_SECONDS, validate)
+    return asyncio.create_task(watcher.run())
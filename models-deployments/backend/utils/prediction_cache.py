@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import settings
+from utils.metrics import metrics
+from utils.model_loader import models
+
+# ModelStore attributes whose replacement invalidates a model's cached results
+MODEL_ARTIFACTS = {
+    "medical_charge": ("smoker_model", "non_smoker_model"),
+    "heart_disease": ("heart_disease_model",),
+    "customer_churn": ("customer_churn_model",),
+    "customer_uplift": ("uplift_treated_model", "uplift_control_model"),
+}
+
+
+def canonical_key(record: Any) -> str:
+    """Hash a validated input so equal payloads map to the same key regardless of field order"""
+    if hasattr(record, "model_dump"):
+        record = record.model_dump()
+    payload = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of prediction results with a per-entry TTL
+
+    Entries are tied to the ModelStore artifacts they were computed with; as
+    soon as any of those objects is replaced (reload, new version) the whole
+    cache is dropped. The generation counts those replacements so a result
+    computed on the old models and stored after the swap is discarded.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._artifacts: Tuple[Any, ...] = ()
+        self.generation = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_artifacts(self):
+        """Drop every entry if the model objects changed since they were cached (lock held)"""
+        current = tuple(getattr(models, attr) for attr in MODEL_ARTIFACTS.get(self.name, ()))
+        if len(current) != len(self._artifacts) or any(
+            new is not old for new, old in zip(current, self._artifacts)
+        ):
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            # Holding the objects keeps their identity from being reused
+            self._artifacts = current
+            self.generation += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None"""
+        with self._lock:
+            self._check_artifacts()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, result = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def current_generation(self) -> int:
+        with self._lock:
+            self._check_artifacts()
+            return self.generation
+
+    def put(self, key: str, result: Dict[str, Any], generation: Optional[int] = None):
+        """
+        Store a result, evicting the least recently used entries past max_entries
+
+        generation is the value of current_generation() before the result was
+        computed; the result is dropped if the models changed since.
+        """
+        with self._lock:
+            self._check_artifacts()
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+caches: Dict[str, PredictionCache] = {}
+
+
+def get_cache(name: str) -> Optional[PredictionCache]:
+    """Return the result cache for a model (None when caching is disabled)"""
+    if not settings.PREDICTION_CACHE_ENABLED:
+        return None
+    cache = caches.get(name)
+    if cache is None:
+        cache = PredictionCache(
+            name,
+            settings.PREDICTION_CACHE_MAX_ENTRIES,
+            settings.PREDICTION_CACHE_TTL_SECONDS,
+        )
+        caches[name] = cache
+    return cache
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return statistics for every active prediction cache"""
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def _cache_counts(field: str):
+    return lambda: {(name,): getattr(cache, field) for name, cache in list(caches.items())}
+
+
+metrics.callback("prediction_cache_hits_total", "Prediction cache hits", "counter", ("model",), _cache_counts("hits"))
+metrics.callback("prediction_cache_misses_total", "Prediction cache misses", "counter", ("model",), _cache_counts("misses"))
+metrics.callback(
+    "prediction_cache_entries", "Results held in the prediction cache", "gauge", ("model",),
+    lambda: {(name,): len(cache._entries) for name, cache in list(caches.items())},
+)
@@ -0,0 +1,192 @@
+import sys
+from numbers import Real
+from operator import le
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.logging_config import logger
+from config.settings import settings
+from utils.batch import RecordValidationError
+
+# Bounds used when range checks are off; still rejects infinity
+UNBOUNDED = (-sys.float_info.max, sys.float_info.max)
+
+NUMBER_TYPES = frozenset([int, float])
+
+
+class RecordSchema:
+    """
+    Strict decoder for one model's raw records, compiled from its fitted pipeline
+
+    Numeric columns must be numbers (not booleans or numeric strings) within
+    the scaler's training range, widened by SCHEMA_RANGE_MARGIN; categorical
+    columns must be one of the encoder's categories. Columns the pipeline
+    imputes may be null (or NaN, as empty CSV cells are). Everything is
+    checked with plain dict lookups before the record reaches pandas or the
+    feature builders; other keys are ignored.
+    """
+
+    def __init__(
+        self,
+        numeric: List[Tuple[str, float, float, bool]],
+        categorical: List[Tuple[str, frozenset, bool]],
+        require_all_keys: bool,
+    ):
+        # (column, low, high, nullable) and (column, categories, nullable)
+        self.numeric = numeric
+        self.categorical = categorical
+        self.require_all_keys = require_all_keys
+
+        # Flattened for the fast path, which checks whole records with C-level map() and set operations
+        self.numeric_cols = [col for col, *_ in numeric]
+        self.lows = [low for _, low, _, _ in numeric]
+        self.highs = [high for _, _, high, _ in numeric]
+        self.category_cols = [col for col, *_ in categorical]
+        self.category_pairs = frozenset(
+            (col, category) for col, categories, _ in categorical for category in categories
+        )
+        self.columns = self.numeric_cols + self.category_cols
+
+    def check_keys(self, record: Dict[str, Any]):
+        if self.require_all_keys:
+            missing = [col for col in self.columns if col not in record]
+            if missing:
+                raise RecordValidationError(f"Missing required fields: {missing}")
+
+    def validate(self, record: Any) -> Dict[str, Any]:
+        """Return the record unchanged, or raise RecordValidationError naming the first bad field"""
+        if not isinstance(record, dict) or not record:
+            raise RecordValidationError("No data provided")
+
+        get = record.get
+        values = list(map(get, self.numeric_cols))
+        # Plain numbers within range (NaN fails the comparisons) need no per-column checks
+        if not (
+            {*map(type, values)} <= NUMBER_TYPES
+            and all(map(le, self.lows, values))
+            and all(map(le, values, self.highs))
+        ):
+            self.check_numeric(record)
+
+        # Every categorical value known: one set operation
+        try:
+            if self.category_pairs.issuperset(zip(self.category_cols, map(get, self.category_cols))):
+                return record
+        except TypeError:
+            pass
+
+        self.check_categorical(record)
+        return record
+
+    def check_numeric(self, record: Dict[str, Any]):
+        """Find and report the bad numeric field, column by column"""
+        get = record.get
+        for col, low, high, nullable in self.numeric:
+            value = get(col)
+            kind = value.__class__
+            if kind is not float and kind is not int:
+                if value is None:
+                    if col not in record:
+                        self.check_keys(record)
+                    if nullable:
+                        continue
+                    raise RecordValidationError(f"Missing required field: {col}")
+                if isinstance(value, bool) or not isinstance(value, Real):
+                    raise RecordValidationError(f"Invalid numeric value for field: {col}")
+            elif value != value:
+                if nullable:
+                    continue
+                raise RecordValidationError(f"Missing required field: {col}")
+            if not low <= value <= high:
+                raise RecordValidationError(
+                    f"Value out of range for field {col}: {value} (expected {low:g} to {high:g})"
+                )
+
+    def check_categorical(self, record: Dict[str, Any]):
+        """Find and report the bad categorical field, column by column"""
+        self.check_keys(record)
+        get = record.get
+        for col, categories, nullable in self.categorical:
+            value = get(col)
+            if value.__class__ is str:
+                if value in categories:
+                    continue
+            elif value is None or (isinstance(value, float) and value != value):
+                if nullable:
+                    continue
+                raise RecordValidationError(f"Missing required field: {col}")
+            raise RecordValidationError(
+                f"Invalid value for field {col}: {value!r}. Allowed: {sorted(categories)}"
+            )
+
+    def describe(self) -> Dict[str, Any]:
+        """The compiled rules, for logs and benchmarks"""
+        return {
+            "numeric": {col: {"min": low, "max": high, "nullable": nullable} for col, low, high, nullable in self.numeric},
+            "categorical": {col: {"allowed": sorted(categories), "nullable": nullable} for col, categories, nullable in self.categorical},
+            "require_all_keys": self.require_all_keys,
+        }
+
+
+def training_ranges(scaler, numeric_cols: List[str], margin: float) -> Dict[str, Tuple[float, float]]:
+    """
+    Allowed range per numeric column: the MinMaxScaler's training min/max widened
+    by `margin` times the span on each side, without going below zero for
+    columns that were never negative (no range checks for other scalers or a
+    negative margin)
+    """
+    if margin < 0 or not hasattr(scaler, "data_min_"):
+        return {col: UNBOUNDED for col in numeric_cols}
+    if list(scaler.feature_names_in_) != list(numeric_cols):
+        raise ValueError("Scaler columns do not match the numeric columns")
+
+    ranges = {}
+    for col, low, high in zip(numeric_cols, scaler.data_min_, scaler.data_max_):
+        span = (high - low) or abs(high) or 1.0
+        ranges[col] = (
+            float(max(low - margin * span, 0.0) if low >= 0 else low - margin * span),
+            float(high + margin * span),
+        )
+    return ranges
+
+
+def compile_record_schema(
+    name: str,
+    numeric_cols: List[str],
+    categorical_cols: List[str],
+    imputers: list,
+    scaler,
+    encoder,
+    require_all_keys: bool,
+) -> Optional[RecordSchema]:
+    """
+    Build a model's RecordSchema from its bundle: column lists, the imputers
+    (which columns may be null), the scaler (ranges) and the one-hot encoder
+    (categories)
+
+    Returns None (so callers keep their previous validation) if the bundle
+    does not have what the schema needs.
+    """
+    try:
+        nullable = {col for imputer in imputers for col in imputer.feature_names_in_}
+        ranges = training_ranges(scaler, numeric_cols, settings.SCHEMA_RANGE_MARGIN)
+        if len(encoder.categories_) != len(categorical_cols):
+            raise ValueError("Encoder categories do not match the categorical columns")
+
+        numeric = [(col, *ranges[col], col in nullable) for col in numeric_cols]
+        categorical = [
+            (
+                col,
+                frozenset(category for category in categories if isinstance(category, str)),
+                col in nullable,
+            )
+            for col, categories in zip(categorical_cols, encoder.categories_)
+        ]
+        if any(not categories for _, categories, _ in categorical):
+            raise ValueError("Encoder has a column without string categories")
+
+        logger.info(f"Record schema compiled for {name} ({len(numeric)} numeric, {len(categorical)} categorical)")
+        return RecordSchema(numeric, categorical, require_all_keys)
+
+    except Exception as e:
+        logger.warning(f"Record schema disabled for {name}, using route validation: {str(e)}")
+        return None
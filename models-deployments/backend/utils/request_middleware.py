@@ -0,0 +1,117 @@
+import itertools
+import os
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config.logging_config import logger, sample_request_log
+from utils.metrics import observe_request
+
+# Request IDs are this process's prefix plus a counter: unique across workers and
+# restarts, and much cheaper than a uuid4 per request
+_ID_PREFIX = f"{os.getpid():x}-{uuid.uuid4().hex[:8]}"
+_request_counter = itertools.count(1)
+
+
+def next_request_id() -> str:
+    return f"{_ID_PREFIX}-{next(_request_counter):x}"
+
+
+def route_name(scope: Scope) -> str:
+    """Path template of the matched route, so metrics labels stay bounded"""
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+class RequestLoggingMiddleware:
+    """
+    Log, time and count every HTTP request, and add the X-Request-ID and
+    X-Process-Time headers
+
+    A plain ASGI middleware: bodies are passed through untouched in both
+    directions, so streaming uploads and responses are never buffered. The
+    request is timed to the start of the response, as before.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_ns = time.perf_counter_ns()
+        request_id = next_request_id()
+        method = scope["method"]
+        path = scope.get("root_path", "") + scope["path"]
+
+        # Add request_id to request state (read by the exception handler)
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        # Sampled requests log both records, so started/completed pairs stay matched
+        sampled = sample_request_log()
+
+        # Log incoming request
+        if sampled:
+            client = scope.get("client")
+            logger.info(
+                "Request started",
+                extra={
+                    "request_id": request_id,
+                    "method": method,
+                    "path": path,
+                    "client_ip": client[0] if client else "unknown",
+                }
+            )
+
+        response_started = False
+
+        async def send_with_headers(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
+                status_code = message["status"]
+
+                # Log response (server errors are always logged)
+                if sampled or status_code >= 500:
+                    logger.info(
+                        "Request completed",
+                        extra={
+                            "request_id": request_id,
+                            "method": method,
+                            "path": path,
+                            "status_code": status_code,
+                            "duration_ms": round(duration_ms, 2),
+                        }
+                    )
+
+                # Add custom headers
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-request-id", request_id.encode()),
+                    (b"x-process-time", str(round(duration_ms, 2)).encode()),
+                ]
+
+                observe_request(route_name(scope), method, status_code, duration_ms / 1000)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception as e:
+            duration_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            logger.error(
+                f"Request failed: {str(e)}",
+                extra={
+                    "request_id": request_id,
+                    "method": method,
+                    "path": path,
+                    "duration_ms": round(duration_ms, 2),
+                },
+                exc_info=True
+            )
+            if not response_started:
+                observe_request(route_name(scope), method, 500, duration_ms / 1000)
+            raise
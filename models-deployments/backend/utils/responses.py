@@ -0,0 +1,68 @@
+import json
+import re
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel
+
+from config.settings import settings
+from utils.metrics import MetricsJSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson writes exponents as 1e-5 / 1e16 where json.dumps writes 1e-05 / 1e+16, and NaN and infinity as null
+_RECHECK = re.compile(rb"\d[eE]|null")
+
+
+def render_json(content: Any) -> bytes:
+    """
+    The bytes JSONResponse.render produces, encoded with orjson when available
+
+    Both write compact separators, raw UTF-8 and the shortest round-tripping
+    float digits, and agree everywhere except floats in exponent notation and
+    NaN/infinity (which orjson writes as null), so bodies that may contain
+    either (any digit followed by an "e", or a null) are encoded again with
+    json.dumps, as are values orjson refuses (integers beyond 64 bits,
+    non-string keys). NaN and infinity therefore raise ValueError, as in
+    JSONResponse.
+    """
+    if orjson is not None and settings.FAST_RESPONSES:
+        try:
+            body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+        except orjson.JSONEncodeError:
+            body = None
+        if body is not None and _RECHECK.search(body) is None:
+            return body
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(MetricsJSONResponse):
+    """MetricsJSONResponse encoded with render_json"""
+
+    def encode(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+def json_response(content: Any, response_model: Optional[Type[BaseModel]] = None) -> Any:
+    """
+    Return a route's response body, skipping FastAPI's response processing when FAST_RESPONSES is on
+
+    Returning a Response from a route bypasses response_model validation and
+    jsonable_encoder, which walk every value of the body again. The content
+    must already be plain JSON types in the response model's field order.
+    Otherwise the route returns what it did before (the response model, or
+    the dict itself).
+    """
+    if settings.FAST_RESPONSES:
+        return FastJSONResponse(content)
+    if response_model is not None:
+        return response_model(**content)
+    return content
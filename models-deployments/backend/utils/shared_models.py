@@ -0,0 +1,58 @@
+import os
+from typing import Any, Callable, Optional
+
+import joblib
+
+from config.logging_config import logger
+from config.settings import settings
+
+# Bump when a shared object's class layout changes so stale copies are rebuilt
+SHARED_FORMAT_VERSION = 1
+
+
+def artifact_key(path: str) -> str:
+    """Name for a model file's shared copies; changes whenever the file is replaced"""
+    stat = os.stat(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return f"{name}-{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def share(key: str, build: Callable[[], Optional[Any]]) -> Optional[Any]:
+    """
+    Return build()'s result memory-mapped from SHARED_MODELS_DIR
+
+    The first process to need an object writes it once as an uncompressed
+    joblib file; every process then loads it with mmap_mode="r", so NumPy
+    arrays inside it are read-only views of the same page-cache pages
+    instead of private heap copies. Returns None if build() does.
+    """
+    path = os.path.join(settings.SHARED_MODELS_DIR, f"{key}.v{SHARED_FORMAT_VERSION}.joblib")
+    if not os.path.exists(path):
+        obj = build()
+        if obj is None:
+            return None
+        os.makedirs(settings.SHARED_MODELS_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+        logger.info(f"Shared model file written: {path}")
+    return joblib.load(path, mmap_mode="r")
+
+
+def load_artifact(path: str) -> Any:
+    """Load a joblib model file, memory-mapped from its shared copy in shared mode"""
+    if not settings.SHARED_MODELS_ENABLED:
+        return joblib.load(path)
+    return share(artifact_key(path), lambda: joblib.load(path))
+
+
+def load_derived(source_path: str, kind: str, build: Callable[[], Optional[Any]]) -> Optional[Any]:
+    """
+    Build an object compiled from a model file (e.g. a flattened forest)
+
+    In shared mode the compiled result is cached next to the shared model
+    copy, keyed by the source file, and memory-mapped like it.
+    """
+    if not settings.SHARED_MODELS_ENABLED:
+        return build()
+    return share(f"{artifact_key(source_path)}-{kind}", build)
@@ -0,0 +1,259 @@
+import codecs
+import csv
+import json
+import math
+import tempfile
+import zlib
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from config.logging_config import logger
+from config.settings import settings
+from utils.batch import RecordValidationError, score_batch
+from utils.inference_executor import run_inference
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SPOOL_READ_SIZE = 1 << 16
+
+# pandas.read_csv's default na_values (pandas._libs.parsers.STR_NA_VALUES)
+CSV_NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+
+
+class InvalidRecord:
+    """Placeholder for an input line that could not be parsed"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that may start answering while the request body is still
+    being read
+
+    Starlette's StreamingResponse listens for client disconnects on the same
+    receive channel the body generator reads the upload from, which would
+    swallow request chunks. Here a disconnect surfaces as a failed send or a
+    ClientDisconnect from request.stream() instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def validate_stream_record(validate_record: Callable[[Any], Any], record: Any) -> Any:
+    """Report unparseable lines as per-record errors, then apply the router's validation"""
+    if isinstance(record, InvalidRecord):
+        raise RecordValidationError(record.error)
+    return validate_record(record)
+
+
+def parse_csv_value(value: str) -> Any:
+    """
+    Turn a CSV cell into a number where it looks like one; empty cells and
+    pandas' default NA tokens ("None", "NA", "null", ...) are missing (NaN), as
+    in the pandas.read_csv calls the models were trained from
+    """
+    stripped = value.strip()
+    if stripped in CSV_NA_VALUES:
+        return math.nan
+    try:
+        return int(stripped)
+    except ValueError:
+        pass
+    try:
+        return float(stripped)
+    except ValueError:
+        return value
+
+
+async def spool_body(request: Request) -> tempfile.SpooledTemporaryFile:
+    """Copy the request body to a temporary file that only stays in memory while small"""
+    spool = tempfile.SpooledTemporaryFile(max_size=settings.STREAM_SPOOL_MAX_MEMORY)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return spool
+
+
+async def iter_spooled(spool: tempfile.SpooledTemporaryFile) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = spool.read(SPOOL_READ_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        spool.close()
+
+
+async def iter_lines(body: AsyncIterator[bytes], content_encoding: str) -> AsyncIterator[str]:
+    """Decode body chunks incrementally into text lines (gzip request bodies supported)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    inflater = None
+    if "gzip" in content_encoding.lower():
+        inflater = zlib.decompressobj(wbits=31)
+
+    pending = ""
+    async for chunk in body:
+        if inflater is not None:
+            chunk = inflater.decompress(chunk)
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    if inflater is not None:
+        pending += decoder.decode(inflater.flush())
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def parse_ndjson_line(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return InvalidRecord(f"Invalid JSON: {str(e)}")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Any]:
+    """One record per non-empty NDJSON line"""
+    async for line in lines:
+        if line.strip():
+            yield parse_ndjson_line(line)
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Any]:
+    """One record per CSV row, keyed by the header row"""
+    header = None
+    pending = []
+
+    async for line in lines:
+        # Quoted fields may span lines; wait until the quotes balance
+        pending.append(line)
+        if sum(part.count('"') for part in pending) % 2:
+            continue
+        row_text, pending = "\n".join(pending), []
+        if not row_text.strip():
+            continue
+
+        row = next(csv.reader([row_text]))
+        if header is None:
+            header = [name.strip() for name in row]
+            continue
+        if len(row) != len(header):
+            yield InvalidRecord(f"Expected {len(header)} CSV fields, got {len(row)}")
+            continue
+        yield {name: parse_csv_value(value) for name, value in zip(header, row)}
+
+    if pending:
+        yield InvalidRecord("Unterminated quoted CSV field")
+
+
+async def iter_record_chunks(lines: AsyncIterator[str], input_format: str, chunk_size: int) -> AsyncIterator[List[Any]]:
+    """Group parsed records into lists of at most chunk_size"""
+    records = iter_csv_records(lines) if input_format == "csv" else iter_ndjson_records(lines)
+    chunk = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_default(value: Any) -> Any:
+    # numpy scalars (labels taken from classes_, etc.)
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_results(results: List[Dict[str, Any]], offset: int) -> bytes:
+    """Serialize chunk results as NDJSON, with indices counted from the start of the upload"""
+    lines = []
+    for result in results:
+        result["index"] += offset
+        lines.append(json.dumps(result, default=_json_default))
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def stream_results(
+    name: str,
+    lines: AsyncIterator[str],
+    input_format: str,
+    validate_record: Callable[[Any], Any],
+    score_records: Callable[[List[Any]], List[Dict[str, Any]]],
+    compress: bool,
+) -> AsyncIterator[bytes]:
+    """Score the upload chunk by chunk, yielding NDJSON results as each chunk completes"""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    validate = partial(validate_stream_record, validate_record)
+    offset = 0
+
+    def emit(body: bytes) -> bytes:
+        if compressor is None:
+            return body
+        # Sync flush so every chunk reaches the client without waiting for the next
+        return compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    try:
+        async for chunk in iter_record_chunks(lines, input_format, settings.STREAM_CHUNK_SIZE):
+            results = await run_inference(score_batch, chunk, validate, score_records)
+            yield emit(encode_results(results, offset))
+            offset += len(chunk)
+
+        logger.info(f"{name} streaming prediction completed: {offset} records")
+
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band and stop
+        logger.error(f"{name} streaming prediction error after {offset} records: {str(e)}", exc_info=True)
+        yield emit(json.dumps({"success": False, "error": "Streaming prediction aborted", "records": offset}).encode() + b"\n")
+
+    if compressor is not None:
+        yield compressor.flush()
+
+
+async def stream_predictions(
+    name: str,
+    request: Request,
+    validate_record: Callable[[Any], Any],
+    score_records: Callable[[List[Any]], List[Dict[str, Any]]],
+) -> StreamingResponse:
+    """
+    Build the streaming response for a CSV or NDJSON upload
+
+    The input format follows the Content-Type (text/csv, otherwise NDJSON).
+    Results are gzip-compressed when the client accepts gzip. With
+    STREAM_SPOOL_UPLOAD the upload is first copied to a temporary file before
+    the response starts; it is only needed behind middleware that competes
+    with the endpoint for request body messages (Starlette's
+    BaseHTTPMiddleware does).
+    """
+    input_format = "csv" if "csv" in request.headers.get("content-type", "").lower() else "ndjson"
+    compress = "gzip" in request.headers.get("accept-encoding", "").lower()
+
+    body = request.stream()
+    if settings.STREAM_SPOOL_UPLOAD:
+        body = iter_spooled(await spool_body(request))
+    lines = iter_lines(body, request.headers.get("content-encoding", ""))
+
+    headers = {"Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    return UploadStreamingResponse(
+        stream_results(name, lines, input_format, validate_record, score_records, compress),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers,
+    )
@@ -0,0 +1,281 @@
+import copy
+import numpy as np
+from typing import Optional
+
+from config.logging_config import logger
+from config.settings import settings
+
+# (trees x rows) cursors advanced together per chunk; sized to stay cache-friendly
+CHUNK_NODES = 1 << 16
+
+
+def _floor_float32(values: np.ndarray) -> np.ndarray:
+    """
+    Round float64 thresholds down to the nearest float32
+
+    sklearn casts X to float32 and compares it against float64 thresholds. For
+    any float32 x, x <= t holds exactly when x <= floor32(t), so storing the
+    rounded-down threshold keeps every split decision bit-identical.
+    """
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+class CompiledForest:
+    """
+    Flattened, contiguous array form of a fitted sklearn forest classifier
+
+    All trees share one set of node arrays, and leaf class probabilities are
+    stored per class as ``values[class, node_id]``. Every node owns two
+    consecutive slots (2 * node_id and 2 * node_id + 1): ``feature`` and
+    ``threshold`` hold the split for both slots, and ``children`` maps slot
+    ``2 * node_id + go_left`` to the first slot of the next node. Leaves point
+    back at themselves, so a batch is evaluated by advancing every (tree, row)
+    cursor one level at a time for max_depth levels with a handful of
+    whole-array gathers per level.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        missing_left: np.ndarray,
+        values: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: np.ndarray,
+        n_features: int,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.values = values
+        self.roots = roots
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_features = n_features
+        self.n_trees = len(roots)
+        self.n_nodes = values.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "CompiledForest":
+        """Compile a fitted RandomForestClassifier/ExtraTreesClassifier"""
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Only single-output forests are supported")
+
+        n_classes = len(forest.classes_)
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            missing.append(
+                np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool)
+                & ~is_leaf
+            )
+
+            # Same normalization DecisionTreeClassifier.predict_proba applies per row
+            proba = tree.value[:, 0, :n_classes].copy()
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba /= normalizer
+            values.append(proba)
+
+            roots.append(offset)
+            offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        children = np.empty(2 * offset, dtype=np.int32)
+        children[0::2] = 2 * np.concatenate(rights)
+        children[1::2] = 2 * np.concatenate(lefts)
+
+        return cls(
+            feature=np.repeat(np.concatenate(features), 2).astype(np.int32),
+            threshold=np.repeat(_floor_float32(np.concatenate(thresholds)), 2),
+            children=children,
+            missing_left=np.repeat(np.concatenate(missing), 2),
+            values=np.ascontiguousarray(np.concatenate(values).T, dtype=np.float64),
+            roots=2 * np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=forest.classes_,
+            n_features=forest.n_features_in_,
+        )
+
+    @classmethod
+    def merge(cls, forests) -> "CompiledForest":
+        """
+        Stack compiled forests over the same features and classes into one
+        node array, so a single traversal visits every tree; the roots keep
+        each forest's trees contiguous and in order
+        """
+        first = forests[0]
+        for forest in forests[1:]:
+            if forest.n_features != first.n_features or not np.array_equal(forest.classes_, first.classes_):
+                raise ValueError("Only forests with the same features and classes can be merged")
+
+        slot_offsets = np.cumsum([0] + [len(forest.children) for forest in forests[:-1]])
+        return cls(
+            feature=np.concatenate([forest.feature for forest in forests]),
+            threshold=np.concatenate([forest.threshold for forest in forests]),
+            children=np.concatenate([
+                forest.children + np.int32(offset) for forest, offset in zip(forests, slot_offsets)
+            ]),
+            missing_left=np.concatenate([forest.missing_left for forest in forests]),
+            values=np.concatenate([forest.values for forest in forests], axis=1),
+            roots=np.concatenate([
+                forest.roots + np.int32(offset) for forest, offset in zip(forests, slot_offsets)
+            ]),
+            max_depth=max(forest.max_depth for forest in forests),
+            classes=first.classes_,
+            n_features=first.n_features,
+        )
+
+    def _as_matrix(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"X has {X.shape[1]} features, but the model expects {self.n_features}"
+            )
+        if np.isinf(X).any():
+            raise ValueError("Input X contains infinity or a value too large for dtype('float32').")
+        return X
+
+    def apply(self, X: np.ndarray, roots: np.ndarray) -> np.ndarray:
+        """Return the leaf node id reached by each (tree, row) pair for float32 rows X"""
+        n_rows = X.shape[0]
+
+        # Column-major X: rows sharing a node read one feature column sequentially
+        columns = np.ascontiguousarray(X.T).ravel()
+        column_starts = self.feature * np.int32(n_rows)
+        row_ids = np.arange(n_rows, dtype=np.int32)[np.newaxis, :]
+        has_missing = np.isnan(columns).any()
+
+        slots = np.repeat(roots[:, np.newaxis], n_rows, axis=1)
+        index = np.empty_like(slots)
+        x = np.empty(slots.shape, dtype=np.float32)
+        threshold = np.empty(slots.shape, dtype=np.float32)
+        go_left = np.empty(slots.shape, dtype=bool)
+
+        for _ in range(self.max_depth):
+            np.take(column_starts, slots, out=index)
+            index += row_ids
+            np.take(columns, index, out=x)
+            np.take(self.threshold, slots, out=threshold)
+            np.less_equal(x, threshold, out=go_left)
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left[slots]
+            slots += go_left
+            np.take(self.children, slots, out=slots)
+
+        return slots >> 1
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities averaged over all trees"""
+        X = self._as_matrix(X)
+        n_classes = self.values.shape[0]
+        proba = np.empty((X.shape[0], n_classes))
+        chunk = max(1, CHUNK_NODES // self.n_trees)
+
+        for start in range(0, X.shape[0], chunk):
+            leaves = self.apply(X[start:start + chunk], self.roots)
+            # Sum trees sequentially, in estimator order, exactly as sklearn does
+            for k in range(n_classes):
+                tree_values = np.take(self.values[k], leaves)
+                proba[start:start + chunk, k] = np.add.accumulate(tree_values, axis=0)[-1]
+
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """Most probable class label per row"""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def parity_sample(compiled: CompiledForest, n_rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Random rows that sit exactly on, and one float32 step above, split thresholds
+
+    Those are the values where a wrong comparison or rounding would show up.
+    """
+    rng = np.random.default_rng(seed)
+    sample = np.empty((n_rows, compiled.n_features), dtype=np.float32)
+    slots = np.arange(0, len(compiled.children), 2)
+    is_split = compiled.children[slots] != slots
+
+    for feature in range(compiled.n_features):
+        thresholds = compiled.threshold[slots[is_split & (compiled.feature[slots] == feature)]]
+        if len(thresholds) == 0:
+            sample[:, feature] = rng.normal(size=n_rows)
+            continue
+        picked = rng.choice(thresholds, size=n_rows)
+        step_up = rng.random(n_rows) < 0.5
+        picked[step_up] = np.nextafter(picked[step_up], np.float32(np.inf))
+        sample[:, feature] = picked
+
+    return sample
+
+
+def sequential_proba(forest, X) -> np.ndarray:
+    """sklearn's predict_proba with trees summed on one thread, in estimator order"""
+    # Threaded accumulation makes sklearn's own sum order nondeterministic
+    sequential = copy.copy(forest)
+    sequential.n_jobs = 1
+
+    if hasattr(forest, "feature_names_in_"):
+        import pandas as pd
+        X = pd.DataFrame(X, columns=forest.feature_names_in_)
+
+    return sequential.predict_proba(X)
+
+
+def verify_forest(forest, compiled: CompiledForest, X) -> bool:
+    """Check compiled probabilities are bit-identical to sklearn's sequential predict_proba"""
+    return np.array_equal(compiled.predict_proba(X), sequential_proba(forest, X))
+
+
+def compile_forest(forest, name: str, parity_rows: int = 512) -> Optional[CompiledForest]:
+    """
+    Compile a forest and check it against sklearn on boundary rows
+
+    Returns None (so callers keep using sklearn) if compilation fails or any
+    probability differs from sklearn's.
+    """
+    try:
+        compiled = CompiledForest.from_sklearn(forest)
+        if not verify_forest(forest, compiled, parity_sample(compiled, parity_rows)):
+            raise ValueError("predict_proba output differs from sklearn")
+
+        logger.info(
+            f"Compiled forest for {name}: {compiled.n_trees} trees, "
+            f"{len(compiled.feature)} nodes, depth {compiled.max_depth}"
+        )
+        return compiled
+
+    except Exception as e:
+        logger.warning(f"Compiled forest disabled for {name}, using sklearn: {str(e)}")
+        return None
+
+
+def select_forest(compiled: Optional[CompiledForest], forest, n_rows: int):
+    """
+    Pick the scorer for a batch: the compiled forest, or sklearn's Cython
+    traversal once the batch is past COMPILED_TREES_MAX_ROWS, where per-level
+    NumPy gathers stop paying off
+    """
+    if compiled is not None and n_rows <= settings.COMPILED_TREES_MAX_ROWS:
+        return compiled
+    return forest
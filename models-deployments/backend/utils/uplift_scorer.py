@@ -0,0 +1,122 @@
+import numpy as np
+from typing import Any, List, Optional, Sequence, Tuple
+
+from config.logging_config import logger
+from utils.tree_engine import CHUNK_NODES, CompiledForest, sequential_proba
+
+# Request fields in the order the uplift models were trained on (f0..f11)
+FEATURE_ORDER = [
+    "age",
+    "monthlyIncome",
+    "tenure",
+    "engagementScore",
+    "sessionTime",
+    "activityChange",
+    "churnRisk",
+    "appVisitsPerWeek",
+    "regionCode",
+    "totalClicks",
+    "customerRating",
+    "satisfactionTrend",
+]
+
+
+class UpliftScorer:
+    """
+    T-learner scorer evaluating the treated and control forests in one pass
+
+    Both compiled forests are merged into a single node array. Each batch is
+    laid out once as a contiguous float32 matrix in feature order, traversed
+    once for all trees of both models, and the leaf values of each model's
+    trees are then summed separately. No DataFrame is built and no sklearn
+    feature-name checks run.
+    """
+
+    def __init__(
+        self,
+        treated: CompiledForest,
+        control: CompiledForest,
+        feature_order: Sequence[str] = FEATURE_ORDER,
+        positive_class: Any = 1,
+    ):
+        if treated.n_features != len(feature_order):
+            raise ValueError(
+                f"Models expect {treated.n_features} features, got {len(feature_order)} feature names"
+            )
+        self.forest = CompiledForest.merge([treated, control])
+        self.feature_order = list(feature_order)
+        self.n_treated = treated.n_trees
+        self.n_control = control.n_trees
+
+        positive = np.flatnonzero(self.forest.classes_ == positive_class)
+        if len(positive) != 1:
+            raise ValueError(f"Class {positive_class!r} not found in {self.forest.classes_}")
+        self.positive = positive[0]
+        self.positive_values = np.ascontiguousarray(self.forest.values[self.positive])
+
+    def features(self, requests: List[Any]) -> np.ndarray:
+        """Lay out validated requests as a contiguous float32 matrix in feature order"""
+        features = np.empty((len(requests), len(self.feature_order)), dtype=np.float32)
+        for row, request in enumerate(requests):
+            features[row] = [getattr(request, name) for name in self.feature_order]
+        return features
+
+    def score(self, X) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return treated probabilities, control probabilities and uplift for rows X"""
+        X = self.forest._as_matrix(X)
+        p_treat = np.empty(X.shape[0])
+        p_control = np.empty(X.shape[0])
+        chunk = max(1, CHUNK_NODES // self.forest.n_trees)
+
+        for start in range(0, X.shape[0], chunk):
+            leaves = self.forest.apply(X[start:start + chunk], self.forest.roots)
+            tree_values = np.take(self.positive_values, leaves)
+            # Sum each model's trees sequentially, in estimator order, exactly as sklearn does
+            p_treat[start:start + chunk] = np.add.accumulate(tree_values[:self.n_treated], axis=0)[-1]
+            p_control[start:start + chunk] = np.add.accumulate(tree_values[self.n_treated:], axis=0)[-1]
+
+        p_treat /= self.n_treated
+        p_control /= self.n_control
+        return p_treat, p_control, p_treat - p_control
+
+    def score_requests(self, requests: List[Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Score validated requests"""
+        return self.score(self.features(requests))
+
+
+def build_uplift_scorer(
+    treated_model,
+    control_model,
+    treated: Optional[CompiledForest],
+    control: Optional[CompiledForest],
+) -> Optional[UpliftScorer]:
+    """
+    Fuse the compiled treated and control forests and check the scorer against sklearn
+
+    Returns None (so callers keep using the separate models) if either forest
+    is not compiled or any probability differs from sklearn's.
+    """
+    if treated is None or control is None:
+        return None
+
+    try:
+        scorer = UpliftScorer(treated, control)
+
+        # Both halves of the merged traversal must still match sklearn
+        sample = np.random.default_rng(0).normal(0, 10, size=(512, treated.n_features)).astype(np.float32)
+        p_treat, p_control, _ = scorer.score(sample)
+        if not (
+            np.array_equal(p_treat, sequential_proba(treated_model, sample)[:, scorer.positive])
+            and np.array_equal(p_control, sequential_proba(control_model, sample)[:, scorer.positive])
+        ):
+            raise ValueError("probabilities differ from sklearn")
+
+        logger.info(
+            f"Uplift scorer ready: {scorer.n_treated} treated + {scorer.n_control} control trees"
+        )
+        return scorer
+
+    except Exception as e:
+        logger.warning(f"Uplift scorer disabled, scoring models separately: {str(e)}")
+        return None
+
@@ -0,0 +1,90 @@
+import asyncio
+import math
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from config.logging_config import logger
+from utils.inference_executor import run_inference
+from utils.model_loader import ModelStore, load_models, mark_warm, models as active_models
+
+
+class ModelWarmup(NamedTuple):
+    """What the background warmup and the hot reload smoke test need to exercise one route's models"""
+    models: Tuple[str, ...]
+    validate_record: Callable[[Any], Any]
+    score_records: Callable[..., List[Dict[str, Any]]]
+    record: Dict[str, Any]
+
+
+def check_finite(value: Any, path: str = "result"):
+    """Raise if a prediction contains NaN or infinite numbers"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            check_finite(item, f"{path}.{key}")
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value):
+            check_finite(item, f"{path}[{i}]")
+    elif isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"Smoke prediction has a non-finite {path}: {value}")
+
+
+def smoke_test(warmups: Dict[str, ModelWarmup], name: str, store: ModelStore) -> Dict[str, Any]:
+    """
+    Score the warmup record of the route using a model on a candidate store
+
+    Raises if scoring fails or returns NaN/inf. The active version's answer
+    for the same record is returned alongside for comparison.
+    """
+    warmup = next((warmup for warmup in warmups.values() if name in warmup.models), None)
+    if warmup is None:
+        raise ValueError(f"No smoke request defined for {name}")
+
+    record = warmup.validate_record(warmup.record)
+    start = time.perf_counter()
+    results = warmup.score_records([record], store)
+    latency_ms = (time.perf_counter() - start) * 1000
+    if len(results) != 1:
+        raise ValueError(f"Smoke prediction returned {len(results)} results for 1 record")
+    check_finite(results[0])
+
+    try:
+        active_result = warmup.score_records([record], active_models.snapshot())[0]
+    except Exception:
+        # Nothing active yet (first load failed or lazy mode)
+        active_result = None
+
+    return {
+        "result": results[0],
+        "active_result": active_result,
+        "latency_ms": round(latency_ms, 2),
+    }
+
+
+async def warmup_models(warmups: Dict[str, ModelWarmup], priority: List[str]):
+    """
+    Load the models in priority order and score one synthetic record each
+
+    The inference pages the unpickled arrays into memory and runs the compiled
+    kernels once, so the first real request doesn't pay for it. A failure is
+    logged and the warmup moves on to the next model.
+    """
+    for name in priority:
+        warmup = warmups.get(name)
+        if warmup is None:
+            logger.warning(f"Unknown model in warmup priority list: {name}")
+            continue
+
+        try:
+            if not await load_models(*warmup.models):
+                logger.warning(f"Skipping warmup of {name}: model failed to load")
+                continue
+
+            start = time.perf_counter()
+            await run_inference(warmup.score_records, [warmup.validate_record(warmup.record)])
+            mark_warm(*warmup.models)
+            logger.info(f"🔥 {name} warmed up in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Warmup of {name} failed: {str(e)}", exc_info=True)